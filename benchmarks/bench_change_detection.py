@@ -0,0 +1,109 @@
+"""Time taken by change detection for growing numbers of events.
+
+Each timetable has 40 lessons a week. The calendar holds the previous
+version of it, in which a share of the lessons were moved, edited, added
+or removed. The time per event should stay flat as the number of events
+grows.
+
+    python benchmarks/bench_change_detection.py [--sizes 1000 10000 100000]
+"""
+
+import argparse
+import random
+import time
+from dataclasses import replace
+from datetime import datetime, timedelta
+from zoneinfo import ZoneInfo
+
+from pronote2calendar.change_detection import content_hash, get_changes
+from pronote2calendar.models import CalendarEvent, LessonEvent
+
+FIRST_DAY = datetime(2025, 9, 1, tzinfo=ZoneInfo("Europe/Paris"))
+HOURS = (8, 9, 10, 11, 13, 14, 15, 16)
+
+
+def make_lessons(count: int) -> list[LessonEvent]:
+    lessons: list[LessonEvent] = []
+    day = 0
+    while len(lessons) < count:
+        date = FIRST_DAY + timedelta(days=day)
+        day += 1
+        if date.isoweekday() > 5:
+            continue
+        for hour in HOURS[: count - len(lessons)]:
+            start = date.replace(hour=hour)
+            lessons.append(
+                LessonEvent(
+                    start=start,
+                    end=start + timedelta(minutes=55),
+                    summary=f"Subject {(day + hour) % 12}",
+                    description=f"Teacher {hour}",
+                    location=f"Room {(day * hour) % 30}",
+                )
+            )
+    return lessons
+
+
+def make_calendar(
+    lessons: list[LessonEvent], churn: float, rng: random.Random
+) -> list[CalendarEvent]:
+    events = []
+    for index, lesson in enumerate(lessons):
+        draw = rng.random()
+        if draw < churn / 4:
+            continue  # lesson added since
+        if draw < churn / 2:
+            lesson = replace(lesson, location="Elsewhere")
+        elif draw < churn * 3 / 4:
+            moved = lesson.start + timedelta(days=1, hours=3)
+            lesson = replace(lesson, start=moved, end=moved + timedelta(minutes=55))
+        elif draw < churn:
+            events.append(_calendar_event(f"removed{index}", lesson, "Cancelled"))
+        events.append(_calendar_event(f"e{index}", lesson))
+    return events
+
+
+def _calendar_event(
+    event_id: str, lesson: LessonEvent, summary: str | None = None
+) -> CalendarEvent:
+    if summary is not None:
+        lesson = replace(lesson, summary=summary)
+    return CalendarEvent(
+        id=event_id,
+        start=lesson.start,
+        end=lesson.end,
+        summary=lesson.summary,
+        location=lesson.location,
+        content_hash=content_hash(lesson),
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--sizes", type=int, nargs="+", default=[1_000, 10_000, 100_000]
+    )
+    parser.add_argument("--churn", type=float, default=0.05)
+    parser.add_argument("--runs", type=int, default=3)
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    for size in args.sizes:
+        lessons = make_lessons(size)
+        events = make_calendar(lessons, args.churn, rng)
+        timings = []
+        for _ in range(args.runs):
+            begin = time.perf_counter()
+            changes = get_changes(lessons, events)
+            timings.append(time.perf_counter() - begin)
+        best = min(timings)
+        print(
+            f"{size:>7} events: {best * 1000:9.1f}ms "
+            f"{best / size * 1e6:6.2f}us/event "
+            f"add={len(changes.to_add)} update={len(changes.to_update)} "
+            f"remove={len(changes.to_remove)}"
+        )
+
+
+if __name__ == "__main__":
+    main()
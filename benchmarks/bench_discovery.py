@@ -0,0 +1,66 @@
+"""Cold-start time of the Calendar service with and without the discovery cache.
+
+Each measurement runs in a fresh interpreter so that module imports and the
+discovery document parsing are both included, as in a cron-started container.
+
+    python benchmarks/bench_discovery.py [--runs 20]
+"""
+
+import argparse
+import statistics
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+WITHOUT_CACHE = """
+import time
+start = time.perf_counter()
+from googleapiclient.discovery import build
+build("calendar", "v3", developerKey="benchmark")
+print(time.perf_counter() - start)
+"""
+
+WITH_CACHE = """
+import time
+start = time.perf_counter()
+from pathlib import Path
+from googleapiclient.discovery import build_from_document
+from pronote2calendar.discovery import load_discovery_document
+document = load_discovery_document(Path({cache_file!r}))
+build_from_document(document, developerKey="benchmark")
+print(time.perf_counter() - start)
+"""
+
+
+def measure(code: str, runs: int) -> list[float]:
+    return [
+        float(subprocess.check_output([sys.executable, "-c", code], text=True))
+        for _ in range(runs)
+    ]
+
+
+def report(label: str, timings: list[float]):
+    print(
+        f"{label:<16} median={statistics.median(timings) * 1000:7.1f}ms "
+        f"min={min(timings) * 1000:7.1f}ms max={max(timings) * 1000:7.1f}ms"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=20)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        cache_file = str(Path(directory) / "discovery.json")
+        with_cache = WITH_CACHE.format(cache_file=cache_file)
+        # Populate the cache so that only warm-cache starts are measured
+        measure(with_cache, 1)
+
+        report("without cache", measure(WITHOUT_CACHE, args.runs))
+        report("with cache", measure(with_cache, args.runs))
+
+
+if __name__ == "__main__":
+    main()
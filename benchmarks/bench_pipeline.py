@@ -0,0 +1,90 @@
+"""Time taken by each step of a run, replayed from a lesson snapshot.
+
+The lessons recorded with the Pronote client in "record" mode go through the
+adjustments, the rendering of the events and the change detection, against
+a calendar holding the events of a previous, identical run. The adjustments
+and templates are read from config.yaml when the benchmark is run from the
+directory holding it, otherwise the defaults are used.
+
+    python benchmarks/bench_pipeline.py lessons.json [--runs 5]
+"""
+
+import argparse
+import time
+from collections.abc import Callable
+from pathlib import Path
+from typing import Any
+
+from pronote2calendar.change_detection import content_hash, get_changes
+from pronote2calendar.event_creator import create_lesson_events
+from pronote2calendar.lesson_snapshot import ReplayPronoteClient
+from pronote2calendar.models import CalendarEvent
+from pronote2calendar.settings import AjustmentsSettings, EventsSettings, Settings
+from pronote2calendar.subject_adjustments import apply_subject_adjustments
+from pronote2calendar.time_adjustments import apply_time_adjustments
+
+
+def load_config() -> tuple[AjustmentsSettings, EventsSettings]:
+    if Path("config.yaml").exists():
+        settings = Settings()  # type: ignore[call-arg]
+        return settings.adjustments, settings.events
+    return AjustmentsSettings(), EventsSettings()
+
+
+def best_time(runs: int, step: Callable[[], Any]) -> tuple[float, Any]:
+    timings = []
+    for _ in range(runs):
+        begin = time.perf_counter()
+        result = step()
+        timings.append(time.perf_counter() - begin)
+    return min(timings), result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("snapshot", type=Path)
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    adjustments, events = load_config()
+    client = ReplayPronoteClient(args.snapshot)
+
+    def adjust():
+        lessons = client.get_lessons(client.start, client.end)
+        lessons = apply_time_adjustments(lessons, adjustments.time)
+        return apply_subject_adjustments(lessons, adjustments.subject)
+
+    adjust_time, lessons = best_time(args.runs, adjust)
+    render_time, new_events = best_time(
+        args.runs, lambda: create_lesson_events(lessons, events.templates)
+    )
+    existing_events = [
+        CalendarEvent(
+            id=f"e{index}",
+            start=event.start,
+            end=event.end,
+            summary=event.summary,
+            location=event.location,
+            content_hash=content_hash(event),
+        )
+        for index, event in enumerate(new_events)
+    ]
+    diff_time, changes = best_time(
+        args.runs, lambda: get_changes(new_events, existing_events)
+    )
+
+    print(f"{len(lessons)} lessons, {len(new_events)} events")
+    for name, timing in (
+        ("adjustments", adjust_time),
+        ("rendering", render_time),
+        ("change detection", diff_time),
+    ):
+        print(f"{name:>16}: {timing * 1000:9.2f}ms")
+    print(
+        f"add={len(changes.to_add)} update={len(changes.to_update)} "
+        f"remove={len(changes.to_remove)}"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+"""Connections opened and per-call latency of the Calendar API transports.
+
+A local fake Calendar server answers ``events.list`` calls. Opening a
+connection costs ``--handshake`` milliseconds, standing in for the TCP and
+TLS handshakes with the real API.
+
+    python benchmarks/bench_transport.py [--calls 50] [--handshake 30]
+"""
+
+import argparse
+import json
+import statistics
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import httplib2  # type: ignore
+from google.auth.credentials import AnonymousCredentials
+from google_auth_httplib2 import AuthorizedHttp  # type: ignore
+from googleapiclient import discovery_cache  # type: ignore
+from googleapiclient.discovery import build_from_document  # type: ignore
+
+from pronote2calendar.discovery import compact_discovery_document
+from pronote2calendar.transport import RequestsHttp
+
+BODY = json.dumps(
+    {"items": [{"id": f"e{i}", "summary": "Math" * 20} for i in range(50)]}
+).encode()
+
+
+class FakeCalendarHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+
+    def setup(self):
+        super().setup()
+        self.server.connections += 1  # type: ignore[attr-defined]
+        time.sleep(self.server.handshake)  # type: ignore[attr-defined]
+
+    def do_GET(self):
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(BODY)))
+        self.end_headers()
+        self.wfile.write(BODY)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def run(server, http, calls: int) -> list[float]:
+    document = compact_discovery_document(
+        json.loads(discovery_cache.get_static_doc("calendar", "v3"))
+    )
+    document["rootUrl"] = f"http://127.0.0.1:{server.server_port}/"
+    service = build_from_document(document, http=http)
+
+    timings = []
+    for _ in range(calls):
+        start = time.perf_counter()
+        service.events().list(calendarId="calendar@example.com").execute()
+        timings.append(time.perf_counter() - start)
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--calls", type=int, default=50)
+    parser.add_argument("--handshake", type=float, default=30, help="milliseconds")
+    args = parser.parse_args()
+
+    transports = {
+        "httplib2": lambda: AuthorizedHttp(
+            AnonymousCredentials(), http=httplib2.Http()
+        ),
+        "requests": lambda: RequestsHttp(AnonymousCredentials(), timeout=30),
+    }
+    for name, transport in transports.items():
+        server = ThreadingHTTPServer(("127.0.0.1", 0), FakeCalendarHandler)
+        server.connections = 0  # type: ignore[attr-defined]
+        server.handshake = args.handshake / 1000  # type: ignore[attr-defined]
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        try:
+            timings = run(server, transport(), args.calls)
+        finally:
+            server.shutdown()
+            server.server_close()
+
+        print(
+            f"{name:<10} connections={server.connections:<4} "
+            f"median={statistics.median(timings) * 1000:6.2f}ms "
+            f"total={sum(timings) * 1000:8.1f}ms"
+        )
+
+
+if __name__ == "__main__":
+    main()
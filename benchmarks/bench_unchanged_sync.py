@@ -0,0 +1,213 @@
+"""API calls made by a second synchronization of an unchanged timetable.
+
+The lessons are synced twice to an in-memory calendar that returns event
+times in its own time zone, as Google Calendar does. The second run should
+not write anything, and should not call the API at all with the event
+mirror. Exits with status 1 if the second run writes to the calendar.
+
+    python benchmarks/bench_unchanged_sync.py [--weeks 4] [--timezone UTC]
+"""
+
+import argparse
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Any
+from zoneinfo import ZoneInfo
+
+from pronote2calendar.change_detection import get_changes
+from pronote2calendar.event_mirror import EventMirror
+from pronote2calendar.google_calendar_client import GoogleCalendarClient
+from pronote2calendar.models import LessonEvent
+from pronote2calendar.retry import RetryPolicy
+
+CALENDAR_ID = "calendar@example.com"
+PARIS = ZoneInfo("Europe/Paris")
+# Covers the end of daylight saving time
+FIRST_DAY = datetime(2025, 10, 20, tzinfo=PARIS)
+
+
+class Request:
+    def __init__(self, calendar, method, kwargs):
+        self.calendar = calendar
+        self.method = method
+        self.kwargs = kwargs
+        self.headers: dict[str, str] = {}
+
+    def execute(self):
+        return self.calendar.handle(self)
+
+
+class Batch:
+    def __init__(self, callback):
+        self.callback = callback
+        self.requests = []
+
+    def add(self, request, request_id=None):
+        self.requests.append((request_id, request))
+
+    def execute(self):
+        for request_id, request in self.requests:
+            self.callback(request_id, request.execute(), None)
+
+
+class Events:
+    def __init__(self, calendar):
+        self.calendar = calendar
+
+    def __getattr__(self, method):
+        return lambda **kwargs: Request(self.calendar, method, kwargs)
+
+
+class Calendar:
+    """Calendar service storing events and returning them in ``timezone``."""
+
+    def __init__(self, timezone: ZoneInfo):
+        self.timezone = timezone
+        self.stored: dict[str, dict] = {}
+        self.calls: Counter[str] = Counter()
+
+    def events(self):
+        return Events(self)
+
+    def new_batch_http_request(self, callback=None):
+        return Batch(callback)
+
+    def handle(self, request: Request):
+        self.calls[request.method] += 1
+        kwargs = request.kwargs
+        if request.method == "list":
+            offset = int(kwargs.get("pageToken") or 0)
+            items = [self._localize(event) for event in self.stored.values()]
+            page: dict[str, Any] = {
+                "items": items[offset : offset + kwargs["maxResults"]]
+            }
+            if offset + kwargs["maxResults"] < len(items):
+                page["nextPageToken"] = str(offset + kwargs["maxResults"])
+            return page
+        if request.method == "insert":
+            event_id = kwargs["body"]["id"]
+            self.stored[event_id] = {**kwargs["body"], "etag": '"1"'}
+            return {"id": event_id, "etag": '"1"'}
+        if request.method == "patch":
+            self.stored[kwargs["eventId"]].update(kwargs["body"])
+            return {"id": kwargs["eventId"], "etag": '"2"'}
+        del self.stored[kwargs["eventId"]]
+        return ""
+
+    def _localize(self, event: dict) -> dict:
+        def localize(value: dict) -> dict:
+            moment = datetime.fromisoformat(value["dateTime"])
+            return {"dateTime": moment.astimezone(self.timezone).isoformat()}
+
+        return {
+            key: value
+            for key, value in {
+                **event,
+                "start": localize(event["start"]),
+                "end": localize(event["end"]),
+            }.items()
+            if key != "description"
+        }
+
+
+def make_client(calendar: Calendar) -> GoogleCalendarClient:
+    client = GoogleCalendarClient.__new__(GoogleCalendarClient)
+    client.service = calendar
+    client.service_factory = lambda: calendar
+    client.calendar_id = CALENDAR_ID
+    client.batch_size = 50
+    client.page_size = 250
+    client.sync_state_file = None
+    client.concurrency = 1
+    client.rate_limiter = None
+    client.retry_policy = RetryPolicy()
+    client._thread_local = threading.local()
+    client.token_cache_file = None
+    return client
+
+
+def make_lessons(weeks: int) -> list[LessonEvent]:
+    lessons = []
+    for day in range(weeks * 7):
+        date = FIRST_DAY + timedelta(days=day)
+        if date.isoweekday() > 5:
+            continue
+        for hour in (8, 9, 10, 11, 13, 14, 15, 16):
+            start = date.replace(hour=hour)
+            lessons.append(
+                LessonEvent(
+                    start=start,
+                    end=start + timedelta(minutes=55),
+                    summary=f"Subject {hour}",
+                    description="<b>Teacher</b><br>" * 20,
+                    location=f"Room {day % 10}",
+                )
+            )
+    return lessons
+
+
+def sync(client, lessons, mirror: EventMirror | None) -> tuple[int, float]:
+    start, end = FIRST_DAY, FIRST_DAY + timedelta(weeks=52)
+    begin = time.perf_counter()
+    if mirror is not None and not mirror.needs_verification(
+        timedelta(days=7), start, end
+    ):
+        existing = mirror.get_events(start, end)
+    else:
+        existing = client.get_events(start, end)
+        if mirror is not None:
+            mirror.replace(start, end, existing)
+    changes = get_changes(lessons, existing)
+    result = client.apply_changes(changes)
+    if mirror is not None:
+        mirror.apply(result)
+    return (
+        len(changes.to_add) + len(changes.to_update) + len(changes.to_remove),
+        time.perf_counter() - begin,
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--weeks", type=int, default=4)
+    parser.add_argument("--timezone", default="UTC")
+    args = parser.parse_args()
+
+    lessons = make_lessons(args.weeks)
+    print(f"{len(lessons)} lessons, calendar in {args.timezone}")
+
+    writes = 0
+    with tempfile.TemporaryDirectory() as directory:
+        for label, mirror in (
+            ("calendar", None),
+            ("mirror", EventMirror(Path(directory) / "mirror.sqlite", CALENDAR_ID)),
+        ):
+            calendar = Calendar(ZoneInfo(args.timezone))
+            client = make_client(calendar)
+            for run in (1, 2):
+                calendar.calls.clear()
+                changes, elapsed = sync(client, lessons, mirror)
+                calls = dict(sorted(calendar.calls.items()))
+                print(
+                    f"{label:<9} run {run}: changes={changes:<4} "
+                    f"api_calls={sum(calendar.calls.values()):<4} {calls} "
+                    f"{elapsed * 1000:.1f}ms"
+                )
+            writes += sum(
+                count for method, count in calendar.calls.items() if method != "list"
+            )
+            if mirror is not None:
+                mirror.close()
+
+    if writes:
+        print(f"Second runs wrote {writes} times to an unchanged calendar")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
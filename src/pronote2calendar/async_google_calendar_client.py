@@ -0,0 +1,318 @@
+import asyncio
+import json
+import logging
+from collections.abc import AsyncIterator
+from datetime import datetime
+from typing import Any
+
+import httplib2  # type: ignore
+import httpx
+from google.auth.transport.requests import Request
+from google.oauth2 import service_account
+from googleapiclient import discovery_cache  # type: ignore
+from googleapiclient.discovery import build_from_document  # type: ignore
+from googleapiclient.errors import HttpError  # type: ignore
+
+from pronote2calendar.calendar_api import (
+    DESCRIBED_LIST_FIELDS,
+    EXTENDED_PROPERTY_SOURCE,
+    LIST_FIELDS,
+    SCOPES,
+    SYNC_FIELDS,
+    Operation,
+    Progress,
+    build_request,
+    conflict_request,
+    event_from_calendar_dict,
+    merge_sync_page,
+    slot_request,
+    window_events,
+    with_descriptions,
+)
+from pronote2calendar.calendar_sync_state import CalendarSyncState
+from pronote2calendar.discovery import (
+    SERVICE_NAME,
+    SERVICE_VERSION,
+    compact_discovery_document,
+    load_discovery_document,
+)
+from pronote2calendar.journal import ChangeJournal
+from pronote2calendar.models import ApplyResult, CalendarEvent, ChangeSet, LessonEvent
+from pronote2calendar.rate_limiter import TokenBucket
+from pronote2calendar.retry import RetryPolicy
+from pronote2calendar.settings import GoogleCalendarSettings
+from pronote2calendar.token_cache import use_token_cache
+from pronote2calendar.transport import WIRE_HEADERS
+
+logger = logging.getLogger(__name__)
+
+
+class AsyncGoogleCalendarClient:
+    """Asyncio variant of ``GoogleCalendarClient``, requiring the ``async`` extra.
+
+    Requests are built with the Google API client library and sent with
+    ``httpx``, so that many calendars can be synced in a single event loop.
+    Write requests are sent individually, with at most ``concurrency``
+    requests in flight, instead of being grouped in batches. The client
+    should be closed with ``aclose`` (or used as an async context manager)
+    unless an ``http_client`` owned by the caller is given.
+    """
+
+    def __init__(
+        self,
+        config: GoogleCalendarSettings,
+        credentials_file_path: str,
+        http_client: httpx.AsyncClient | None = None,
+    ):
+        self.credentials = service_account.Credentials.from_service_account_file(
+            credentials_file_path, scopes=SCOPES
+        )
+        self.token_cache_file = config.token_cache_file
+        document = (
+            load_discovery_document(config.discovery_cache_file)
+            if config.discovery_cache_file is not None
+            else compact_discovery_document(
+                json.loads(
+                    discovery_cache.get_static_doc(SERVICE_NAME, SERVICE_VERSION)
+                )
+            )
+        )
+        # Only used to build the requests, which are then sent with httpx
+        self.service = build_from_document(document, http=httplib2.Http())
+        self.http_client = http_client or httpx.AsyncClient(timeout=config.timeout)
+        self._owns_http_client = http_client is None
+        self.calendar_id = config.calendar_id
+        self.batch_size = config.batch_size
+        self.page_size = config.page_size
+        self.sync_state_file = config.sync_state_file
+        self.semaphore = asyncio.Semaphore(config.concurrency)
+        self.rate_limiter = (
+            TokenBucket(config.max_requests_per_second)
+            if config.max_requests_per_second
+            else None
+        )
+        self.retry_policy = RetryPolicy(max_retries=config.max_retries)
+        self._auth_lock = asyncio.Lock()
+
+    async def __aenter__(self) -> "AsyncGoogleCalendarClient":
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.aclose()
+
+    async def aclose(self):
+        if self._owns_http_client:
+            await self.http_client.aclose()
+
+    async def get_events(
+        self, start: datetime, end: datetime, prune_before: datetime | None = None
+    ) -> list[CalendarEvent]:
+        if self.sync_state_file is None:
+            events = [event async for event in self.iter_events(start, end)]
+        else:
+            events = await self._get_events_incrementally(start, end, prune_before)
+        if any(event.content_hash is None for event in events):
+            logger.info("Some events have no content hash, fetching their descriptions")
+            described = [
+                event
+                async for event in self.iter_events(
+                    start, end, fields=DESCRIBED_LIST_FIELDS
+                )
+            ]
+            events = with_descriptions(events, described)
+        logger.debug(
+            "Retrieved %d events from calendar %s", len(events), self.calendar_id
+        )
+        return events
+
+    async def iter_events(
+        self, start: datetime, end: datetime, fields: str = LIST_FIELDS
+    ) -> AsyncIterator[CalendarEvent]:
+        async for page in self._list_pages(
+            timeMin=start.isoformat(),
+            timeMax=end.isoformat(),
+            privateExtendedProperty=["source=" + EXTENDED_PROPERTY_SOURCE],
+            orderBy="startTime",
+            fields=fields,
+        ):
+            for event_dict in page.get("items", []):
+                yield event_from_calendar_dict(event_dict)
+
+    async def _list_pages(self, **params) -> AsyncIterator[dict[str, Any]]:
+        page_token: str | None = None
+        while True:
+            page = await self._execute(
+                self.service.events().list(
+                    calendarId=self.calendar_id,
+                    maxResults=self.page_size,
+                    pageToken=page_token,
+                    singleEvents=True,
+                    **params,
+                )
+            )
+            logger.debug("Retrieved page of %d events", len(page.get("items", [])))
+            yield page
+
+            page_token = page.get("nextPageToken")
+            if not page_token:
+                return
+
+    async def _get_events_incrementally(
+        self, start: datetime, end: datetime, prune_before: datetime | None = None
+    ) -> list[CalendarEvent]:
+        assert self.sync_state_file is not None
+        state = CalendarSyncState.load(self.sync_state_file, self.calendar_id)
+
+        if state.sync_token is not None:
+            try:
+                await self._sync(state, syncToken=state.sync_token, fields=SYNC_FIELDS)
+            except HttpError as error:
+                if error.resp.status != 410:
+                    raise
+                logger.info("Calendar sync token expired, performing a full sync")
+                state.reset()
+
+        if state.sync_token is None:
+            await self._sync(state, fields=SYNC_FIELDS)
+
+        events = window_events(state, start, end, prune_before)
+        state.save(self.sync_state_file)
+        return events
+
+    async def _sync(self, state: CalendarSyncState, **params):
+        changed = 0
+        async for page in self._list_pages(**params):
+            changed += merge_sync_page(state, page)
+
+        logger.debug(
+            "%s sync of calendar %s returned %d events",
+            "Incremental" if "syncToken" in params else "Full",
+            self.calendar_id,
+            changed,
+        )
+
+    async def apply_changes(
+        self, changes: ChangeSet, journal: ChangeJournal | None = None
+    ) -> ApplyResult:
+        """Apply the changes to the calendar.
+
+        With a ``journal``, the changes and the operations completed are
+        journaled every ``batch_size`` operations, as by
+        ``GoogleCalendarClient``; committing the journal is left to the caller.
+        """
+        operations = [Operation("add", event) for event in changes.to_add]
+        operations += [Operation("remove", event) for event in changes.to_remove]
+        operations += [Operation("update", diff) for diff in changes.to_update]
+
+        result = ApplyResult()
+        # The journal syncs its writes to disk: don't block the event loop
+        if journal is not None:
+            await asyncio.to_thread(journal.begin, changes)
+        tasks = [
+            asyncio.ensure_future(self._apply(operation)) for operation in operations
+        ]
+        progress = Progress(result)
+        completed = 0
+        try:
+            for operation, task in zip(operations, tasks, strict=True):
+                response, exception = await task
+                operation.complete(response, exception, result)
+                completed += 1
+                if journal is not None and (
+                    completed % self.batch_size == 0 or completed == len(operations)
+                ):
+                    await asyncio.to_thread(journal.record, progress.completed())
+                    progress = Progress(result)
+        except BaseException:
+            # Don't leave writes running once the caller got the error, and
+            # journal the ones that completed meanwhile
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            for operation, task in zip(
+                operations[completed:], tasks[completed:], strict=True
+            ):
+                if not task.cancelled() and task.exception() is None:
+                    operation.complete(*task.result(), result)
+            if journal is not None:
+                await asyncio.to_thread(journal.record, progress.completed())
+            raise
+
+        logger.debug(
+            "Applied %d changes to calendar %s: add=%d update=%d remove=%d failed=%d",
+            len(result.added) + len(result.updated) + len(result.removed),
+            self.calendar_id,
+            len(result.added),
+            len(result.updated),
+            len(result.removed),
+            len(result.failed),
+        )
+        return result
+
+    async def _apply(self, operation: Operation) -> tuple[Any, Exception | None]:
+        try:
+            try:
+                request = build_request(self.service, self.calendar_id, operation)
+                return await self._execute(request), None
+            except HttpError as error:
+                if not operation.is_conflict(error):
+                    raise
+                return await self._insert_conflicting(operation), None
+        except HttpError as error:
+            return None, error
+
+    async def _insert_conflicting(self, operation: Operation) -> Any:
+        assert isinstance(operation.item, LessonEvent)
+        event = operation.item
+        existing = await self._execute(
+            slot_request(self.service, self.calendar_id, event)
+        )
+        return await self._execute(
+            conflict_request(self.service, self.calendar_id, event, existing)
+        )
+
+    async def _execute(self, request) -> Any:
+        async def attempt():
+            if self.rate_limiter is not None:
+                await self.rate_limiter.acquire_async()
+            async with self.semaphore:
+                return await self._send(request)
+
+        return await self.retry_policy.call_async(attempt)
+
+    async def _send(self, request) -> Any:
+        headers = dict(request.headers)
+        headers["authorization"] = f"Bearer {await self._access_token()}"
+        # Raise the same errors as the other transports so retries handle them
+        try:
+            response = await self.http_client.request(
+                request.method, request.uri, content=request.body, headers=headers
+            )
+        except httpx.TimeoutException as e:
+            raise TimeoutError(str(e)) from e
+        except httpx.TransportError as e:
+            raise ConnectionError(str(e)) from e
+
+        info: dict[str, Any] = {
+            key: value
+            for key, value in response.headers.items()
+            if key not in WIRE_HEADERS
+        }
+        info["status"] = response.status_code
+        http_response = httplib2.Response(info)
+        http_response.reason = response.reason_phrase
+        # Raises HttpError for error statuses and decodes the JSON body
+        return request.postproc(http_response, response.content)
+
+    async def _access_token(self) -> str:
+        async with self._auth_lock:
+            if not self.credentials.valid:
+                # google-auth is synchronous: refresh without blocking the loop
+                await asyncio.to_thread(self._refresh_token)
+        return self.credentials.token
+
+    def _refresh_token(self):
+        if self.token_cache_file is not None:
+            use_token_cache(self.credentials, self.token_cache_file)
+        else:
+            self.credentials.refresh(Request())
@@ -0,0 +1,323 @@
+import base64
+import hashlib
+import logging
+from collections.abc import Iterable
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, Literal
+
+from googleapiclient.errors import HttpError  # type: ignore
+
+from pronote2calendar.calendar_sync_state import CalendarSyncState
+from pronote2calendar.change_detection import content_hash
+from pronote2calendar.models import (
+    ApplyResult,
+    CalendarEvent,
+    LessonEvent,
+    UpdateDiff,
+)
+
+logger = logging.getLogger(__name__)
+
+SCOPES = [
+    "https://www.googleapis.com/auth/calendar",
+    "https://www.googleapis.com/auth/calendar.events",
+]
+EXTENDED_PROPERTY_SOURCE = "pronote2calendar"
+_MIRRORED_FIELDS = (
+    "id",
+    "start",
+    "end",
+    "summary",
+    "location",
+    "description",
+    "etag",
+    "updated",
+    "extendedProperties",
+)
+# Partial responses: only request the fields read by event_from_calendar_dict.
+# Descriptions are compared through the content hash instead of downloaded.
+_EVENT_FIELDS = "id,start,end,summary,location,etag,updated,extendedProperties/private"
+_DESCRIBED_EVENT_FIELDS = f"{_EVENT_FIELDS},description"
+LIST_FIELDS = f"nextPageToken,items({_EVENT_FIELDS})"
+DESCRIBED_LIST_FIELDS = f"nextPageToken,items({_DESCRIBED_EVENT_FIELDS})"
+SYNC_FIELDS = f"nextPageToken,nextSyncToken,items({_EVENT_FIELDS},status)"
+_WRITE_FIELDS = "id,etag,updated"
+
+
+def _private_properties(calendar_dict: dict[str, Any]) -> dict[str, str]:
+    return calendar_dict.get("extendedProperties", {}).get("private", {})
+
+
+def _is_managed(calendar_dict: dict[str, Any]) -> bool:
+    return _private_properties(calendar_dict).get("source") == EXTENDED_PROPERTY_SOURCE
+
+
+def event_from_calendar_dict(calendar_dict: dict[str, Any]) -> CalendarEvent:
+    event_id = calendar_dict.get("id")
+    if not isinstance(event_id, str):
+        raise ValueError("Missing or invalid 'id'")
+
+    start_raw = calendar_dict.get("start", {})
+    end_raw = calendar_dict.get("end", {})
+
+    start_str = start_raw.get("dateTime") or start_raw.get("date")
+    end_str = end_raw.get("dateTime") or end_raw.get("date")
+
+    if not isinstance(start_str, str) or not isinstance(end_str, str):
+        raise ValueError("Missing or invalid start/end")
+
+    return CalendarEvent(
+        id=event_id,
+        start=datetime.fromisoformat(start_str),
+        end=datetime.fromisoformat(end_str),
+        summary=calendar_dict.get("summary"),
+        location=calendar_dict.get("location"),
+        description=calendar_dict.get("description"),
+        etag=calendar_dict.get("etag"),
+        updated=_parse_updated(calendar_dict),
+        content_hash=_private_properties(calendar_dict).get("hash"),
+    )
+
+
+def make_event_id(calendar_id: str, start: datetime) -> str:
+    """Derive a stable Google event ID from the calendar and the lesson slot.
+
+    Google event IDs use base32hex characters (lowercase a-v and 0-9).
+    """
+    slot = f"{calendar_id}|{int(start.timestamp())}"
+    digest = hashlib.sha256(slot.encode()).digest()[:20]
+    return base64.b32hexencode(digest).decode().lower()
+
+
+def _parse_updated(calendar_dict: dict[str, Any]) -> datetime | None:
+    updated = calendar_dict.get("updated")
+    return datetime.fromisoformat(updated) if isinstance(updated, str) else None
+
+
+def with_descriptions(
+    events: list[CalendarEvent], described: Iterable[CalendarEvent]
+) -> list[CalendarEvent]:
+    by_id = {event.id: event for event in described}
+    return [
+        by_id.get(event.id, event) if event.content_hash is None else event
+        for event in events
+    ]
+
+
+def merge_sync_page(state: CalendarSyncState, page: dict[str, Any]) -> int:
+    """Apply a page of a sync response to the mirrored events."""
+    items = page.get("items", [])
+    for event_dict in items:
+        event_id = event_dict["id"]
+        if event_dict.get("status") == "cancelled" or not _is_managed(event_dict):
+            state.events.pop(event_id, None)
+        else:
+            state.events[event_id] = {
+                key: event_dict[key] for key in _MIRRORED_FIELDS if key in event_dict
+            }
+    if "nextSyncToken" in page:
+        state.sync_token = page["nextSyncToken"]
+    return len(items)
+
+
+def window_events(
+    state: CalendarSyncState,
+    start: datetime,
+    end: datetime,
+    prune_before: datetime | None = None,
+) -> list[CalendarEvent]:
+    """Return the mirrored events of a window, sorted by start.
+
+    Events ending before ``prune_before`` (the window start by default) are
+    dropped from the state: a window covering part of the sync period passes
+    the start of the whole period, whose events are read by later runs.
+    """
+    prune_before = prune_before or start
+    events = [
+        event_from_calendar_dict(event_dict) for event_dict in state.events.values()
+    ]
+    state.events = {
+        event.id: state.events[event.id]
+        for event in events
+        if event.end >= prune_before
+    }
+    return sorted(
+        (event for event in events if event.end > start and event.start < end),
+        key=lambda event: event.start,
+    )
+
+
+def build_request(service, calendar_id: str, operation: "Operation"):
+    events = service.events()
+    item = operation.item
+    if isinstance(item, LessonEvent):
+        return events.insert(
+            calendarId=calendar_id,
+            body=_event_body(item, event_id=make_event_id(calendar_id, item.start)),
+            fields=_WRITE_FIELDS,
+        )
+    if isinstance(item, UpdateDiff):
+        request = events.patch(
+            calendarId=calendar_id,
+            eventId=item.id,
+            body=_patch_body(item),
+            fields=_WRITE_FIELDS,
+        )
+        if item.old.etag is not None:
+            # Don't overwrite changes made since the event was read
+            request.headers["If-Match"] = item.old.etag
+        return request
+    return events.delete(calendarId=calendar_id, eventId=item.id)
+
+
+def slot_request(service, calendar_id: str, event: LessonEvent):
+    """Get the event holding the deterministic ID of a lesson's slot."""
+    return service.events().get(
+        calendarId=calendar_id,
+        eventId=make_event_id(calendar_id, event.start),
+        fields="id,status,start,end",
+    )
+
+
+def conflict_request(
+    service, calendar_id: str, event: LessonEvent, existing: dict[str, Any]
+):
+    """Insert an event whose deterministic ID is already used by ``existing``."""
+    event_id = make_event_id(calendar_id, event.start)
+    if existing.get("status") == "cancelled" or (
+        event_from_calendar_dict(existing).start == event.start
+    ):
+        # Either deleted earlier, or inserted by a previous attempt
+        logger.debug("Reusing existing event ID %s", event_id)
+        body = _event_body(event, event_id=event_id)
+        body["status"] = "confirmed"
+        return service.events().update(
+            calendarId=calendar_id,
+            eventId=event_id,
+            body=body,
+            fields=_WRITE_FIELDS,
+        )
+
+    # The ID belongs to an event that was moved to another slot
+    logger.debug("Event ID %s is taken, inserting with a new ID", event_id)
+    return service.events().insert(
+        calendarId=calendar_id,
+        body=_event_body(event),
+        fields=_WRITE_FIELDS,
+    )
+
+
+def _patch_body(diff: UpdateDiff) -> dict[str, object]:
+    body = _event_body(diff.new, is_update=True)
+    if not diff.changes:
+        return body
+    # The changes are keyed by event field; the content hash always changes
+    return {
+        key: value
+        for key, value in body.items()
+        if key in diff.changes or key == "extendedProperties"
+    }
+
+
+def _event_body(
+    event: LessonEvent, is_update: bool = False, event_id: str | None = None
+) -> dict[str, object]:
+    event_body: dict[str, object] = {
+        "summary": event.summary,
+        "start": {"dateTime": event.start.isoformat()},
+        "end": {"dateTime": event.end.isoformat()},
+        "description": event.description,
+        "location": event.location,
+    }
+
+    if event_id is not None:
+        event_body["id"] = event_id
+
+    event_body["extendedProperties"] = {
+        "private": {"source": EXTENDED_PROPERTY_SOURCE, "hash": content_hash(event)}
+    }
+
+    if not is_update:
+        event_body["reminders"] = {"useDefault": False}
+
+    return event_body
+
+
+@dataclass
+class Operation:
+    kind: Literal["add", "update", "remove"]
+    item: LessonEvent | UpdateDiff | CalendarEvent
+
+    def is_conflict(self, exception: Exception) -> bool:
+        return (
+            isinstance(self.item, LessonEvent)
+            and isinstance(exception, HttpError)
+            and exception.resp.status == 409
+        )
+
+    def describe(self) -> str:
+        if isinstance(self.item, LessonEvent):
+            return self.item.start.isoformat()
+        return self.item.id
+
+    def complete(self, response: Any, exception: Exception | None, result: ApplyResult):
+        if (
+            isinstance(exception, HttpError)
+            and exception.resp.status == 412
+            and isinstance(self.item, UpdateDiff)
+        ):
+            logger.warning(
+                "Event %s was modified in the calendar since it was read, "
+                "it will be compared again on the next run",
+                self.item.id,
+            )
+            result.failed.append(self.item)
+        elif exception is not None:
+            logger.error(
+                "Failed to %s event %s: %s", self.kind, self.describe(), exception
+            )
+            result.failed.append(self.item)
+        else:
+            self.record(response, result)
+
+    def record(self, response: Any, result: ApplyResult):
+        item = self.item
+        if isinstance(item, LessonEvent):
+            result.added.append(_written_event(response["id"], item, response))
+        elif isinstance(item, UpdateDiff):
+            result.updated.append(_written_event(item.id, item.new, response))
+        else:
+            result.removed.append(item)
+
+
+class Progress:
+    """Operations completed in an ``ApplyResult`` since its creation."""
+
+    def __init__(self, result: ApplyResult):
+        self.result = result
+        self.counts = (len(result.added), len(result.updated), len(result.removed))
+
+    def completed(self) -> ApplyResult:
+        added, updated, removed = self.counts
+        return ApplyResult(
+            added=self.result.added[added:],
+            updated=self.result.updated[updated:],
+            removed=self.result.removed[removed:],
+        )
+
+
+def _written_event(
+    event_id: str, event: LessonEvent, response: dict[str, Any]
+) -> CalendarEvent:
+    return CalendarEvent(
+        id=event_id,
+        start=event.start,
+        end=event.end,
+        summary=event.summary,
+        description=event.description,
+        location=event.location,
+        etag=response.get("etag"),
+        updated=_parse_updated(response),
+        content_hash=content_hash(event),
+    )
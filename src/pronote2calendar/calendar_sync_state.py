@@ -0,0 +1,63 @@
+import json
+import logging
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any
+
+from pronote2calendar.file_utils import write_json
+
+logger = logging.getLogger(__name__)
+
+# Bumped when the mirrored event fields change, to force a full sync
+STATE_VERSION = 2
+
+
+@dataclass
+class CalendarSyncState:
+    """Sync token of a calendar and the managed events it describes."""
+
+    calendar_id: str
+    sync_token: str | None = None
+    events: dict[str, dict[str, Any]] = field(default_factory=dict)
+
+    @classmethod
+    def load(cls, path: Path, calendar_id: str) -> "CalendarSyncState":
+        try:
+            with open(path) as file:
+                data = json.load(file)
+        except FileNotFoundError:
+            logger.debug("No calendar sync state found in %s", path)
+            return cls(calendar_id)
+        except (OSError, ValueError) as e:
+            logger.warning("Ignoring unreadable calendar sync state %s: %s", path, e)
+            return cls(calendar_id)
+
+        if data.get("calendar_id") != calendar_id:
+            logger.info("Calendar sync state in %s is for another calendar", path)
+            return cls(calendar_id)
+        if data.get("version") != STATE_VERSION:
+            logger.info("Calendar sync state in %s has an old format", path)
+            return cls(calendar_id)
+
+        return cls(
+            calendar_id=calendar_id,
+            sync_token=data.get("sync_token"),
+            events=data.get("events", {}),
+        )
+
+    def save(self, path: Path):
+        write_json(
+            path,
+            {
+                "version": STATE_VERSION,
+                "calendar_id": self.calendar_id,
+                "sync_token": self.sync_token,
+                "events": self.events,
+            },
+            separators=(",", ":"),
+        )
+        logger.debug("Calendar sync state saved to %s", path)
+
+    def reset(self):
+        self.sync_token = None
+        self.events = {}
@@ -1,93 +1,260 @@
+import hashlib
+import json
 import logging
+from bisect import bisect_left, bisect_right
 from collections import defaultdict
+from dataclasses import dataclass, replace
+from datetime import datetime, timedelta
+from typing import Any
 
 from pronote2calendar.models import CalendarEvent, ChangeSet, LessonEvent, UpdateDiff
 
 logger = logging.getLogger(__name__)
 
+MAX_MOVE_DISTANCE = timedelta(days=7)
+
+
+def content_hash(event: LessonEvent | CalendarEvent) -> str:
+    """Compact fingerprint of the content written for a lesson.
+
+    It is stored with the calendar events, so that they can be compared to
+    the lessons without downloading their descriptions.
+    """
+    content = json.dumps(
+        [
+            int(event.start.timestamp()),
+            int(event.end.timestamp()),
+            event.summary,
+            event.location,
+            event.description,
+        ]
+    )
+    return hashlib.sha256(content.encode()).hexdigest()[:16]
+
+
+@dataclass(frozen=True, slots=True)
+class Fingerprint:
+    """Hashable identity of an event: its downloaded fields and content hash.
+
+    The summary, location and end are compared as downloaded, so that events
+    edited in the calendar are repaired; the hash stands for the description,
+    which is not downloaded.
+    """
+
+    start: int
+    end: int
+    summary: str | None
+    location: str | None
+    content: str
+
+
+def fingerprint(event: LessonEvent | CalendarEvent) -> Fingerprint:
+    if isinstance(event, CalendarEvent) and event.content_hash is not None:
+        content = event.content_hash
+    else:
+        # Events written before content hashes were stored have a description
+        content = content_hash(event)
+    return Fingerprint(
+        instant_key(event.start),
+        instant_key(event.end),
+        event.summary,
+        event.location,
+        content,
+    )
+
+
+def _description_changed(old_event: CalendarEvent, new_event: LessonEvent) -> bool:
+    if old_event.content_hash is None:
+        return old_event.description != new_event.description
+    # The description is not downloaded: check whether the stored hash matches
+    # the new event, or the old event's other fields with the new description
+    candidate = replace(
+        new_event,
+        start=old_event.start,
+        end=old_event.end,
+        summary=old_event.summary,
+        location=old_event.location,
+    )
+    return old_event.content_hash not in (
+        content_hash(new_event),
+        content_hash(candidate),
+    )
+
+
+def instant_key(moment: datetime) -> int:
+    """Key identifying an instant, whatever the time zone it is expressed in.
+
+    Google returns times with the offset of the calendar's time zone, which
+    may differ from the one of the lessons.
+    """
+    return int(moment.timestamp())
+
+
+def _build_update(old_event: CalendarEvent, new_event: LessonEvent) -> UpdateDiff:
+    # Only include changed fields. Times are compared as instants and
+    # reported in their own time zones.
+    changes_map: dict[str, tuple[Any, Any]] = {}
+    if old_event.summary != new_event.summary:
+        changes_map["summary"] = (old_event.summary, new_event.summary)
+    if old_event.start != new_event.start:
+        changes_map["start"] = (
+            old_event.start.isoformat(),
+            new_event.start.isoformat(),
+        )
+    if old_event.end != new_event.end:
+        changes_map["end"] = (old_event.end.isoformat(), new_event.end.isoformat())
+    if old_event.location != new_event.location:
+        changes_map["location"] = (old_event.location, new_event.location)
+    if _description_changed(old_event, new_event):
+        changes_map["description"] = (old_event.description, new_event.description)
+
+    return UpdateDiff(
+        id=old_event.id,
+        old=old_event,
+        new=new_event,
+        changes=changes_map,
+    )
+
+
+def _assign_slot(
+    slot: list[tuple[Fingerprint, CalendarEvent]], new_event: LessonEvent
+) -> tuple[CalendarEvent, UpdateDiff | None]:
+    """Choose the existing event kept for the new event starting at its time.
+
+    The slot takes one update at most, whichever event is kept, and the other
+    events are removed. The event needing the fewest changed fields is kept,
+    and ties go to the smallest id so that the same event is kept whatever
+    order the calendar returns them in.
+    """
+    new_fingerprint = fingerprint(new_event)
+    candidates = [
+        (
+            event,
+            None
+            if event_fingerprint == new_fingerprint
+            else _build_update(event, new_event),
+        )
+        for event_fingerprint, event in slot
+    ]
+    return min(
+        candidates,
+        key=lambda candidate: (
+            0 if candidate[1] is None else 1 + len(candidate[1].changes),
+            candidate[0].id,
+        ),
+    )
+
+
+def _is_moved(event: CalendarEvent, new_event: LessonEvent) -> bool:
+    """Whether only the time of the event differs from the new event."""
+    if event.content_hash is not None:
+        at_old_time = replace(new_event, start=event.start, end=event.end)
+        return content_hash(at_old_time) == event.content_hash
+    return (
+        event.summary == new_event.summary
+        and event.location == new_event.location
+        and event.description == new_event.description
+    )
+
+
+def _pair_moved_events(
+    add: list[LessonEvent],
+    remove: list[CalendarEvent],
+    max_distance: timedelta,
+) -> tuple[list[LessonEvent], list[CalendarEvent], list[UpdateDiff]]:
+    """Turn the removal and addition of a moved lesson into an update.
+
+    Candidates are paired closest first, so that when a whole day shifts each
+    lesson is matched with its own event rather than another occurrence of
+    the same lesson.
+    """
+    # Only the events starting within max_distance are considered
+    by_start = sorted(range(len(remove)), key=lambda index: remove[index].start)
+    starts = [remove[index].start for index in by_start]
+    candidates = sorted(
+        (abs(new_event.start - remove[remove_index].start), add_index, remove_index)
+        for add_index, new_event in enumerate(add)
+        for remove_index in by_start[
+            bisect_left(starts, new_event.start - max_distance) : bisect_right(
+                starts, new_event.start + max_distance
+            )
+        ]
+        if _is_moved(remove[remove_index], new_event)
+    )
+
+    moved: list[UpdateDiff] = []
+    paired_adds: set[int] = set()
+    paired_removes: set[int] = set()
+    for _, add_index, remove_index in candidates:
+        if add_index in paired_adds or remove_index in paired_removes:
+            continue
+        paired_adds.add(add_index)
+        paired_removes.add(remove_index)
+        moved.append(_build_update(remove[remove_index], add[add_index]))
+
+    logger.debug("Detected %d moved events", len(moved))
+    return (
+        [event for index, event in enumerate(add) if index not in paired_adds],
+        [event for index, event in enumerate(remove) if index not in paired_removes],
+        moved,
+    )
+
 
 def get_changes(
     new_events: list[LessonEvent],
     existing_events: list[CalendarEvent],
+    max_move_distance: timedelta = MAX_MOVE_DISTANCE,
 ) -> ChangeSet:
+    """Compute the changes turning the existing events into the new events.
+
+    Existing events are matched with the new events starting at the same
+    time, keeping the closest one when several start at that time. A lesson
+    that moved to another slot, at most ``max_move_distance`` away, is
+    updated rather than removed and added again.
+    """
     add: list[LessonEvent] = []
     remove: list[CalendarEvent] = []
     update: list[UpdateDiff] = []
 
     # Map new events to their start time
-    new_events_dict = {event.start.isoformat(): event for event in new_events}
+    new_events_dict = {instant_key(event.start): event for event in new_events}
 
     logger.debug("Considering %d new events for changes", len(new_events_dict))
 
     # Map existing events to their start time,
     # allowing for multiple events at the same time
-    existing_events_map: defaultdict[str, list[CalendarEvent]] = defaultdict(list)
+    existing_events_map: defaultdict[int, list[tuple[Fingerprint, CalendarEvent]]] = (
+        defaultdict(list)
+    )
     for event in existing_events:
-        start_time = event.start.isoformat()
-        existing_events_map[start_time].append(event)
+        event_fingerprint = fingerprint(event)
+        existing_events_map[event_fingerprint.start].append((event_fingerprint, event))
 
     logger.debug(
         "Considering %d existing events from calendar for changes",
-        sum(len(v) for v in existing_events_map.values()),
+        len(existing_events),
     )
 
     # Check new events to add or update
     for start_time, new_event in new_events_dict.items():
-        if start_time not in existing_events_map:
+        slot = existing_events_map.get(start_time)
+        if slot is None:
             add.append(new_event)
-        else:
-            matching_events = [
-                event
-                for event in existing_events_map[start_time]
-                if (
-                    event.end == new_event.end
-                    and event.summary == new_event.summary
-                    and event.location == new_event.location
-                    and event.description == new_event.description
-                )
-            ]
-
-            if matching_events:
-                # Remove all other matching events
-                remove.extend(matching_events[1:])
-                # Remove non-matching events
-                remove.extend(
-                    [
-                        event
-                        for event in existing_events_map[start_time]
-                        if event not in matching_events
-                    ]
-                )
-            else:
-                # If no matching event is found, build a diff object for
-                # the first existing event and record it as an update.
-                old_event = existing_events_map[start_time][0]
-
-                changes_map = {
-                    "summary": (old_event.summary, new_event.summary),
-                    "start": (old_event.start.isoformat(), new_event.start.isoformat()),
-                    "end": (old_event.end.isoformat(), new_event.end.isoformat()),
-                    "location": (old_event.location, new_event.location),
-                    "description": (old_event.description, new_event.description),
-                }
-                # Only include changed fields
-                changes_map = {k: v for k, v in changes_map.items() if v[0] != v[1]}
-
-                update.append(
-                    UpdateDiff(
-                        id=old_event.id,
-                        old=old_event,
-                        new=new_event,
-                        changes=changes_map,
-                    )
-                )
-                # still remove any duplicates
-                remove.extend(existing_events_map[start_time][1:])
+            continue
+
+        kept, diff = _assign_slot(slot, new_event)
+        if diff is not None:
+            update.append(diff)
+        # Remove the duplicates
+        remove.extend(event for _, event in slot if event is not kept)
 
     # Check events to remove that don't have a matching new event
-    for start_time, event_list in existing_events_map.items():
+    for start_time, slot in existing_events_map.items():
         if start_time not in new_events_dict:
-            remove.extend(event_list)
+            remove.extend(event for _, event in slot)
+
+    add, remove, moved = _pair_moved_events(add, remove, max_move_distance)
+    update.extend(moved)
 
     logger.debug(
         "Change detection results: add=%d remove=%d update=%d",
@@ -97,11 +264,12 @@ def get_changes(
     )
     changes = ChangeSet(add, update, remove)
 
-    for item_to_add in changes.to_add:
-        logger.debug("ADD: %r", item_to_add)
-    for item_to_update in changes.to_update:
-        logger.debug("UPDATE (id %s): %r", item_to_update.id, item_to_update)
-    for item_to_remove in changes.to_remove:
-        logger.debug("REMOVE: %r", item_to_remove)
+    if logger.isEnabledFor(logging.DEBUG):
+        for item_to_add in changes.to_add:
+            logger.debug("ADD: %r", item_to_add)
+        for item_to_update in changes.to_update:
+            logger.debug("UPDATE (id %s): %r", item_to_update.id, item_to_update)
+        for item_to_remove in changes.to_remove:
+            logger.debug("REMOVE: %r", item_to_remove)
 
     return changes
@@ -0,0 +1,136 @@
+import json
+import logging
+from datetime import datetime
+
+from pronote2calendar.file_utils import write_json
+from pronote2calendar.models import ChangeSet
+from pronote2calendar.settings import ChurnGuardSettings
+
+logger = logging.getLogger(__name__)
+
+
+class ChurnGuardError(Exception):
+    """Raised when a change set exceeds a churn guard limit in ``abort`` mode."""
+
+
+class ChurnGuard:
+    """Sanity check of the change set before it is applied to the calendar.
+
+    An empty timetable or calendar read by mistake produces a change set
+    removing, or adding back, every lesson. Such change sets are refused
+    when they exceed the configured limits.
+    """
+
+    def __init__(self, config: ChurnGuardSettings, calendar_id: str):
+        self.config = config
+        self.calendar_id = calendar_id
+
+    def allows(
+        self, changes: ChangeSet, existing_count: int, start: datetime, end: datetime
+    ) -> bool:
+        """Return whether the changes to the window can be applied.
+
+        Raises ``ChurnGuardError`` instead of returning ``False`` when the
+        action is ``abort``.
+        """
+        reason = self.check(changes, existing_count, start, end)
+        if reason is None:
+            return True
+
+        previous = self.previous_count(start, end)
+        if reason == "max_remove_ratio":
+            observed = len(changes.to_remove) / existing_count
+        else:
+            assert previous is not None
+            observed = len(changes.to_add) / previous
+        details = (
+            f"reason={reason} add={len(changes.to_add)} "
+            f"remove={len(changes.to_remove)} existing={existing_count} "
+            f"previous={previous} limit={getattr(self.config, reason)} "
+            f"observed={observed:.2f}"
+        )
+        if self.config.action == "abort":
+            raise ChurnGuardError(f"Churn guard aborted synchronization: {details}")
+        logger.warning("Churn guard tripped: %s action=read_only", details)
+        return False
+
+    def check(
+        self, changes: ChangeSet, existing_count: int, start: datetime, end: datetime
+    ) -> str | None:
+        """Return the limit exceeded by the changes, if any."""
+        config = self.config
+        removes = len(changes.to_remove)
+        if (
+            config.max_remove_ratio is not None
+            and existing_count >= config.min_events
+            and removes > config.max_remove_ratio * existing_count
+        ):
+            return "max_remove_ratio"
+
+        if config.max_add_ratio is not None and existing_count == 0:
+            previous = self.previous_count(start, end)
+            if (
+                previous is not None
+                and previous >= config.min_events
+                and len(changes.to_add) > config.max_add_ratio * previous
+            ):
+                return "max_add_ratio"
+
+        return None
+
+    def previous_count(self, start: datetime, end: datetime) -> int | None:
+        """Number of events after the previous run of a window like this one.
+
+        Only a window of the same length is comparable (refresh tiers sync
+        windows of different lengths), and only if it included ``start``: a
+        previous window ending before it may rightly have no event in common
+        with the current one (with a single synced week).
+        """
+        if self.config.state_file is None:
+            return None
+        try:
+            with open(self.config.state_file) as file:
+                data = json.load(file)
+            if data.get("calendar_id") != self.calendar_id:
+                return None
+            window = data.get("windows", {}).get(_window_key(start, end))
+            if window is None or datetime.fromisoformat(window["end"]) <= start:
+                return None
+            event_count = window["event_count"]
+            if not isinstance(event_count, int):
+                raise TypeError(f"invalid event count {event_count!r}")
+            return event_count
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError, KeyError, TypeError, AttributeError) as e:
+            logger.warning(
+                "Ignoring unreadable churn guard state %s: %s",
+                self.config.state_file,
+                e,
+            )
+            return None
+
+    def record(self, event_count: int, start: datetime, end: datetime):
+        """Record the number of events in the window from ``start`` to ``end``."""
+        state_file = self.config.state_file
+        if state_file is None:
+            return
+        try:
+            with open(state_file) as file:
+                data = json.load(file)
+            windows = data["windows"] if data["calendar_id"] == self.calendar_id else {}
+            if not isinstance(windows, dict):
+                raise TypeError(f"invalid windows {windows!r}")
+        except (OSError, ValueError, KeyError, TypeError):
+            windows = {}
+        windows[_window_key(start, end)] = {
+            "end": end.isoformat(),
+            "event_count": event_count,
+        }
+
+        write_json(state_file, {"calendar_id": self.calendar_id, "windows": windows})
+        logger.debug("Recorded %d events in the calendar", event_count)
+
+
+def _window_key(start: datetime, end: datetime) -> str:
+    return str(int((end - start).total_seconds()))
@@ -0,0 +1,101 @@
+import json
+import logging
+from pathlib import Path
+from typing import Any
+
+from googleapiclient import discovery_cache  # type: ignore
+from googleapiclient.version import __version__ as LIBRARY_VERSION  # type: ignore
+
+from pronote2calendar.file_utils import write_json
+
+logger = logging.getLogger(__name__)
+
+SERVICE_NAME = "calendar"
+SERVICE_VERSION = "v3"
+USED_RESOURCES = ("events",)
+
+
+def compact_discovery_document(document: dict[str, Any]) -> dict[str, Any]:
+    """Strip a discovery document down to what the client needs.
+
+    Only the resources in ``USED_RESOURCES`` and the schemas they reference
+    are kept, and all human-readable descriptions are dropped.
+    """
+    resources = {name: document["resources"][name] for name in USED_RESOURCES}
+
+    schemas = document.get("schemas", {})
+    used_schemas: set[str] = set()
+    pending = _references(resources)
+    while pending:
+        name = pending.pop()
+        if name in used_schemas or name not in schemas:
+            continue
+        used_schemas.add(name)
+        pending |= _references(schemas[name])
+
+    compact = {
+        key: value
+        for key, value in document.items()
+        if key not in ("resources", "schemas", "icons", "auth")
+    }
+    compact["resources"] = resources
+    compact["schemas"] = {name: schemas[name] for name in sorted(used_schemas)}
+    return _strip_descriptions(compact)
+
+
+def _references(node: Any) -> set[str]:
+    if isinstance(node, dict):
+        refs = {node["$ref"]} if isinstance(node.get("$ref"), str) else set()
+        for value in node.values():
+            refs |= _references(value)
+        return refs
+    if isinstance(node, list):
+        return set().union(*(_references(value) for value in node))
+    return set()
+
+
+def _strip_descriptions(node: Any) -> Any:
+    if isinstance(node, dict):
+        # Only drop description texts: a schema property may also be named
+        # "description", in which case its value is a dict
+        return {
+            key: _strip_descriptions(value)
+            for key, value in node.items()
+            if not (key == "description" and isinstance(value, str))
+        }
+    if isinstance(node, list):
+        return [_strip_descriptions(value) for value in node]
+    return node
+
+
+def load_discovery_document(cache_file: Path) -> dict[str, Any]:
+    """Return the compact discovery document cached in ``cache_file``.
+
+    The cache is rebuilt when it was written by another version of the
+    Google client library, whose bundled document may have changed.
+    """
+    try:
+        with open(cache_file) as file:
+            cached = json.load(file)
+        if cached.get("library_version") == LIBRARY_VERSION:
+            logger.debug("Loaded cached discovery document from %s", cache_file)
+            return cached["document"]
+        logger.debug(
+            "Discovery cache %s was written by another library version", cache_file
+        )
+    except FileNotFoundError:
+        logger.debug("No cached discovery document in %s", cache_file)
+    except (OSError, ValueError, AttributeError, KeyError) as e:
+        logger.warning("Ignoring unreadable discovery cache %s: %s", cache_file, e)
+
+    static_document = discovery_cache.get_static_doc(SERVICE_NAME, SERVICE_VERSION)
+    document = compact_discovery_document(json.loads(static_document))
+
+    write_json(
+        cache_file,
+        {"library_version": LIBRARY_VERSION, "document": document},
+        separators=(",", ":"),
+    )
+    logger.debug("Discovery document cached in %s", cache_file)
+
+    return document
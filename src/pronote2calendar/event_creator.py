@@ -1,15 +1,14 @@
 import logging
 
 from jinja2 import Environment, StrictUndefined
-from pronotepy import Lesson
 
-from pronote2calendar.models import LessonEvent
+from pronote2calendar.models import LessonEvent, LessonRecord
 from pronote2calendar.settings import EventsTemplates
 
 logger = logging.getLogger(__name__)
 
 
-def build_context(lesson: Lesson) -> dict:
+def build_context(lesson: LessonRecord) -> dict:
     return {
         "start": lesson.start,
         "end": lesson.end,
@@ -34,7 +33,9 @@ def build_context(lesson: Lesson) -> dict:
     }
 
 
-def render_event_fields(lesson: Lesson, templates: EventsTemplates) -> dict[str, str]:
+def render_event_fields(
+    lesson: LessonRecord, templates: EventsTemplates
+) -> dict[str, str]:
     env = Environment(undefined=StrictUndefined)
 
     context = build_context(lesson)
@@ -58,7 +59,7 @@ def render_event_fields(lesson: Lesson, templates: EventsTemplates) -> dict[str,
     }
 
 
-def lesson_to_event(lesson: Lesson, templates: EventsTemplates) -> LessonEvent:
+def lesson_to_event(lesson: LessonRecord, templates: EventsTemplates) -> LessonEvent:
     rendered_fields = render_event_fields(lesson, templates)
 
     return LessonEvent(
@@ -71,7 +72,7 @@ def lesson_to_event(lesson: Lesson, templates: EventsTemplates) -> LessonEvent:
 
 
 def create_lesson_events(
-    lessons: list[Lesson],
+    lessons: list[LessonRecord],
     templates: EventsTemplates,
 ) -> list[LessonEvent]:
     events = []
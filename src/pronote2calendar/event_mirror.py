@@ -0,0 +1,191 @@
+import logging
+import sqlite3
+from datetime import datetime, timedelta
+from pathlib import Path
+
+from pronote2calendar.models import ApplyResult, CalendarEvent
+
+logger = logging.getLogger(__name__)
+
+# Bumped when the schema changes: older mirrors are rebuilt from the calendar
+SCHEMA_VERSION = 3
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS events (
+    calendar_id TEXT NOT NULL,
+    id TEXT NOT NULL,
+    start TEXT NOT NULL,
+    end TEXT NOT NULL,
+    start_ts REAL NOT NULL,
+    end_ts REAL NOT NULL,
+    summary TEXT,
+    location TEXT,
+    description TEXT,
+    etag TEXT,
+    updated TEXT,
+    content_hash TEXT,
+    PRIMARY KEY (calendar_id, id)
+);
+CREATE INDEX IF NOT EXISTS events_start ON events (calendar_id, start_ts);
+CREATE TABLE IF NOT EXISTS calendars (
+    calendar_id TEXT PRIMARY KEY,
+    verified_at TEXT,
+    verified_start_ts REAL,
+    verified_end_ts REAL
+);
+"""
+
+
+class EventMirror:
+    """Local SQLite copy of the events managed in a Google Calendar.
+
+    The mirror is refreshed from the calendar (``replace``) when it is
+    verified, and from the result of each ``apply_changes`` (``apply``) in
+    between, so that runs can diff against it without reading the calendar.
+    Only the window read from the calendar by the last ``replace`` counts as
+    verified.
+    """
+
+    def __init__(self, path: Path, calendar_id: str):
+        self.calendar_id = calendar_id
+        self.connection = sqlite3.connect(path)
+        (version,) = self.connection.execute("PRAGMA user_version").fetchone()
+        if version != SCHEMA_VERSION:
+            logger.info("Rebuilding event mirror %s with a new schema", path)
+            self.connection.executescript(
+                "DROP TABLE IF EXISTS events; DROP TABLE IF EXISTS calendars;"
+            )
+        self.connection.executescript(SCHEMA)
+        self.connection.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+        logger.debug("Event mirror opened from %s", path)
+
+    def close(self):
+        self.connection.close()
+
+    def needs_verification(
+        self,
+        max_age: timedelta,
+        start: datetime,
+        end: datetime,
+        now: datetime | None = None,
+    ) -> bool:
+        """Return whether the window must be read from the calendar again."""
+        row = self.connection.execute(
+            "SELECT verified_at, verified_start_ts, verified_end_ts FROM calendars "
+            "WHERE calendar_id = ?",
+            (self.calendar_id,),
+        ).fetchone()
+        if row is None or row[0] is None:
+            return True
+        verified_at, verified_start, verified_end = row
+        if start.timestamp() < verified_start or end.timestamp() > verified_end:
+            return True
+        now = now or datetime.now().astimezone()
+        return now - datetime.fromisoformat(verified_at) >= max_age
+
+    def get_events(self, start: datetime, end: datetime) -> list[CalendarEvent]:
+        rows = self.connection.execute(
+            "SELECT id, start, end, summary, location, description, etag, updated, "
+            "content_hash FROM events WHERE calendar_id = ? AND end_ts > ? "
+            "AND start_ts < ? ORDER BY start_ts",
+            (self.calendar_id, start.timestamp(), end.timestamp()),
+        )
+        return [
+            CalendarEvent(
+                id=event_id,
+                start=datetime.fromisoformat(event_start),
+                end=datetime.fromisoformat(event_end),
+                summary=summary,
+                location=location,
+                description=description,
+                etag=etag,
+                updated=datetime.fromisoformat(updated) if updated else None,
+                content_hash=event_hash,
+            )
+            for (
+                event_id,
+                event_start,
+                event_end,
+                summary,
+                location,
+                description,
+                etag,
+                updated,
+                event_hash,
+            ) in rows
+        ]
+
+    def replace(
+        self,
+        start: datetime,
+        end: datetime,
+        events: list[CalendarEvent],
+        now: datetime | None = None,
+    ):
+        """Replace the mirrored events of a window with the calendar's events."""
+        now = now or datetime.now().astimezone()
+        with self.connection:
+            self.connection.execute(
+                "DELETE FROM events WHERE calendar_id = ? AND end_ts > ? "
+                "AND start_ts < ?",
+                (self.calendar_id, start.timestamp(), end.timestamp()),
+            )
+            self._upsert(events)
+            self.connection.execute(
+                "INSERT OR REPLACE INTO calendars (calendar_id, verified_at, "
+                "verified_start_ts, verified_end_ts) VALUES (?, ?, ?, ?)",
+                (self.calendar_id, now.isoformat(), start.timestamp(), end.timestamp()),
+            )
+        logger.debug(
+            "Event mirror verified from %s to %s with %d events",
+            start.isoformat(),
+            end.isoformat(),
+            len(events),
+        )
+
+    def apply(self, result: ApplyResult):
+        """Record the changes that were applied to the calendar."""
+        with self.connection:
+            self._upsert(result.added + result.updated)
+            self.connection.executemany(
+                "DELETE FROM events WHERE calendar_id = ? AND id = ?",
+                [(self.calendar_id, event.id) for event in result.removed],
+            )
+            if result.failed:
+                # A failed write may still have reached the calendar
+                self.invalidate()
+        logger.debug(
+            "Event mirror updated: add=%d update=%d remove=%d",
+            len(result.added),
+            len(result.updated),
+            len(result.removed),
+        )
+
+    def invalidate(self):
+        self.connection.execute(
+            "UPDATE calendars SET verified_at = NULL WHERE calendar_id = ?",
+            (self.calendar_id,),
+        )
+
+    def _upsert(self, events: list[CalendarEvent]):
+        self.connection.executemany(
+            "INSERT OR REPLACE INTO events (calendar_id, id, start, end, start_ts, "
+            "end_ts, summary, location, description, etag, updated, content_hash) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            [
+                (
+                    self.calendar_id,
+                    event.id,
+                    event.start.isoformat(),
+                    event.end.isoformat(),
+                    event.start.timestamp(),
+                    event.end.timestamp(),
+                    event.summary,
+                    event.location,
+                    event.description,
+                    event.etag,
+                    event.updated.isoformat() if event.updated else None,
+                    event.content_hash,
+                )
+                for event in events
+            ],
+        )
@@ -0,0 +1,40 @@
+import json
+import logging
+import os
+import stat
+from pathlib import Path
+from typing import Any
+
+logger = logging.getLogger(__name__)
+
+
+def write_json(path: Path, data: Any, private: bool = False, **kwargs: Any):
+    """Write ``data`` as JSON to ``path``, replacing the file at once.
+
+    The JSON is written to a temporary file next to ``path`` first, so an
+    interrupted write leaves the previous file in place. A ``private`` file is
+    readable by its owner only from its creation. ``kwargs`` are passed to
+    ``json.dump``.
+    """
+    tmp_path = path.with_name(path.name + ".tmp")
+    fd = os.open(
+        tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600 if private else 0o666
+    )
+    if private:
+        # The mode is only applied to files created by os.open
+        os.fchmod(fd, 0o600)
+    with os.fdopen(fd, "w") as file:
+        json.dump(data, file, **kwargs)
+    os.replace(tmp_path, path)
+
+
+def stat_private(path: Path, description: str) -> os.stat_result | None:
+    """Return the status of ``path``, or None if other users can read it.
+
+    Raises ``FileNotFoundError`` if ``path`` doesn't exist.
+    """
+    status = os.stat(path)
+    if status.st_mode & (stat.S_IRWXG | stat.S_IRWXO):
+        logger.warning("Ignoring %s %s readable by other users", description, path)
+        return None
+    return status
@@ -1,45 +1,61 @@
 import logging
+import threading
+from collections.abc import Iterator
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from typing import Any
 
+from google.auth.credentials import Credentials
 from google.oauth2 import service_account
-from googleapiclient.discovery import build  # type: ignore
+from googleapiclient.discovery import build, build_from_document  # type: ignore
 from googleapiclient.errors import HttpError  # type: ignore
 
-from pronote2calendar.models import CalendarEvent, ChangeSet, LessonEvent
+from pronote2calendar.calendar_api import (
+    DESCRIBED_LIST_FIELDS,
+    EXTENDED_PROPERTY_SOURCE,
+    LIST_FIELDS,
+    SCOPES,
+    SYNC_FIELDS,
+    Operation,
+    Progress,
+    build_request,
+    conflict_request,
+    event_from_calendar_dict,
+    merge_sync_page,
+    slot_request,
+    window_events,
+    with_descriptions,
+)
+from pronote2calendar.calendar_sync_state import CalendarSyncState
+from pronote2calendar.discovery import load_discovery_document
+from pronote2calendar.journal import ChangeJournal
+from pronote2calendar.models import (
+    ApplyResult,
+    CalendarEvent,
+    ChangeSet,
+    LessonEvent,
+)
+from pronote2calendar.rate_limiter import TokenBucket
+from pronote2calendar.retry import RetryPolicy
 from pronote2calendar.settings import GoogleCalendarSettings
+from pronote2calendar.token_cache import use_token_cache
+from pronote2calendar.transport import build_http
 
 logger = logging.getLogger(__name__)
 
-SCOPES = [
-    "https://www.googleapis.com/auth/calendar",
-    "https://www.googleapis.com/auth/calendar.events",
-]
-EXTENDED_PROPERTY_SOURCE = "pronote2calendar"
 
-
-def _event_from_calendar_dict(calendar_dict: dict[str, Any]) -> CalendarEvent:
-    event_id = calendar_dict.get("id")
-    if not isinstance(event_id, str):
-        raise ValueError("Missing or invalid 'id'")
-
-    start_raw = calendar_dict.get("start", {})
-    end_raw = calendar_dict.get("end", {})
-
-    start_str = start_raw.get("dateTime") or start_raw.get("date")
-    end_str = end_raw.get("dateTime") or end_raw.get("date")
-
-    if not isinstance(start_str, str) or not isinstance(end_str, str):
-        raise ValueError("Missing or invalid start/end")
-
-    return CalendarEvent(
-        id=event_id,
-        start=datetime.fromisoformat(start_str),
-        end=datetime.fromisoformat(end_str),
-        summary=calendar_dict.get("summary"),
-        location=calendar_dict.get("location"),
-        description=calendar_dict.get("description"),
+def _build_service(
+    config: GoogleCalendarSettings,
+    credentials: Credentials,
+    document: dict[str, Any] | None,
+):
+    http = build_http(config, credentials)
+    auth: dict[str, Any] = (
+        {"credentials": credentials} if http is None else {"http": http}
     )
+    if document is None:
+        return build("calendar", "v3", **auth)
+    return build_from_document(document, **auth)
 
 
 class GoogleCalendarClient:
@@ -47,86 +63,304 @@ class GoogleCalendarClient:
         credentials = service_account.Credentials.from_service_account_file(
             credentials_file_path, scopes=SCOPES
         )
-        self.service = build("calendar", "v3", credentials=credentials)
+        self.credentials = credentials
+        self.token_cache_file = config.token_cache_file
+        self._token_lock = threading.Lock()
+        document = (
+            load_discovery_document(config.discovery_cache_file)
+            if config.discovery_cache_file is not None
+            else None
+        )
+        self.service_factory = lambda: _build_service(config, credentials, document)
+        self.service = self.service_factory()
         self.calendar_id = config.calendar_id
+        self.batch_size = config.batch_size
+        self.page_size = config.page_size
+        self.sync_state_file = config.sync_state_file
+        self._sync_state: CalendarSyncState | None = None
+        self.concurrency = config.concurrency
+        self.rate_limiter = (
+            TokenBucket(config.max_requests_per_second)
+            if config.max_requests_per_second
+            else None
+        )
+        self.retry_policy = RetryPolicy(max_retries=config.max_retries)
+        self._thread_local = threading.local()
 
-    def get_events(self, start: datetime, end: datetime) -> list[CalendarEvent]:
-        try:
-            events_result = (
-                self.service.events()
-                .list(
+    def get_events(
+        self,
+        start: datetime,
+        end: datetime,
+        save_state: bool = True,
+        prune_before: datetime | None = None,
+    ) -> list[CalendarEvent]:
+        """Return the managed events of a window.
+
+        With ``save_state`` False, the updated sync state is only saved by
+        ``save_sync_state``, once the caller knows the read is used. Events
+        ending before ``prune_before`` are dropped from the sync state, see
+        ``window_events``.
+        """
+        if self.sync_state_file is None:
+            events = list(self.iter_events(start, end))
+        else:
+            events = self._get_events_incrementally(start, end, prune_before)
+            if save_state:
+                self.save_sync_state()
+        if any(event.content_hash is None for event in events):
+            events = self._describe_unhashed_events(start, end, events)
+        logger.debug(
+            "Retrieved %d events from calendar %s", len(events), self.calendar_id
+        )
+        return events
+
+    def iter_events(
+        self, start: datetime, end: datetime, fields: str = LIST_FIELDS
+    ) -> Iterator[CalendarEvent]:
+        for page in self._list_pages(
+            timeMin=start.isoformat(),
+            timeMax=end.isoformat(),
+            privateExtendedProperty=["source=" + EXTENDED_PROPERTY_SOURCE],
+            orderBy="startTime",
+            fields=fields,
+        ):
+            for event_dict in page.get("items", []):
+                yield event_from_calendar_dict(event_dict)
+
+    def _list_pages(self, **params) -> Iterator[dict[str, Any]]:
+        page_token: str | None = None
+        while True:
+            page = self._execute(
+                self.service.events().list(
                     calendarId=self.calendar_id,
-                    timeMin=start.isoformat(),
-                    timeMax=end.isoformat(),
-                    # maxResults=10,
+                    maxResults=self.page_size,
+                    pageToken=page_token,
                     singleEvents=True,
-                    privateExtendedProperty=["source=" + EXTENDED_PROPERTY_SOURCE],
-                    orderBy="startTime",
+                    **params,
                 )
-                .execute()
-            )
-            events = events_result.get("items", [])
-            logger.debug(
-                "Retrieved %d events from calendar %s", len(events), self.calendar_id
             )
-            return [_event_from_calendar_dict(event_dict) for event_dict in events]
-
-        except HttpError as error:
-            logger.exception("Error fetching events from Google Calendar: %s", error)
-            return []
-
-    def apply_changes(self, changes: ChangeSet):
-        def create_event_body(
-            event: LessonEvent, is_update: bool = False
-        ) -> dict[str, object]:
-            event_body: dict[str, object] = {
-                "summary": event.summary,
-                "start": {"dateTime": event.start.isoformat()},
-                "end": {"dateTime": event.end.isoformat()},
-                "description": event.description,
-                "location": event.location,
-            }
-
-            if not is_update:
-                event_body["reminders"] = {"useDefault": False}
-                event_body["extendedProperties"] = {
-                    "private": {"source": EXTENDED_PROPERTY_SOURCE}
-                }
-
-            return event_body
-
-        # Add new events
-        add_count = 0
-        for event in changes.to_add:
-            event_body = create_event_body(event)
-            self.service.events().insert(
-                calendarId=self.calendar_id, body=event_body
-            ).execute()
-            add_count += 1
-
-        # Remove events
-        remove_count = 0
-        for event_to_remove in changes.to_remove:
-            event_id = event_to_remove.id
-            self.service.events().delete(
-                calendarId=self.calendar_id, eventId=event_id
-            ).execute()
-            remove_count += 1
-
-        # Update existing events
-        update_count = 0
-        for update_diff in changes.to_update:
-            event_body = create_event_body(update_diff.new, is_update=True)
-            self.service.events().patch(
-                calendarId=self.calendar_id, eventId=update_diff.id, body=event_body
-            ).execute()
-            update_count += 1
+            logger.debug("Retrieved page of %d events", len(page.get("items", [])))
+            yield page
+
+            page_token = page.get("nextPageToken")
+            if not page_token:
+                return
+
+    def _describe_unhashed_events(
+        self, start: datetime, end: datetime, events: list[CalendarEvent]
+    ) -> list[CalendarEvent]:
+        """Fetch the descriptions of events written without a content hash.
+
+        Such events can only be compared field by field; they get a hash the
+        next time they are updated, and older ones leave the window over time.
+        """
+        logger.info("Some events have no content hash, fetching their descriptions")
+        described = self.iter_events(start, end, fields=DESCRIBED_LIST_FIELDS)
+        return with_descriptions(events, described)
+
+    def _get_events_incrementally(
+        self, start: datetime, end: datetime, prune_before: datetime | None = None
+    ) -> list[CalendarEvent]:
+        assert self.sync_state_file is not None
+        state = CalendarSyncState.load(self.sync_state_file, self.calendar_id)
+
+        if state.sync_token is not None:
+            try:
+                self._sync(state, syncToken=state.sync_token, fields=SYNC_FIELDS)
+            except HttpError as error:
+                if error.resp.status != 410:
+                    raise
+                logger.info("Calendar sync token expired, performing a full sync")
+                state.reset()
+
+        if state.sync_token is None:
+            # Sync tokens can't be combined with the time window and extended
+            # property filters, which are applied on the mirrored events instead
+            self._sync(state, fields=SYNC_FIELDS)
+
+        self._sync_state = state
+        return window_events(state, start, end, prune_before)
+
+    def save_sync_state(self):
+        if self.sync_state_file is not None and self._sync_state is not None:
+            self._sync_state.save(self.sync_state_file)
+
+    def _sync(self, state: CalendarSyncState, **params):
+        changed = 0
+        for page in self._list_pages(**params):
+            changed += merge_sync_page(state, page)
+
+        logger.debug(
+            "%s sync of calendar %s returned %d events",
+            "Incremental" if "syncToken" in params else "Full",
+            self.calendar_id,
+            changed,
+        )
+
+    def apply_changes(
+        self, changes: ChangeSet, journal: ChangeJournal | None = None
+    ) -> ApplyResult:
+        """Apply the changes to the calendar.
+
+        With a ``journal``, the changes and the operations completed after
+        each batch are journaled; committing the journal is left to the
+        caller, once the result was recorded.
+        """
+        operations = [Operation("add", event) for event in changes.to_add]
+        operations += [Operation("remove", event) for event in changes.to_remove]
+        operations += [Operation("update", diff) for diff in changes.to_update]
+
+        result = ApplyResult()
+        if journal is not None:
+            journal.begin(changes)
+        if self.concurrency > 1:
+            self._execute_concurrently(operations, result, journal)
+        else:
+            for offset in range(0, len(operations), self.batch_size):
+                chunk = operations[offset : offset + self.batch_size]
+                progress = Progress(result)
+                self._execute_batch(chunk, result)
+                if journal is not None:
+                    journal.record(progress.completed())
 
         logger.debug(
-            "Applied %d changes to calendar %s: add=%d update=%d remove=%d",
-            add_count + update_count + remove_count,
+            "Applied %d changes to calendar %s: add=%d update=%d remove=%d failed=%d",
+            len(result.added) + len(result.updated) + len(result.removed),
             self.calendar_id,
-            add_count,
-            update_count,
-            remove_count,
+            len(result.added),
+            len(result.updated),
+            len(result.removed),
+            len(result.failed),
         )
+        return result
+
+    def _execute_batch(self, operations: list[Operation], result: ApplyResult):
+        pending = operations
+        attempt = 0
+        while pending:
+            retryable = self._run_batch(pending, attempt, result)
+            if retryable:
+                self.retry_policy.wait(attempt, retryable[0][1])
+                attempt += 1
+            pending = [operation for operation, _ in retryable]
+
+    def _run_batch(
+        self, operations: list[Operation], attempt: int, result: ApplyResult
+    ) -> list[tuple[Operation, Exception]]:
+        retryable: list[tuple[Operation, Exception]] = []
+        conflicts: list[Operation] = []
+
+        def callback(request_id: str, response: Any, exception: Exception | None):
+            operation = operations[int(request_id)]
+            if exception is not None and self.retry_policy.should_retry(
+                attempt, exception
+            ):
+                retryable.append((operation, exception))
+            elif exception is not None and operation.is_conflict(exception):
+                conflicts.append(operation)
+            else:
+                operation.complete(response, exception, result)
+
+        batch = self.service.new_batch_http_request(callback=callback)
+        for index, operation in enumerate(operations):
+            self._throttle()
+            batch.add(
+                build_request(self.service, self.calendar_id, operation),
+                request_id=str(index),
+            )
+        self._authorize()
+        self.retry_policy.call(batch.execute)
+        logger.debug(
+            "Executed batch of %d requests, %d to retry, %d conflicts",
+            len(operations),
+            len(retryable),
+            len(conflicts),
+        )
+
+        for operation in conflicts:
+            try:
+                response = self._insert_conflicting(self.service, operation)
+            except HttpError as error:
+                operation.complete(None, error, result)
+            else:
+                operation.complete(response, None, result)
+
+        return retryable
+
+    def _execute_concurrently(
+        self,
+        operations: list[Operation],
+        result: ApplyResult,
+        journal: ChangeJournal | None = None,
+    ):
+        def execute(operation: Operation) -> tuple[Any, Exception | None]:
+            service = self._thread_service()
+            try:
+                try:
+                    return self._execute(
+                        build_request(service, self.calendar_id, operation)
+                    ), None
+                except HttpError as error:
+                    if not operation.is_conflict(error):
+                        raise
+                    return self._insert_conflicting(service, operation), None
+            except HttpError as error:
+                return None, error
+
+        with ThreadPoolExecutor(max_workers=self.concurrency) as executor:
+            outcomes = executor.map(execute, operations)
+            progress = Progress(result)
+            for index, (operation, (response, exception)) in enumerate(
+                zip(operations, outcomes, strict=True), start=1
+            ):
+                operation.complete(response, exception, result)
+                # Journal as often as when batching
+                if journal is not None and (
+                    index % self.batch_size == 0 or index == len(operations)
+                ):
+                    journal.record(progress.completed())
+                    progress = Progress(result)
+        logger.debug(
+            "Executed %d requests with %d workers", len(operations), self.concurrency
+        )
+
+    def _insert_conflicting(self, service, operation: Operation) -> Any:
+        """Insert an event whose deterministic ID is already used."""
+        assert isinstance(operation.item, LessonEvent)
+        event = operation.item
+        existing = self._execute(slot_request(service, self.calendar_id, event))
+        return self._execute(
+            conflict_request(service, self.calendar_id, event, existing)
+        )
+
+    def _execute(self, request) -> Any:
+        def attempt():
+            self._throttle()
+            self._authorize()
+            return request.execute()
+
+        return self.retry_policy.call(attempt)
+
+    def _authorize(self):
+        """Get an access token before the first request that needs one.
+
+        Runs served from the event mirror make no request, so they should not
+        request a token either. Without a token cache, google-auth refreshes
+        the token by itself.
+        """
+        if self.token_cache_file is None or self.credentials.valid:
+            return
+        with self._token_lock:
+            if not self.credentials.valid:
+                use_token_cache(self.credentials, self.token_cache_file)
+
+    def _thread_service(self):
+        # httplib2 is not thread-safe, so each worker thread gets its own service
+        service = getattr(self._thread_local, "service", None)
+        if service is None:
+            service = self._thread_local.service = self.service_factory()
+        return service
+
+    def _throttle(self):
+        if self.rate_limiter is not None:
+            self.rate_limiter.acquire()
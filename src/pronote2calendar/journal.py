@@ -0,0 +1,146 @@
+import json
+import logging
+import os
+from dataclasses import asdict
+from datetime import datetime
+from pathlib import Path
+from typing import Any
+
+from pronote2calendar.models import ApplyResult, CalendarEvent, ChangeSet
+
+logger = logging.getLogger(__name__)
+
+_RESULT_ENTRIES = ("added", "updated", "removed")
+
+
+def _encode(value: Any) -> Any:
+    if isinstance(value, datetime):
+        return value.isoformat()
+    raise TypeError(f"Cannot serialize {type(value).__name__}")
+
+
+def _decode_event(data: dict[str, Any]) -> CalendarEvent:
+    return CalendarEvent(
+        **{
+            **data,
+            "start": datetime.fromisoformat(data["start"]),
+            "end": datetime.fromisoformat(data["end"]),
+            "updated": (
+                datetime.fromisoformat(data["updated"]) if data.get("updated") else None
+            ),
+        }
+    )
+
+
+def _instant(value: str) -> int:
+    return int(datetime.fromisoformat(value).timestamp())
+
+
+def _planned_operations(begin: dict[str, Any]) -> set[tuple[str, str | int]]:
+    """Operations planned in the ``begin`` entry, keyed like ``_operation_key``."""
+    if begin["entry"] != "begin":
+        raise ValueError("the first entry is not the planned changes")
+    changes = begin["changes"]
+    return (
+        {("added", _instant(event["start"])) for event in changes["to_add"]}
+        | {("updated", diff["id"]) for diff in changes["to_update"]}
+        | {("removed", event["id"]) for event in changes["to_remove"]}
+    )
+
+
+def _operation_key(entry: str, event: CalendarEvent) -> tuple[str, str | int]:
+    if entry == "added":
+        # Added events only get their ID from the calendar
+        return (entry, int(event.start.timestamp()))
+    return (entry, event.id)
+
+
+class ChangeJournal:
+    """Append-only log of the changes being applied to the calendar.
+
+    The planned change set is written before the first request, then each
+    batch of completed operations is appended and synced to disk. The file
+    is removed once all the changes were applied, so a journal found on
+    start-up belongs to an interrupted run: ``recover`` returns what that
+    run had already written to the calendar, among the planned changes.
+    """
+
+    def __init__(self, path: Path):
+        self.path = path
+
+    def begin(self, changes: ChangeSet):
+        self._append([{"entry": "begin", "changes": asdict(changes)}], mode="w")
+        logger.debug("Change journal started in %s", self.path)
+
+    def record(self, result: ApplyResult):
+        """Append the operations of ``result`` that completed."""
+        self._append(
+            [
+                {"entry": entry, "event": asdict(event)}
+                for entry in _RESULT_ENTRIES
+                for event in getattr(result, entry)
+            ]
+        )
+
+    def commit(self):
+        os.remove(self.path)
+        logger.debug("Change journal committed")
+
+    def recover(self) -> ApplyResult | None:
+        """Return the operations completed by an interrupted run, if any.
+
+        The journal is removed: the remaining changes are detected again.
+        """
+        try:
+            with open(self.path) as file:
+                lines = file.readlines()
+        except FileNotFoundError:
+            return None
+
+        try:
+            planned = _planned_operations(json.loads(lines[0]))
+        except (IndexError, ValueError, KeyError, TypeError) as e:
+            logger.warning(
+                "Ignoring change journal %s without a start: %s", self.path, e
+            )
+            os.remove(self.path)
+            return None
+
+        result = ApplyResult()
+        for number, line in enumerate(lines[1:], start=2):
+            try:
+                entry = json.loads(line)
+                kind = entry["entry"]
+                if kind not in _RESULT_ENTRIES:
+                    raise ValueError(f"unknown entry {kind!r}")
+                event = _decode_event(entry["event"])
+            except (ValueError, KeyError, TypeError) as e:
+                # A crash while appending leaves an incomplete last line
+                logger.warning(
+                    "Ignoring change journal %s from line %d: %s", self.path, number, e
+                )
+                break
+            if _operation_key(kind, event) not in planned:
+                logger.warning(
+                    "Ignoring unplanned %s event %s in change journal", kind, event.id
+                )
+                continue
+            getattr(result, kind).append(event)
+
+        os.remove(self.path)
+        logger.info(
+            "Recovered interrupted synchronization: add=%d update=%d remove=%d",
+            len(result.added),
+            len(result.updated),
+            len(result.removed),
+        )
+        return result
+
+    def _append(self, entries: list[dict[str, Any]], mode: str = "a"):
+        if not entries:
+            return
+        with open(self.path, mode) as file:
+            for entry in entries:
+                file.write(json.dumps(entry, default=_encode) + "\n")
+            file.flush()
+            os.fsync(file.fileno())
@@ -0,0 +1,113 @@
+import json
+import logging
+from dataclasses import fields, replace
+from datetime import datetime
+from pathlib import Path
+from typing import Any
+
+from pronote2calendar.file_utils import write_json
+from pronote2calendar.models import LessonRecord, SubjectRecord, to_lesson_record
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_VERSION = 1
+
+_LESSON_FIELDS = [
+    field.name
+    for field in fields(LessonRecord)
+    if field.name not in ("start", "end", "subject")
+]
+_DEFAULT_LESSON = LessonRecord(start=datetime.min, end=datetime.min)
+
+
+def save_snapshot(
+    path: Path, start: datetime, end: datetime, lessons: list[LessonRecord]
+):
+    """Write the lessons to ``path``.
+
+    Fields with their default value are left out to keep the file small.
+    """
+    write_json(
+        path,
+        {
+            "version": SNAPSHOT_VERSION,
+            "start": start.isoformat(),
+            "end": end.isoformat(),
+            "lessons": [_encode(lesson) for lesson in lessons],
+        },
+        separators=(",", ":"),
+        ensure_ascii=False,
+    )
+    logger.info("Recorded %d lessons in %s", len(lessons), path)
+
+
+def load_snapshot(path: Path) -> tuple[datetime, datetime, list[LessonRecord]]:
+    """Return the period and the lessons recorded in ``path``."""
+    with open(path) as file:
+        data = json.load(file)
+    if data.get("version") != SNAPSHOT_VERSION:
+        raise ValueError(f"Unsupported lesson snapshot version in {path}")
+
+    return (
+        datetime.fromisoformat(data["start"]),
+        datetime.fromisoformat(data["end"]),
+        [_decode(lesson) for lesson in data["lessons"]],
+    )
+
+
+def _encode(lesson: LessonRecord) -> dict[str, Any]:
+    encoded: dict[str, Any] = {
+        "start": lesson.start.isoformat(),
+        "end": lesson.end.isoformat(),
+    }
+    if lesson.subject is not None:
+        encoded["subject"] = [lesson.subject.name, lesson.subject.groups]
+    for name in _LESSON_FIELDS:
+        value = getattr(lesson, name)
+        if value != getattr(_DEFAULT_LESSON, name):
+            encoded[name] = value
+    return encoded
+
+
+def _decode(data: dict[str, Any]) -> LessonRecord:
+    start = datetime.fromisoformat(data.pop("start"))
+    end = datetime.fromisoformat(data.pop("end"))
+    subject = data.pop("subject", None)
+    if subject is not None:
+        data["subject"] = SubjectRecord(*subject)
+    # Converted like the lessons fetched from Pronote, to share the names
+    return to_lesson_record(replace(_DEFAULT_LESSON, **data), start, end)
+
+
+class ReplayPronoteClient:
+    """Pronote client serving the lessons recorded in a snapshot.
+
+    It has the interface of ``PronoteClient``, so that a run can be
+    reproduced, or profiled, without a Pronote server.
+    """
+
+    def __init__(self, snapshot_file: Path):
+        self.snapshot_file = snapshot_file
+        self.start, self.end, self.lessons = load_snapshot(snapshot_file)
+        logger.debug(
+            "Loaded %d lessons from %s to %s",
+            len(self.lessons),
+            self.start.isoformat(),
+            self.end.isoformat(),
+        )
+
+    def is_logged_in(self) -> bool:
+        return True
+
+    def get_lessons(self, start: datetime, end: datetime) -> list[LessonRecord]:
+        if start < self.start or end > self.end:
+            logger.warning(
+                "Lesson snapshot %s only covers %s to %s",
+                self.snapshot_file,
+                self.start.isoformat(),
+                self.end.isoformat(),
+            )
+        return [lesson for lesson in self.lessons if start <= lesson.start <= end]
+
+    def save_session(self):
+        pass
@@ -1,17 +1,52 @@
 import logging
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
 
 from pronote2calendar import change_detection
+from pronote2calendar.churn_guard import ChurnGuard, ChurnGuardError
 from pronote2calendar.date_utils import compute_sync_period
 from pronote2calendar.event_creator import create_lesson_events
+from pronote2calendar.event_mirror import EventMirror
 from pronote2calendar.google_calendar_client import GoogleCalendarClient
+from pronote2calendar.journal import ChangeJournal
+from pronote2calendar.lesson_snapshot import ReplayPronoteClient
 from pronote2calendar.logging_manager import setup_logging
+from pronote2calendar.models import LessonRecord
 from pronote2calendar.notifications import send_notifications
 from pronote2calendar.pronote_client import PronoteClient
+from pronote2calendar.refresh_schedule import RefreshSchedule
 from pronote2calendar.settings import Settings
 from pronote2calendar.subject_adjustments import apply_subject_adjustments
 from pronote2calendar.time_adjustments import apply_time_adjustments
 
 
+def fetch_lessons(
+    config: Settings, start: datetime, end: datetime
+) -> list[LessonRecord] | None:
+    """Fetch the lessons from Pronote, or return None if the login failed."""
+    logger = logging.getLogger("pronote2calendar")
+
+    pronote: PronoteClient | ReplayPronoteClient
+    if config.pronote.mode == "replay":
+        # Guaranteed by PronoteSettings validator
+        assert config.pronote.snapshot_file is not None
+        logger.info("Replaying lessons from %s", config.pronote.snapshot_file)
+        pronote = ReplayPronoteClient(config.pronote.snapshot_file)
+    else:
+        logger.info("Initializing Pronote client")
+        pronote = PronoteClient(config.pronote, "credentials-pronote.json")
+
+    if not pronote.is_logged_in():
+        return None
+
+    logger.info("Fetching lessons from Pronote")
+    lessons = pronote.get_lessons(start, end)
+    pronote.save_session()
+    logger.info("Fetched %d lessons", len(lessons) if lessons is not None else 0)
+    return lessons
+
+
 def main():
     try:
         config = Settings()
@@ -25,21 +60,72 @@ def main():
 
     logger = logging.getLogger("pronote2calendar")
 
-    start, end = compute_sync_period(config.sync.weeks)
+    period_start, end = compute_sync_period(config.sync.weeks)
+    start = period_start
+    schedule = (
+        RefreshSchedule(config.sync.refresh_tiers, config.sync.refresh_state_file)
+        if config.sync.refresh_state_file is not None and config.sync.refresh_tiers
+        else None
+    )
+    if schedule is not None:
+        period = schedule.due_period(period_start)
+        if period is None:
+            logger.info("No refresh tier is due, skipping synchronization")
+            return
+        start, end = period
 
     logger.info("Updating lessons from %s to %s", start.isoformat(), end.isoformat())
 
     try:
-        logger.info("Initializing Pronote client")
-        pronote = PronoteClient(config.pronote, "credentials-pronote.json")
-
-        if not pronote.is_logged_in():
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            # Pronote requests are sequential within a session: read the
+            # calendar meanwhile rather than splitting the Pronote requests
+            pronote_lessons = executor.submit(fetch_lessons, config, start, end)
+            logger.info("Initializing Google Calendar client")
+            calendar = GoogleCalendarClient(
+                config.google_calendar, "credentials-google.json"
+            )
+            mirror = (
+                EventMirror(config.sync.mirror_file, config.google_calendar.calendar_id)
+                if config.sync.mirror_file is not None
+                else None
+            )
+            journal = (
+                ChangeJournal(config.sync.journal_file)
+                if config.sync.journal_file is not None
+                else None
+            )
+            max_age = timedelta(hours=config.sync.mirror_max_age_hours)
+            existing_events = None
+            if mirror is None or mirror.needs_verification(max_age, start, end):
+                logger.info("Fetching existing events from Google Calendar")
+                # Nothing is saved before knowing that the Pronote login succeeded,
+                # and the events of the whole sync period are kept in the state
+                existing_events = calendar.get_events(
+                    start, end, save_state=False, prune_before=period_start
+                )
+
+            lessons = pronote_lessons.result()
+
+        if lessons is None:
             logger.error("Pronote login failed")
+            if mirror is not None:
+                mirror.close()
             return
 
-        logger.info("Fetching lessons from Pronote")
-        lessons = pronote.get_lessons(start, end)
-        logger.info("Fetched %d lessons", len(lessons) if lessons is not None else 0)
+        recovered = journal.recover() if journal is not None else None
+        if recovered is not None and mirror is not None:
+            logger.info("Recording changes applied by an interrupted run in mirror")
+            mirror.apply(recovered)
+        if existing_events is not None:
+            calendar.save_sync_state()
+            if mirror is not None:
+                mirror.replace(start, end, existing_events)
+        else:
+            assert mirror is not None  # The calendar is only skipped for the mirror
+            logger.info("Reading existing events from local mirror")
+            existing_events = mirror.get_events(start, end)
+        logger.info("Fetched %d existing events", len(existing_events))
 
         logger.info("Applying time adjustments to lessons")
         lessons = apply_time_adjustments(lessons, config.adjustments.time)
@@ -47,17 +133,6 @@ def main():
         logger.info("Applying subject adjustments to lessons")
         lessons = apply_subject_adjustments(lessons, config.adjustments.subject)
 
-        logger.info("Initializing Google Calendar client")
-        calendar = GoogleCalendarClient(
-            config.google_calendar, "credentials-google.json"
-        )
-        logger.info("Fetching existing events from Google Calendar")
-        existing_events = calendar.get_events(start, end)
-        logger.info(
-            "Fetched %d existing events",
-            len(existing_events) if existing_events is not None else 0,
-        )
-
         logger.info("Creating new events from lessons")
         new_events = create_lesson_events(lessons, config.events.templates)
 
@@ -73,20 +148,63 @@ def main():
             updates,
         )
 
-        if adds == 0 and removes == 0 and updates == 0:
+        limits = config.sync.churn_guard
+        churn_guard = (
+            ChurnGuard(limits, config.google_calendar.calendar_id)
+            if limits.max_remove_ratio is not None or limits.max_add_ratio is not None
+            else None
+        )
+        try:
+            allowed = churn_guard is None or churn_guard.allows(
+                changes, len(existing_events), start, end
+            )
+        except ChurnGuardError as e:
+            logger.error("%s", e)
+            if mirror is not None:
+                mirror.close()
+            sys.exit(1)
+
+        if not allowed:
+            logger.warning("Churn guard is read-only, skipping calendar update")
+        elif adds == 0 and removes == 0 and updates == 0:
             logger.info("No changes to apply, skipping calendar update")
+            if churn_guard is not None:
+                churn_guard.record(len(existing_events), start, end)
+            if schedule is not None:
+                schedule.record()
         else:
             logger.info("Applying changes to calendar")
-            calendar.apply_changes(changes)
-            logger.info("Finished applying changes")
+            result = calendar.apply_changes(changes, journal)
+            if mirror is not None:
+                mirror.apply(result)
+            if journal is not None:
+                journal.commit()
+            if churn_guard is not None:
+                churn_guard.record(
+                    len(existing_events) + len(result.added) - len(result.removed),
+                    start,
+                    end,
+                )
+            if schedule is not None and not result.failed:
+                schedule.record()
+            logger.info(
+                "Finished applying changes: add=%d remove=%d update=%d failed=%d",
+                len(result.added),
+                len(result.removed),
+                len(result.updated),
+                len(result.failed),
+            )
 
             if config.notifications.enabled:
                 logger.info("Sending notifications about changes")
-                send_notifications(config.notifications, changes)
+                send_notifications(config.notifications, changes.without(result.failed))
                 logger.info("Finished sending notifications")
             else:
                 logger.info("Notifications are disabled, skipping notification step")
 
+        if mirror is not None:
+            mirror.close()
+
     except Exception as exc:
         logger.exception("Unhandled exception in main: %s", exc)
         raise
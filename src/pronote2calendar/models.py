@@ -1,4 +1,6 @@
-from dataclasses import dataclass
+import sys
+from collections.abc import Iterable
+from dataclasses import dataclass, field
 from datetime import datetime
 from typing import Any
 
@@ -11,6 +13,93 @@ class CalendarEvent:
     summary: str | None = None
     description: str | None = None
     location: str | None = None
+    etag: str | None = None
+    updated: datetime | None = None
+    content_hash: str | None = None
+
+
+@dataclass(frozen=True, slots=True)
+class SubjectRecord:
+    name: str
+    groups: bool = False
+
+
+@dataclass(frozen=True, slots=True)
+class LessonRecord:
+    """Lesson fields used by the templates.
+
+    Lessons are converted from pronotepy lessons as soon as they are fetched,
+    so that they hold no reference to the Pronote client and can be pickled.
+    """
+
+    start: datetime
+    end: datetime
+    num: int = 0
+    subject: SubjectRecord | None = None
+    teacher_name: str | None = None
+    teacher_names: tuple[str, ...] = ()
+    classroom: str | None = None
+    classrooms: tuple[str, ...] = ()
+    virtual_classrooms: tuple[str, ...] = ()
+    group_name: str | None = None
+    group_names: tuple[str, ...] = ()
+    memo: str | None = None
+    status: str | None = None
+    background_color: str | None = None
+    canceled: bool = False
+    outing: bool = False
+    exempted: bool = False
+    detention: bool = False
+    normal: bool = True
+    test: bool = False
+
+
+_subjects: dict[tuple[str, bool], SubjectRecord] = {}
+
+
+def _intern(value: str | None) -> str | None:
+    return sys.intern(value) if value is not None else None
+
+
+def _intern_all(values: Iterable[str] | None) -> tuple[str, ...]:
+    return tuple(sys.intern(value) for value in values or ())
+
+
+def to_lesson_record(lesson: Any, start: datetime, end: datetime) -> LessonRecord:
+    """Copy the fields of a lesson used by the templates into a ``LessonRecord``.
+
+    Subjects, teachers and rooms repeat across a timetable, so their names
+    and the subjects are shared between the lessons.
+    """
+    subject = None
+    if lesson.subject is not None:
+        key = (sys.intern(lesson.subject.name), bool(lesson.subject.groups))
+        subject = _subjects.get(key)
+        if subject is None:
+            subject = _subjects[key] = SubjectRecord(*key)
+
+    return LessonRecord(
+        start=start,
+        end=end,
+        num=lesson.num,
+        subject=subject,
+        teacher_name=_intern(lesson.teacher_name),
+        teacher_names=_intern_all(lesson.teacher_names),
+        classroom=_intern(lesson.classroom),
+        classrooms=_intern_all(lesson.classrooms),
+        virtual_classrooms=_intern_all(lesson.virtual_classrooms),
+        group_name=_intern(lesson.group_name),
+        group_names=_intern_all(lesson.group_names),
+        memo=lesson.memo,
+        status=_intern(lesson.status),
+        background_color=_intern(lesson.background_color),
+        canceled=lesson.canceled,
+        outing=lesson.outing,
+        exempted=lesson.exempted,
+        detention=lesson.detention,
+        normal=lesson.normal,
+        test=lesson.test,
+    )
 
 
 @dataclass
@@ -35,3 +124,22 @@ class ChangeSet:
     to_add: list[LessonEvent]
     to_update: list[UpdateDiff]
     to_remove: list[CalendarEvent]
+
+    def without(
+        self, failed: Iterable[LessonEvent | UpdateDiff | CalendarEvent]
+    ) -> "ChangeSet":
+        """Return the changes left once the ``failed`` ones are taken out."""
+        failed_ids = {id(change) for change in failed}
+        return ChangeSet(
+            [change for change in self.to_add if id(change) not in failed_ids],
+            [change for change in self.to_update if id(change) not in failed_ids],
+            [change for change in self.to_remove if id(change) not in failed_ids],
+        )
+
+
+@dataclass
+class ApplyResult:
+    added: list[CalendarEvent] = field(default_factory=list)
+    updated: list[CalendarEvent] = field(default_factory=list)
+    removed: list[CalendarEvent] = field(default_factory=list)
+    failed: list[LessonEvent | UpdateDiff | CalendarEvent] = field(default_factory=list)
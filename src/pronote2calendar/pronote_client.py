@@ -1,11 +1,17 @@
 import json
 import logging
-from datetime import date
+import time
+from datetime import datetime
 from itertools import groupby
+from pathlib import Path
 from zoneinfo import ZoneInfo
 
 import pronotepy
 
+from pronote2calendar.file_utils import stat_private, write_json
+from pronote2calendar.lesson_snapshot import save_snapshot
+from pronote2calendar.models import LessonRecord, to_lesson_record
+from pronote2calendar.pronote_session import restore_client, session_state
 from pronote2calendar.settings import PronoteSettings
 
 logger = logging.getLogger(__name__)
@@ -19,6 +25,8 @@ class PronoteClient:
         timezone: str = "Europe/Paris",
     ):
         self.credentials_file_path = credentials_file_path
+        self.session_file = config.session_file
+        self.snapshot_file = config.snapshot_file if config.mode == "record" else None
         self.timezone = ZoneInfo(timezone)
         self.client = self.get_pronote_client(config, credentials_file_path)
         logger.debug(
@@ -32,10 +40,13 @@ class PronoteClient:
         with open(credentials_file_path) as file:
             credentials = json.load(file)
 
-        if config.connection_type == "token":
-            client = self.get_client_from_token_login(config, credentials)
-        else:
-            client = self.get_client_from_username_password(config, credentials)
+        client = self.restore_session(config, credentials)
+        if client is None:
+            client = (
+                self.get_client_from_token_login(config, credentials)
+                if config.connection_type == "token"
+                else self.get_client_from_username_password(config, credentials)
+            )
 
         if isinstance(client, pronotepy.ParentClient):
             assert config.child is not None  # Guaranteed by PronoteSettings validator
@@ -71,18 +82,95 @@ class PronoteClient:
         )(**credentials)
         return client
 
+    def restore_session(
+        self, config: PronoteSettings, credentials: dict
+    ) -> pronotepy.Client | None:
+        """Resume the session saved by a previous run, to avoid logging in.
+
+        The session is checked with a single request; pronotepy logs in again
+        if it has expired on the server.
+        """
+        if config.session_file is None:
+            return None
+        client = self._load_session(config.session_file, config.session_max_age_minutes)
+        if client is None:
+            return None
+
+        is_parent = isinstance(client, pronotepy.ParentClient)
+        if (
+            not isinstance(client, pronotepy.Client)
+            or is_parent != (config.account_type == "parent")
+            or (client.login_mode == "token") != (config.connection_type == "token")
+            or client.pronote_url != credentials.get("pronote_url")
+            or client.username != credentials.get("username")
+        ):
+            logger.info("Saved Pronote session is for another account")
+            return None
+
+        try:
+            expired = client.session_check()
+        except Exception as e:
+            logger.info("Saved Pronote session could not be resumed: %s", e)
+            return None
+
+        if expired:
+            logger.info("Saved Pronote session had expired, logged in again")
+            if config.connection_type == "token":
+                self.update_credentials(client.export_credentials())
+        else:
+            logger.info("Resumed Pronote session from %s", config.session_file)
+        return client
+
+    def _load_session(
+        self, session_file: Path, max_age_minutes: float
+    ) -> pronotepy.Client | None:
+        try:
+            status = stat_private(session_file, "Pronote session")
+            if status is None:
+                return None
+            if time.time() - status.st_mtime > max_age_minutes * 60:
+                logger.info("Saved Pronote session is too old to be resumed")
+                return None
+            with open(session_file) as file:
+                return restore_client(json.load(file))
+        except FileNotFoundError:
+            logger.debug("No saved Pronote session in %s", session_file)
+            return None
+        except Exception as e:
+            logger.warning(
+                "Ignoring unreadable Pronote session %s: %s", session_file, e
+            )
+            return None
+
+    def save_session(self):
+        """Save the session for the next run, once done with the requests.
+
+        The session keeps a request counter checked by Pronote, so it must be
+        saved after the last request.
+        """
+        if self.session_file is None:
+            return
+
+        try:
+            write_json(self.session_file, session_state(self.client), private=True)
+        except (OSError, TypeError, ValueError, AttributeError) as e:
+            logger.warning("Could not save Pronote session: %s", e)
+            return
+        logger.debug("Pronote session saved to %s", self.session_file)
+
     def is_logged_in(self) -> bool:
         logged_in = self.client.logged_in
         logger.debug("Pronote is_logged_in check: %s", logged_in)
         return logged_in
 
-    def get_lessons(self, start: date, end: date) -> list[pronotepy.Lesson]:
+    def get_lessons(self, start: datetime, end: datetime) -> list[LessonRecord]:
         logger.debug("Fetching lessons from %s to %s", start, end)
         lessons = self.client.lessons(start, end)
-        result = self.sort_and_filter_lessons(lessons)
-        result = self._convert_lessons_to_aware(result)
+        result = self._to_records(self.sort_and_filter_lessons(lessons))
         logger.debug("Raw lessons fetched: %d", len(lessons))
         logger.debug("Fetched %d lessons (after filter)", len(result))
+        if self.snapshot_file is not None:
+            save_snapshot(self.snapshot_file, start, end, result)
         return result
 
     def sort_and_filter_lessons(
@@ -110,8 +198,12 @@ class PronoteClient:
             return naive_datetime.replace(tzinfo=self.timezone)
         return naive_datetime
 
-    def _convert_lessons_to_aware(self, lessons):
-        for lesson in lessons:
-            lesson.start = self._convert_to_aware(lesson.start)
-            lesson.end = self._convert_to_aware(lesson.end)
-        return lessons
+    def _to_records(self, lessons: list[pronotepy.Lesson]) -> list[LessonRecord]:
+        return [
+            to_lesson_record(
+                lesson,
+                self._convert_to_aware(lesson.start),
+                self._convert_to_aware(lesson.end),
+            )
+            for lesson in lessons
+        ]
@@ -0,0 +1,127 @@
+import time
+from datetime import date, datetime
+from typing import Any
+
+import pronotepy
+from pronotepy.dataClasses import ClientInfo
+from pronotepy.pronoteAPI import _Communication, _Encryption
+from requests.utils import cookiejar_from_dict, dict_from_cookiejar
+
+
+def session_state(client: pronotepy.Client) -> dict[str, Any]:
+    """Return the state needed to resume the session of a logged in client.
+
+    Only JSON values are kept: the session attributes and cookies, the
+    request counter checked by Pronote, the AES keys and IV, and the server
+    responses the client is built from.
+    """
+    communication = client.communication
+    return {
+        "account_type": (
+            "parent" if isinstance(client, pronotepy.ParentClient) else "child"
+        ),
+        "pronote_url": client.pronote_url,
+        "username": client.username,
+        "password": client.password,
+        "login_mode": client.login_mode,
+        "uuid": client.uuid,
+        "client_identifier": client.client_identifier,
+        "attributes": communication.attributes,
+        "cookies": (
+            dict_from_cookiejar(communication.cookies)
+            if communication.cookies is not None
+            else None
+        ),
+        "session_cookies": dict_from_cookiejar(communication.session.cookies),
+        "request_number": communication.request_number,
+        "aes_iv": communication.encryption.aes_iv.hex(),
+        "aes_key": communication.encryption.aes_key.hex(),
+        "login_key": client.encryption.aes_key.hex(),
+        "encrypt_requests": communication.encrypt_requests,
+        "compress_requests": communication.compress_requests,
+        "authorized_onglets": communication.authorized_onglets,
+        "func_options": client.func_options,
+        "parametres_utilisateur": client.parametres_utilisateur,
+        "resource": client.info.raw_resource,
+        "children": (
+            [child.raw_resource for child in client.children]
+            if isinstance(client, pronotepy.ParentClient)
+            else None
+        ),
+        "last_connection": (
+            last_connection.isoformat()
+            if (last_connection := getattr(client, "last_connection", None))
+            else None
+        ),
+    }
+
+
+def restore_client(state: dict[str, Any]) -> pronotepy.Client:
+    """Rebuild a logged in client from ``session_state``, without any request.
+
+    This sets the attributes ``pronotepy.Client.__init__`` leaves once logged
+    in, so it has to follow pronotepy upgrades.
+    """
+    cookies = state["cookies"]
+    communication = _Communication(
+        state["pronote_url"],
+        cookiejar_from_dict(cookies) if cookies is not None else None,
+    )
+    communication.session.cookies.update(state["session_cookies"])
+    communication.attributes = state["attributes"]
+    communication.request_number = state["request_number"]
+    communication.encryption.aes_iv = bytes.fromhex(state["aes_iv"])
+    communication.encryption.aes_key = bytes.fromhex(state["aes_key"])
+    communication.encrypt_requests = state["encrypt_requests"]
+    communication.compress_requests = state["compress_requests"]
+    communication.authorized_onglets = state["authorized_onglets"]
+
+    cls = (
+        pronotepy.ParentClient
+        if state["account_type"] == "parent"
+        else pronotepy.Client
+    )
+    client = cls.__new__(cls)
+    client.ent = None
+    client.uuid = state["uuid"]
+    client.login_mode = state["login_mode"]
+    client.username = state["username"]
+    client.password = state["password"]
+    client.pronote_url = state["pronote_url"]
+    client.communication = communication
+    client.account_pin = None
+    client.client_identifier = state["client_identifier"]
+    client.device_name = None
+    client.attributes = communication.attributes
+    client.func_options = state["func_options"]
+    client.encryption = _Encryption()
+    client.encryption.aes_iv = communication.encryption.aes_iv
+    client.encryption.aes_key = bytes.fromhex(state["login_key"])
+    client._last_ping = time.time()
+    client.parametres_utilisateur = state["parametres_utilisateur"]
+    client.auth_cookie = {}
+    client.info = ClientInfo(client, state["resource"])
+    client.start_day = datetime.strptime(
+        client.func_options["dataSec"]["data"]["General"]["PremierLundi"]["V"],
+        "%d/%m/%Y",
+    ).date()
+    client.week = client.get_week(date.today())
+    client._refreshing = False
+    client.periods_ = None
+    client.periods_ = client.periods
+    client.logged_in = True
+    client._expired = False
+    client.last_connection = (
+        datetime.fromisoformat(state["last_connection"])
+        if state["last_connection"] is not None
+        else None
+    )
+
+    if isinstance(client, pronotepy.ParentClient):
+        # The selected child is set again once the session is resumed
+        client.children = [ClientInfo(client, child) for child in state["children"]]
+        client._selected_child = client.children[0]
+        client.parametres_utilisateur["dataSec"]["data"]["ressource"] = (
+            client._selected_child.raw_resource
+        )
+    return client
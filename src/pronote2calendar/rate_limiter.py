@@ -0,0 +1,53 @@
+import asyncio
+import logging
+import threading
+import time
+from collections.abc import Callable
+
+logger = logging.getLogger(__name__)
+
+
+class TokenBucket:
+    """Thread-safe token bucket allowing ``rate`` acquisitions per second.
+
+    Up to ``capacity`` tokens (by default one second worth of requests) can
+    be accumulated while idle, which allows short bursts.
+    """
+
+    def __init__(
+        self,
+        rate: float,
+        capacity: float | None = None,
+        clock: Callable[[], float] = time.monotonic,
+        sleep: Callable[[float], None] = time.sleep,
+    ):
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else max(rate, 1.0)
+        self._clock = clock
+        self._sleep = sleep
+        self._tokens = self.capacity
+        self._updated = clock()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        while wait := self._try_acquire():
+            logger.debug("Rate limit reached, waiting %.3fs", wait)
+            self._sleep(wait)
+
+    async def acquire_async(self):
+        while wait := self._try_acquire():
+            logger.debug("Rate limit reached, waiting %.3fs", wait)
+            await asyncio.sleep(wait)
+
+    def _try_acquire(self) -> float:
+        """Take a token, or return how long to wait until one is available."""
+        with self._lock:
+            now = self._clock()
+            self._tokens = min(
+                self.capacity, self._tokens + (now - self._updated) * self.rate
+            )
+            self._updated = now
+            if self._tokens >= 1:
+                self._tokens -= 1
+                return 0
+            return (1 - self._tokens) / self.rate
@@ -0,0 +1,89 @@
+import json
+import logging
+from datetime import datetime, timedelta
+from pathlib import Path
+
+from pronote2calendar.file_utils import write_json
+from pronote2calendar.settings import RefreshTier
+
+logger = logging.getLogger(__name__)
+
+
+class RefreshSchedule:
+    """When each tier of the sync period was last synced.
+
+    The tiers split the sync period into consecutive weeks: the near weeks,
+    where most timetable changes happen, can be synced on every run and the
+    far ones less often. A run only syncs the tiers due for a refresh, so
+    Pronote and the calendar are read for those weeks only.
+    """
+
+    def __init__(self, tiers: list[RefreshTier], state_file: Path):
+        self.tiers = tiers
+        self.state_file = state_file
+        self._synced: list[str] = []
+
+    def due_period(
+        self, start: datetime, now: datetime | None = None
+    ) -> tuple[datetime, datetime] | None:
+        """Return the part of the sync period from ``start`` to sync now, if any.
+
+        It spans the tiers due for a refresh, and the tiers in between which
+        are synced along with them.
+        """
+        now = now or datetime.now().astimezone()
+        refreshed = self._load()
+        due = [
+            index
+            for index, tier in enumerate(self.tiers)
+            if self._key(index) not in refreshed
+            or now - refreshed[self._key(index)] >= timedelta(hours=tier.max_age_hours)
+        ]
+        if not due:
+            return None
+
+        first, last = due[0], due[-1]
+        self._synced = [self._key(index) for index in range(first, last + 1)]
+        logger.debug("Refresh tiers due: %s", ", ".join(self._synced))
+        return (
+            start + timedelta(weeks=self._offset(first)),
+            start + timedelta(weeks=self._offset(last + 1), seconds=-1),
+        )
+
+    def record(self, now: datetime | None = None):
+        """Record that the period returned by ``due_period`` was synced."""
+        now = now or datetime.now().astimezone()
+        refreshed = self._load()
+        refreshed.update(dict.fromkeys(self._synced, now))
+
+        write_json(
+            self.state_file,
+            {"refreshed": {key: value.isoformat() for key, value in refreshed.items()}},
+        )
+        logger.debug("Refresh tiers synced: %s", ", ".join(self._synced))
+
+    def _offset(self, index: int) -> int:
+        return sum(tier.weeks for tier in self.tiers[:index])
+
+    def _key(self, index: int) -> str:
+        # Tiers are identified by their weeks, so that changing them resets
+        # their refresh times
+        return f"{self._offset(index)}+{self.tiers[index].weeks}"
+
+    def _load(self) -> dict[str, datetime]:
+        try:
+            with open(self.state_file) as file:
+                refreshed = {
+                    key: datetime.fromisoformat(value)
+                    for key, value in json.load(file)["refreshed"].items()
+                }
+            if any(value.tzinfo is None for value in refreshed.values()):
+                raise ValueError("refresh times must have a timezone")
+            return refreshed
+        except FileNotFoundError:
+            return {}
+        except (OSError, ValueError, KeyError, TypeError, AttributeError) as e:
+            logger.warning(
+                "Ignoring unreadable refresh state %s: %s", self.state_file, e
+            )
+            return {}
@@ -0,0 +1,127 @@
+import asyncio
+import json
+import logging
+import random
+import time
+from collections.abc import Awaitable, Callable
+from datetime import datetime
+from email.utils import parsedate_to_datetime
+from typing import TypeVar
+
+from googleapiclient.errors import HttpError  # type: ignore
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+RATE_LIMIT_REASONS = {"rateLimitExceeded", "userRateLimitExceeded"}
+
+
+def is_retryable(error: Exception) -> bool:
+    if isinstance(error, (ConnectionError, TimeoutError)):
+        return True
+    if not isinstance(error, HttpError):
+        return False
+
+    status = error.resp.status
+    if status == 429 or status >= 500:
+        return True
+    if status == 403:
+        return bool(RATE_LIMIT_REASONS & _error_reasons(error))
+    return False
+
+
+def _error_reasons(error: HttpError) -> set[str]:
+    try:
+        data = json.loads(error.content.decode("utf-8"))
+        return {item.get("reason") for item in data["error"]["errors"]}
+    except (ValueError, KeyError, TypeError, AttributeError):
+        return set()
+
+
+def _retry_after(error: Exception) -> float | None:
+    if not isinstance(error, HttpError):
+        return None
+
+    value = error.resp.get("retry-after")
+    if not value:
+        return None
+    if value.isdigit():
+        return float(value)
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return max(0.0, (retry_at - datetime.now(retry_at.tzinfo)).total_seconds())
+
+
+class RetryPolicy:
+    """Retries transient Google API errors with jittered exponential backoff.
+
+    Rate limit errors (403 ``rateLimitExceeded``/``userRateLimitExceeded``
+    and 429), server errors (5xx) and connection errors are retried up to
+    ``max_retries`` times. A ``Retry-After`` header sent by the server takes
+    precedence over the computed delay.
+    """
+
+    def __init__(
+        self,
+        max_retries: int = 5,
+        base_delay: float = 1.0,
+        max_delay: float = 64.0,
+        sleep: Callable[[float], None] = time.sleep,
+        async_sleep: Callable[[float], Awaitable[None]] = asyncio.sleep,
+    ):
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.sleep = sleep
+        self.async_sleep = async_sleep
+
+    def delay(self, attempt: int, error: Exception) -> float:
+        retry_after = _retry_after(error)
+        if retry_after is not None:
+            return min(retry_after, self.max_delay)
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2**attempt))
+
+    def should_retry(self, attempt: int, error: Exception) -> bool:
+        return attempt < self.max_retries and is_retryable(error)
+
+    def wait(self, attempt: int, error: Exception):
+        self.sleep(self._log_retry(attempt, error))
+
+    async def wait_async(self, attempt: int, error: Exception):
+        await self.async_sleep(self._log_retry(attempt, error))
+
+    def _log_retry(self, attempt: int, error: Exception) -> float:
+        delay = self.delay(attempt, error)
+        logger.warning(
+            "Transient Google API error (attempt %d/%d), retrying in %.1fs: %s",
+            attempt + 1,
+            self.max_retries,
+            delay,
+            error,
+        )
+        return delay
+
+    def call(self, func: Callable[[], T]) -> T:
+        attempt = 0
+        while True:
+            try:
+                return func()
+            except Exception as error:
+                if not self.should_retry(attempt, error):
+                    raise
+                self.wait(attempt, error)
+                attempt += 1
+
+    async def call_async(self, func: Callable[[], Awaitable[T]]) -> T:
+        attempt = 0
+        while True:
+            try:
+                return await func()
+            except Exception as error:
+                if not self.should_retry(attempt, error):
+                    raise
+                await self.wait_async(attempt, error)
+                attempt += 1
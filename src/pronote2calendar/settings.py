@@ -30,6 +30,23 @@ class PronoteSettings(BaseSettings):
     connection_type: Literal["token", "password"] = Field(default="token")
     account_type: Literal["child", "parent"] = Field(default="child")
     child: str | None = Field(default=None)
+    session_file: Path | None = Field(
+        default=None,
+        description="File keeping the Pronote session between runs",
+    )
+    session_max_age_minutes: float = Field(
+        default=1500,
+        gt=0,
+        description="Minutes after which a saved Pronote session is not resumed",
+    )
+    mode: Literal["live", "record", "replay"] = Field(
+        default="live",
+        description="Whether lessons are fetched, also recorded, or replayed",
+    )
+    snapshot_file: Path | None = Field(
+        default=None,
+        description="File where lessons are recorded to or replayed from",
+    )
 
     @model_validator(mode="after")
     def check_child_for_parent(self) -> Self:
@@ -37,13 +54,144 @@ class PronoteSettings(BaseSettings):
             raise ValueError("'child' is required when 'account_type' is 'parent'")
         return self
 
+    @model_validator(mode="after")
+    def check_snapshot_file(self) -> Self:
+        if self.mode != "live" and self.snapshot_file is None:
+            raise ValueError(f"'snapshot_file' is required in '{self.mode}' mode")
+        return self
+
 
 class GoogleCalendarSettings(BaseSettings):
     calendar_id: EmailStr = Field(description="Email address of the Google Calendar")
+    batch_size: int = Field(
+        default=50,
+        ge=1,
+        le=1000,
+        description="Maximum number of write requests sent in a single batch",
+    )
+    page_size: int = Field(
+        default=250,
+        ge=1,
+        le=2500,
+        description="Maximum number of events returned per page when listing",
+    )
+    sync_state_file: Path | None = Field(
+        default=None,
+        description="File storing the sync token used for incremental reads",
+    )
+    concurrency: int = Field(
+        default=1,
+        ge=1,
+        le=32,
+        description="Number of write requests sent concurrently instead of batched",
+    )
+    max_requests_per_second: float | None = Field(
+        default=None,
+        gt=0,
+        description="Maximum number of Google Calendar API calls per second",
+    )
+    max_retries: int = Field(
+        default=5,
+        ge=0,
+        description="Number of retries of rate limited or failed API calls",
+    )
+    discovery_cache_file: Path | None = Field(
+        default=None,
+        description="File caching a compact Calendar API discovery document",
+    )
+    transport: Literal["httplib2", "requests"] = Field(
+        default="httplib2",
+        description="HTTP library used to call the Google Calendar API",
+    )
+    timeout: float | None = Field(
+        default=None,
+        gt=0,
+        description="Timeout in seconds of each Google Calendar API call",
+    )
+    token_cache_file: Path | None = Field(
+        default=None,
+        description="File caching the OAuth access token between runs",
+    )
+
+
+class ChurnGuardSettings(BaseSettings):
+    max_remove_ratio: float | None = Field(
+        default=None,
+        gt=0,
+        le=1,
+        description="Maximum share of the existing events removed by a run",
+    )
+    max_add_ratio: float | None = Field(
+        default=None,
+        gt=0,
+        description="Maximum events added to an empty calendar, relative to the "
+        "previous run's event count",
+    )
+    min_events: int = Field(
+        default=10,
+        ge=1,
+        description="Number of events under which the limits are not checked",
+    )
+    action: Literal["abort", "read_only"] = Field(
+        default="abort",
+        description="What to do with a change set exceeding a limit",
+    )
+    state_file: Path | None = Field(
+        default=None,
+        description="File keeping the number of events after the previous run",
+    )
+
+
+class RefreshTier(BaseSettings):
+    weeks: int = Field(ge=1, description="Number of consecutive weeks in the tier")
+    max_age_hours: float = Field(
+        default=0,
+        ge=0,
+        description="Hours after which the weeks of the tier are synced again",
+    )
 
 
 class SyncSettings(BaseSettings):
     weeks: int = Field(default=3, ge=1)
+    mirror_file: Path | None = Field(
+        default=None,
+        description="SQLite file mirroring the events managed in the calendar",
+    )
+    mirror_max_age_hours: float = Field(
+        default=168,
+        ge=0,
+        description="Hours after which the mirror is verified against the calendar",
+    )
+    journal_file: Path | None = Field(
+        default=None,
+        description="File journaling the changes being applied to the calendar",
+    )
+    churn_guard: ChurnGuardSettings = Field(default_factory=ChurnGuardSettings)
+    refresh_tiers: list[RefreshTier] = Field(
+        default_factory=list,
+        description="Parts of the sync period synced at different intervals",
+    )
+    refresh_state_file: Path | None = Field(
+        default=None,
+        description="File keeping when each refresh tier was last synced",
+    )
+
+    @model_validator(mode="after")
+    def check_refresh_tiers(self) -> Self:
+        if not self.refresh_tiers:
+            return self
+        if sum(tier.weeks for tier in self.refresh_tiers) != self.weeks:
+            raise ValueError("'refresh_tiers' must add up to 'weeks'")
+        if self.refresh_state_file is None:
+            raise ValueError("'refresh_state_file' is required with 'refresh_tiers'")
+        return self
+
+    @model_validator(mode="after")
+    def check_journal_file(self) -> Self:
+        # The journal only repairs the mirror after an interrupted run
+        if self.journal_file is not None and self.mirror_file is None:
+            raise ValueError("'mirror_file' is required with 'journal_file'")
+        return self
 
 
 class TimeAdjustmentRule(BaseSettings):
@@ -77,7 +225,7 @@ class NotificationsTemplates(BaseSettings):
 {%- elif change.type == "update" %}
 - Updated: {{ change.summary }} ({{ change.start | datetime }})
 {%- for field, pair in change.data.changes.items() %}
-  - {{ field }}: {{ pair[0] }} → {{ pair[1] }}
+  - {{ field }}: {% if pair[0] is not none %}{{ pair[0] }} → {% endif %}{{ pair[1] }}
 {%- endfor %}
 {%- elif change.type == "remove" %}
 - Removed: {{ change.summary }} ({{ change.start | datetime }})
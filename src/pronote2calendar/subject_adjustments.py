@@ -1,13 +1,14 @@
 import logging
+from dataclasses import replace
 
-from pronotepy import Lesson
+from pronote2calendar.models import LessonRecord
 
 logger = logging.getLogger(__name__)
 
 
 def apply_subject_adjustments(
-    lessons: list[Lesson], adjustments_config: dict[str, str]
-) -> list[Lesson]:
+    lessons: list[LessonRecord], adjustments_config: dict[str, str]
+) -> list[LessonRecord]:
     if not adjustments_config:
         logger.debug("No subject adjustments configured")
         return lessons
@@ -23,15 +24,15 @@ def apply_subject_adjustments(
 
 
 def _adjust_lesson_subject(
-    lesson: Lesson, adjustments_config: dict[str, str]
-) -> Lesson:
+    lesson: LessonRecord, adjustments_config: dict[str, str]
+) -> LessonRecord:
     if lesson.subject is None:
         return lesson
 
     original_subject = lesson.subject.name
 
     if new_subject := adjustments_config.get(original_subject):
-        lesson.subject.name = new_subject
+        lesson = replace(lesson, subject=replace(lesson.subject, name=new_subject))
         logger.debug(
             "Adjusted subject name from '%s' to '%s'",
             original_subject,
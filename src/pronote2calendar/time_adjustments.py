@@ -1,16 +1,16 @@
 import logging
+from dataclasses import replace
 from datetime import datetime, time
 
-from pronotepy import Lesson
-
+from pronote2calendar.models import LessonRecord
 from pronote2calendar.settings import TimeAdjustmentRule
 
 logger = logging.getLogger(__name__)
 
 
 def apply_time_adjustments(
-    lessons: list[Lesson], adjustments_config: list[TimeAdjustmentRule]
-) -> list[Lesson]:
+    lessons: list[LessonRecord], adjustments_config: list[TimeAdjustmentRule]
+) -> list[LessonRecord]:
     if not adjustments_config:
         logger.debug("No time adjustments configured")
         return lessons
@@ -26,8 +26,8 @@ def apply_time_adjustments(
 
 
 def _adjust_lesson_time(
-    lesson: Lesson, adjustments_config: list[TimeAdjustmentRule]
-) -> Lesson:
+    lesson: LessonRecord, adjustments_config: list[TimeAdjustmentRule]
+) -> LessonRecord:
     # Get the weekday (0=Monday, 6=Sunday in Python's weekday())
     # Convert to ISO format where 1=Monday, 7=Sunday
     weekday = lesson.start.weekday() + 1
@@ -39,7 +39,9 @@ def _adjust_lesson_time(
         # Apply start time adjustment
         original_start = lesson.start.time()
         if new_start := rule.start_times.get(original_start):
-            lesson.start = _apply_time_adjustment(lesson.start, new_start)
+            lesson = replace(
+                lesson, start=_apply_time_adjustment(lesson.start, new_start)
+            )
             logger.debug(
                 "Adjusted start time from %s to %s for lesson at %s",
                 original_start.isoformat(),
@@ -50,7 +52,7 @@ def _adjust_lesson_time(
         # Apply end time adjustment
         original_end = lesson.end.time()
         if new_end := rule.end_times.get(original_end):
-            lesson.end = _apply_time_adjustment(lesson.end, new_end)
+            lesson = replace(lesson, end=_apply_time_adjustment(lesson.end, new_end))
             logger.debug(
                 "Adjusted end time from %s to %s for lesson at %s",
                 original_end.isoformat(),
@@ -0,0 +1,74 @@
+import json
+import logging
+from datetime import datetime
+from pathlib import Path
+
+from google.auth.transport.requests import Request
+from google.oauth2 import service_account
+
+from pronote2calendar.file_utils import stat_private, write_json
+
+logger = logging.getLogger(__name__)
+
+
+def use_token_cache(
+    credentials: service_account.Credentials, cache_file: Path, request=None
+):
+    """Make the credentials valid, reusing the access token cached on disk.
+
+    A new token is only requested once the cached one is about to expire
+    (``credentials.valid`` accounts for clock skew), and is then cached for
+    the next runs.
+    """
+    if restore_token(credentials, cache_file) and credentials.valid:
+        logger.debug("Reusing cached access token from %s", cache_file)
+        return
+
+    credentials.refresh(request or Request())
+    store_token(credentials, cache_file)
+
+
+def restore_token(credentials: service_account.Credentials, cache_file: Path) -> bool:
+    try:
+        if stat_private(cache_file, "token cache") is None:
+            return False
+        with open(cache_file) as file:
+            data = json.load(file)
+        account = data["account"]
+        scopes = set(data["scopes"])
+        token = data["token"]
+        # google-auth compares expiries as naive UTC datetimes
+        expiry = datetime.fromisoformat(data["expiry"])
+    except FileNotFoundError:
+        logger.debug("No cached access token in %s", cache_file)
+        return False
+    except (OSError, ValueError, KeyError, TypeError) as e:
+        logger.warning("Ignoring unreadable token cache %s: %s", cache_file, e)
+        return False
+
+    if account != credentials.service_account_email or scopes != set(
+        credentials.scopes or []
+    ):
+        logger.info("Token cache in %s is for other credentials", cache_file)
+        return False
+
+    credentials.token = token
+    credentials.expiry = expiry
+    return True
+
+
+def store_token(credentials: service_account.Credentials, cache_file: Path):
+    if credentials.token is None or credentials.expiry is None:
+        return
+
+    write_json(
+        cache_file,
+        {
+            "account": credentials.service_account_email,
+            "scopes": sorted(credentials.scopes or []),
+            "token": credentials.token,
+            "expiry": credentials.expiry.isoformat(),
+        },
+        private=True,
+    )
+    logger.debug("Access token cached in %s", cache_file)
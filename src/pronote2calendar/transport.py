@@ -0,0 +1,82 @@
+import logging
+from typing import Any
+
+import httplib2  # type: ignore
+import requests
+from google.auth.credentials import Credentials
+from google.auth.transport.requests import AuthorizedSession
+from google_auth_httplib2 import AuthorizedHttp  # type: ignore
+from requests.adapters import HTTPAdapter
+
+from pronote2calendar.settings import GoogleCalendarSettings
+
+logger = logging.getLogger(__name__)
+
+# Headers describing the encoding on the wire: requests already decoded the body
+WIRE_HEADERS = ("content-encoding", "content-length", "transfer-encoding")
+
+
+class RequestsHttp:
+    """httplib2-compatible transport backed by an ``AuthorizedSession``.
+
+    Connections are kept alive in a pool shared by all the requests made
+    through this object, responses are gzip-compressed when the server
+    supports it and every call is bounded by ``timeout``.
+    """
+
+    def __init__(
+        self, credentials: Credentials, timeout: float | None, pool_size: int = 10
+    ):
+        self.credentials = credentials
+        self.timeout = timeout
+        self.session = AuthorizedSession(credentials)
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+    def request(
+        self,
+        uri: str,
+        method: str = "GET",
+        body: Any = None,
+        headers: dict[str, str] | None = None,
+        redirections: int = 5,
+        connection_type: Any = None,
+    ) -> tuple[httplib2.Response, bytes]:
+        # Raise the same errors as httplib2 so retries handle both transports
+        try:
+            response = self.session.request(
+                method, uri, data=body, headers=headers, timeout=self.timeout
+            )
+        except requests.Timeout as e:
+            raise TimeoutError(str(e)) from e
+        except requests.ConnectionError as e:
+            raise ConnectionError(str(e)) from e
+        info: dict[str, Any] = {
+            key.lower(): value
+            for key, value in response.headers.items()
+            if key.lower() not in WIRE_HEADERS
+        }
+        info["status"] = response.status_code
+        http_response = httplib2.Response(info)
+        http_response.reason = response.reason
+        return http_response, response.content
+
+    def close(self):
+        self.session.close()
+
+
+def build_http(
+    config: GoogleCalendarSettings, credentials: Credentials
+) -> RequestsHttp | AuthorizedHttp | None:
+    """Build the HTTP transport used by the Calendar service.
+
+    Returns ``None`` to let the Google client library use its default
+    transport.
+    """
+    if config.transport == "requests":
+        logger.debug("Using requests transport (timeout=%s)", config.timeout)
+        return RequestsHttp(credentials, config.timeout, pool_size=config.concurrency)
+    if config.timeout is not None:
+        return AuthorizedHttp(credentials, http=httplib2.Http(timeout=config.timeout))
+    return None
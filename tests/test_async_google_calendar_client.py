@@ -0,0 +1,296 @@
+import asyncio
+import json
+from datetime import datetime, timedelta
+from zoneinfo import ZoneInfo
+
+import httplib2  # type: ignore
+import httpx
+import pytest
+from googleapiclient import discovery_cache  # type: ignore
+from googleapiclient.discovery import build_from_document  # type: ignore
+from googleapiclient.errors import HttpError  # type: ignore
+
+from pronote2calendar.async_google_calendar_client import AsyncGoogleCalendarClient
+from pronote2calendar.calendar_api import make_event_id
+from pronote2calendar.discovery import compact_discovery_document
+from pronote2calendar.journal import ChangeJournal
+from pronote2calendar.models import CalendarEvent, ChangeSet, LessonEvent, UpdateDiff
+from pronote2calendar.retry import RetryPolicy
+
+START = datetime(2025, 10, 6, 8, 0, tzinfo=ZoneInfo("Europe/Paris"))
+CALENDAR_ID = "calendar@example.com"
+
+
+class FakeCredentials:
+    def __init__(self, valid=True):
+        self.valid = valid
+        self.token = "token"
+        self.refreshed = 0
+
+    def refresh(self, request):
+        self.refreshed += 1
+        self.valid = True
+
+
+class FakeCalendar:
+    """Calendar API served through an httpx mock transport."""
+
+    def __init__(self, pages=None, statuses=None, failures=None, delay=0.01):
+        self.pages = pages or {}
+        self.statuses = statuses or {}
+        # Seconds after which a request for the event fails to connect
+        self.failures = failures or {}
+        self.delay = delay
+        self.stored = {}
+        self.requests = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    async def handle(self, request: httpx.Request) -> httpx.Response:
+        self.requests.append(request)
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            body = json.loads(request.content) if request.content else {}
+            if body.get("id") in self.failures:
+                await asyncio.sleep(self.failures[body["id"]])
+                raise ConnectionError("connection reset")
+            await asyncio.sleep(self.delay)
+            return self.respond(request)
+        finally:
+            self.in_flight -= 1
+
+    def respond(self, request: httpx.Request) -> httpx.Response:
+        event_id = request.url.path.rsplit("/", 1)[-1]
+        statuses = self.statuses.get((request.method, event_id))
+        if statuses:
+            return httpx.Response(statuses.pop(0))
+        if request.method == "GET" and event_id == "events":
+            return httpx.Response(
+                200, json=self.pages[request.url.params.get("pageToken")]
+            )
+        if request.method == "GET":
+            if event_id not in self.stored:
+                return httpx.Response(404)
+            return httpx.Response(200, json=self.stored[event_id])
+        if request.method == "DELETE":
+            self.stored[event_id] = {"id": event_id, "status": "cancelled"}
+            return httpx.Response(204)
+        body = json.loads(request.content)
+        if request.method == "POST":
+            event_id = body.get("id", f"new{len(self.stored)}")
+            if event_id in self.stored:
+                return httpx.Response(409)
+        self.stored[event_id] = {**body, "id": event_id}
+        return httpx.Response(200, json={"id": event_id, "etag": '"1"'})
+
+
+def make_client(calendar, concurrency=5, credentials=None):
+    document = compact_discovery_document(
+        json.loads(discovery_cache.get_static_doc("calendar", "v3"))
+    )
+    client = AsyncGoogleCalendarClient.__new__(AsyncGoogleCalendarClient)
+    client.credentials = credentials or FakeCredentials()
+    client.token_cache_file = None
+    client.service = build_from_document(document, http=httplib2.Http())
+    client.http_client = httpx.AsyncClient(
+        transport=httpx.MockTransport(calendar.handle)
+    )
+    client._owns_http_client = True
+    client.calendar_id = CALENDAR_ID
+    client.batch_size = 2
+    client.page_size = 250
+    client.sync_state_file = None
+    client.semaphore = asyncio.Semaphore(concurrency)
+    client.rate_limiter = None
+    client.retry_policy = RetryPolicy(async_sleep=lambda seconds: asyncio.sleep(0))
+    client._auth_lock = asyncio.Lock()
+    return client
+
+
+def make_lesson_event(start, summary="Math"):
+    return LessonEvent(start, start + timedelta(hours=1), summary, "Mrs. A", "Room 1")
+
+
+def managed_event_dict(event_id, start):
+    return {
+        "id": event_id,
+        "start": {"dateTime": start.isoformat()},
+        "end": {"dateTime": (start + timedelta(hours=1)).isoformat()},
+        "summary": "Math",
+        "extendedProperties": {
+            "private": {"source": "pronote2calendar", "hash": "0123456789abcdef"}
+        },
+    }
+
+
+def run(client, coroutine):
+    async def main():
+        async with client:
+            return await coroutine
+
+    return asyncio.run(main())
+
+
+def test_get_events_follows_next_page_token():
+    calendar = FakeCalendar(
+        pages={
+            None: {
+                "items": [managed_event_dict("e1", START)],
+                "nextPageToken": "page2",
+            },
+            "page2": {"items": [managed_event_dict("e2", START)]},
+        }
+    )
+    client = make_client(calendar)
+
+    events = run(client, client.get_events(START, START + timedelta(weeks=1)))
+
+    assert [event.id for event in events] == ["e1", "e2"]
+    first = calendar.requests[0]
+    assert first.headers["authorization"] == "Bearer token"
+    assert first.url.params["privateExtendedProperty"] == "source=pronote2calendar"
+    assert "description" not in first.url.params["fields"]
+    assert calendar.requests[1].url.params["pageToken"] == "page2"
+
+
+def test_apply_changes_bounds_requests_in_flight():
+    calendar = FakeCalendar()
+    client = make_client(calendar, concurrency=3)
+    adds = [make_lesson_event(START + timedelta(hours=i)) for i in range(10)]
+
+    result = run(client, client.apply_changes(ChangeSet(adds, [], [])))
+
+    assert [event.id for event in result.added] == [
+        make_event_id(CALENDAR_ID, event.start) for event in adds
+    ]
+    assert calendar.max_in_flight == 3
+
+
+def test_apply_changes_reports_failures_per_event():
+    calendar = FakeCalendar(statuses={("PATCH", "missing"): [404]})
+    client = make_client(calendar)
+    old = CalendarEvent("missing", START, START + timedelta(hours=1), "Math")
+    update = UpdateDiff("missing", old, make_lesson_event(START, "English"), {})
+    removed = CalendarEvent("e2", START, START + timedelta(hours=1), "Math")
+
+    result = run(client, client.apply_changes(ChangeSet([], [update], [removed])))
+
+    assert result.failed == [update]
+    assert result.removed == [removed]
+
+
+def test_transient_errors_are_retried():
+    calendar = FakeCalendar(statuses={("DELETE", "e1"): [503, 429]})
+    client = make_client(calendar)
+    removed = CalendarEvent("e1", START, START + timedelta(hours=1), "Math")
+
+    result = run(client, client.apply_changes(ChangeSet([], [], [removed])))
+
+    assert result.removed == [removed]
+    assert len(calendar.requests) == 3
+
+
+def test_permanent_read_errors_are_raised():
+    calendar = FakeCalendar(statuses={("GET", "events"): [400]})
+    client = make_client(calendar)
+
+    with pytest.raises(HttpError):
+        run(client, client.get_events(START, START + timedelta(weeks=1)))
+
+
+def test_insert_restores_a_deleted_event_with_the_same_id():
+    calendar = FakeCalendar()
+    event = make_lesson_event(START)
+    event_id = make_event_id(CALENDAR_ID, START)
+    calendar.stored[event_id] = {"id": event_id, "status": "cancelled"}
+    client = make_client(calendar)
+
+    result = run(client, client.apply_changes(ChangeSet([event], [], [])))
+
+    assert [added.id for added in result.added] == [event_id]
+    assert calendar.stored[event_id]["status"] == "confirmed"
+    assert [request.method for request in calendar.requests] == ["POST", "GET", "PUT"]
+
+
+def test_expired_token_is_refreshed_once():
+    calendar = FakeCalendar()
+    credentials = FakeCredentials(valid=False)
+    client = make_client(calendar, credentials=credentials)
+    adds = [make_lesson_event(START + timedelta(hours=i)) for i in range(5)]
+
+    run(client, client.apply_changes(ChangeSet(adds, [], [])))
+
+    assert credentials.refreshed == 1
+
+
+def test_update_is_conditional_on_the_etag():
+    calendar = FakeCalendar(statuses={("PATCH", "e1"): [412]})
+    client = make_client(calendar)
+    old = CalendarEvent("e1", START, START + timedelta(hours=1), "Math", etag='"1"')
+    update = UpdateDiff(
+        "e1", old, make_lesson_event(START, "English"), {"summary": ("Math", "English")}
+    )
+
+    result = run(client, client.apply_changes(ChangeSet([], [update], [])))
+
+    assert result.failed == [update]
+    (request,) = calendar.requests
+    assert request.headers["if-match"] == '"1"'
+    assert set(json.loads(request.content)) == {"summary", "extendedProperties"}
+
+
+class RecordingJournal(ChangeJournal):
+    def __init__(self, path):
+        super().__init__(path)
+        self.recorded = []
+
+    def record(self, result):
+        self.recorded.append(result)
+        super().record(result)
+
+
+def test_apply_changes_journals_completed_operations(tmp_path):
+    calendar = FakeCalendar()
+    client = make_client(calendar)
+    adds = [make_lesson_event(START + timedelta(hours=i)) for i in range(3)]
+    journal = RecordingJournal(tmp_path / "journal.jsonl")
+
+    result = run(client, client.apply_changes(ChangeSet(adds, [], []), journal))
+
+    assert [len(batch.added) for batch in journal.recorded] == [2, 1]
+    recovered = journal.recover()
+    assert [event.id for event in recovered.added] == [
+        event.id for event in result.added
+    ]
+
+
+def test_apply_changes_stops_writing_after_an_error():
+    adds = [make_lesson_event(START + timedelta(hours=i)) for i in range(5)]
+    calendar = FakeCalendar(failures={make_event_id(CALENDAR_ID, START): 0}, delay=0.2)
+    client = make_client(calendar)
+
+    async def apply():
+        with pytest.raises(ConnectionError):
+            await client.apply_changes(ChangeSet(adds, [], []))
+        await asyncio.sleep(0.3)
+
+    run(client, apply())
+
+    assert calendar.stored == {}
+
+
+def test_apply_changes_journals_writes_completed_before_an_error(tmp_path):
+    adds = [make_lesson_event(START + timedelta(hours=i)) for i in range(5)]
+    failing = make_event_id(CALENDAR_ID, adds[2].start)
+    calendar = FakeCalendar(failures={failing: 0.05})
+    client = make_client(calendar)
+    journal = ChangeJournal(tmp_path / "journal.jsonl")
+
+    with pytest.raises(ConnectionError):
+        run(client, client.apply_changes(ChangeSet(adds, [], []), journal))
+
+    recovered = journal.recover()
+    assert recovered is not None
+    assert sorted(event.id for event in recovered.added) == sorted(calendar.stored)
+    assert len(recovered.added) == 4
@@ -0,0 +1,18 @@
+from datetime import datetime, timedelta
+from zoneinfo import ZoneInfo
+
+from pronote2calendar.calendar_api import make_event_id
+
+START = datetime(2025, 10, 6, 8, 0, tzinfo=ZoneInfo("Europe/Paris"))
+
+
+def test_make_event_id_is_stable_and_valid():
+    event_id = make_event_id("calendar@example.com", START)
+
+    assert event_id == make_event_id(
+        "calendar@example.com", START.astimezone(ZoneInfo("UTC"))
+    )
+    assert event_id != make_event_id("other@example.com", START)
+    assert event_id != make_event_id("calendar@example.com", START + timedelta(hours=1))
+    assert 5 <= len(event_id) <= 1024
+    assert set(event_id) <= set("0123456789abcdefghijklmnopqrstuv")
@@ -1,7 +1,8 @@
+from dataclasses import replace
 from datetime import datetime, timedelta
 from zoneinfo import ZoneInfo
 
-from pronote2calendar.change_detection import get_changes
+from pronote2calendar.change_detection import content_hash, fingerprint, get_changes
 from pronote2calendar.models import CalendarEvent, LessonEvent
 
 
@@ -122,3 +123,317 @@ def test_get_changes_remove_duplicate_events():
     assert changes.to_update == []
     removed = changes.to_remove[0]
     assert removed.id in ["e4", "e5"]
+
+
+def make_hashed_event(id, lesson: LessonEvent) -> CalendarEvent:
+    # Descriptions of hashed events are not downloaded from the calendar
+    return CalendarEvent(
+        id=id,
+        start=lesson.start,
+        end=lesson.end,
+        summary=lesson.summary,
+        location=lesson.location,
+        content_hash=content_hash(lesson),
+    )
+
+
+def test_content_hash_ignores_the_time_zone():
+    start = datetime(2025, 10, 5, 9, 0, tzinfo=ZoneInfo("Europe/Paris"))
+    event = LessonEvent(start, start + timedelta(hours=1), "Math", "Mrs. A", "R1")
+    utc = LessonEvent(
+        start.astimezone(ZoneInfo("UTC")),
+        event.end.astimezone(ZoneInfo("UTC")),
+        "Math",
+        "Mrs. A",
+        "R1",
+    )
+
+    assert content_hash(event) == content_hash(utc)
+    assert content_hash(event) != content_hash(
+        LessonEvent(start, event.end, "Math", "Mrs. B", "R1")
+    )
+
+
+def test_get_changes_compares_hashed_events_by_hash():
+    start = datetime(2025, 10, 5, 9, 0, tzinfo=ZoneInfo("Europe/Paris"))
+    new_event = LessonEvent(start, start + timedelta(hours=1), "Math", "Mrs. A", "R1")
+
+    changes = get_changes([new_event], [make_hashed_event("e1", new_event)])
+
+    assert changes.to_add == []
+    assert changes.to_remove == []
+    assert changes.to_update == []
+
+
+def test_get_changes_infers_description_changes_from_hash():
+    start = datetime(2025, 10, 5, 9, 0, tzinfo=ZoneInfo("Europe/Paris"))
+    end = start + timedelta(hours=1)
+    old_lesson = LessonEvent(start, end, "Math", "Mrs. A", "R1")
+    existing = make_hashed_event("e1", old_lesson)
+
+    described = get_changes(
+        [LessonEvent(start, end, "Math", "Mrs. B", "R1")], [existing]
+    )
+    moved = get_changes([LessonEvent(start, end, "Math", "Mrs. A", "R2")], [existing])
+
+    assert described.to_update[0].changes == {"description": (None, "Mrs. B")}
+    assert moved.to_update[0].changes == {"location": ("R1", "R2")}
+
+
+def test_get_changes_repairs_hashed_events_edited_in_the_calendar():
+    start = datetime(2025, 10, 5, 9, 0, tzinfo=ZoneInfo("Europe/Paris"))
+    end = start + timedelta(hours=1)
+    lesson = LessonEvent(start, end, "Math", "Mrs. A", "R1")
+    edited = replace(
+        make_hashed_event("e1", lesson),
+        summary="Edited",
+        location="R9",
+        end=end + timedelta(minutes=30),
+    )
+
+    changes = get_changes([lesson], [edited])
+
+    assert changes.to_add == []
+    assert changes.to_remove == []
+    assert changes.to_update[0].changes == {
+        "summary": ("Edited", "Math"),
+        "end": ((end + timedelta(minutes=30)).isoformat(), end.isoformat()),
+        "location": ("R9", "R1"),
+    }
+
+
+def test_get_changes_updates_a_moved_lesson():
+    start = datetime(2025, 10, 5, 9, 0, tzinfo=ZoneInfo("Europe/Paris"))
+    old_lesson = LessonEvent(start, start + timedelta(hours=1), "Math", "Mrs. A", "R1")
+    new_start = start + timedelta(days=1, hours=2)
+    new_lesson = LessonEvent(
+        new_start, new_start + timedelta(hours=1), "Math", "Mrs. A", "R1"
+    )
+
+    changes = get_changes([new_lesson], [make_hashed_event("e1", old_lesson)])
+
+    assert changes.to_add == []
+    assert changes.to_remove == []
+    (diff,) = changes.to_update
+    assert diff.id == "e1"
+    assert diff.new == new_lesson
+    assert set(diff.changes) == {"start", "end"}
+
+
+def test_get_changes_pairs_shifted_lessons_with_the_closest_event():
+    start = datetime(2025, 10, 5, 9, 0, tzinfo=ZoneInfo("Europe/Paris"))
+    existing = [
+        create_dummy_event(
+            f"e{hour}",
+            "Math",
+            start + timedelta(hours=hour),
+            start + timedelta(hours=hour, minutes=30),
+            "Mrs. A",
+            "R1",
+        )
+        for hour in range(3)
+    ]
+    # The whole morning starts twenty minutes later
+    shifted = [
+        LessonEvent(
+            event.start + timedelta(minutes=20),
+            event.end + timedelta(minutes=20),
+            "Math",
+            "Mrs. A",
+            "R1",
+        )
+        for event in existing
+    ]
+
+    changes = get_changes(shifted, existing)
+
+    assert changes.to_add == []
+    assert changes.to_remove == []
+    assert [(diff.id, diff.new) for diff in changes.to_update] == [
+        (event.id, lesson) for event, lesson in zip(existing, shifted, strict=True)
+    ]
+
+
+def test_get_changes_does_not_move_different_or_distant_lessons():
+    start = datetime(2025, 10, 5, 9, 0, tzinfo=ZoneInfo("Europe/Paris"))
+    end = start + timedelta(hours=1)
+    existing = [
+        create_dummy_event("math", "Math", start, end, "Mrs. A", "R1"),
+        create_dummy_event(
+            "physics", "Physics", end, end + timedelta(hours=1), "B", "R2"
+        ),
+    ]
+    new_events = [
+        LessonEvent(
+            start + timedelta(weeks=2), end + timedelta(weeks=2), "Math", "Mrs. A", "R1"
+        ),
+        LessonEvent(
+            start + timedelta(hours=3), end + timedelta(hours=3), "Physics", "C", "R2"
+        ),
+    ]
+
+    changes = get_changes(new_events, existing)
+
+    assert changes.to_add == new_events
+    assert [event.id for event in changes.to_remove] == ["math", "physics"]
+    assert changes.to_update == []
+
+
+def test_get_changes_matches_events_returned_in_another_time_zone():
+    paris = ZoneInfo("Europe/Paris")
+    # Lessons on both sides of the end of daylight saving time
+    lessons = [
+        LessonEvent(start, start + timedelta(hours=1), "Math", "Mrs. A", "R1")
+        for start in (
+            datetime(2025, 10, 24, 9, 0, tzinfo=paris),
+            datetime(2025, 10, 27, 9, 0, tzinfo=paris),
+        )
+    ]
+    new_york = ZoneInfo("America/New_York")
+    hashed = [
+        make_hashed_event(f"h{index}", lesson) for index, lesson in enumerate(lessons)
+    ]
+    for event in hashed:
+        event.start = event.start.astimezone(new_york)
+        event.end = event.end.astimezone(new_york)
+    legacy = [
+        create_dummy_event(
+            f"l{index}",
+            lesson.summary,
+            lesson.start.astimezone(ZoneInfo("UTC")),
+            lesson.end.astimezone(ZoneInfo("UTC")),
+            lesson.description,
+            lesson.location,
+        )
+        for index, lesson in enumerate(lessons)
+    ]
+
+    for existing in (hashed, legacy):
+        changes = get_changes(lessons, existing)
+
+        assert changes.to_add == []
+        assert changes.to_remove == []
+        assert changes.to_update == []
+
+
+def test_get_changes_does_not_report_unchanged_times_in_another_time_zone():
+    start = datetime(2025, 10, 5, 9, 0, tzinfo=ZoneInfo("Europe/Paris"))
+    end = start + timedelta(hours=1)
+    utc = ZoneInfo("UTC")
+    existing = create_dummy_event(
+        "e1", "Math", start.astimezone(utc), end.astimezone(utc), "Mrs. A", "R1"
+    )
+
+    changes = get_changes(
+        [LessonEvent(start, end, "English", "Mrs. A", "R1")], [existing]
+    )
+
+    assert changes.to_update[0].changes == {"summary": ("Math", "English")}
+
+
+def test_fingerprint_is_the_same_for_hashed_and_described_events():
+    start = datetime(2025, 10, 6, 8, 0, tzinfo=ZoneInfo("Europe/Paris"))
+    lesson = LessonEvent(start, start + timedelta(hours=1), "Math", "Mrs. A", "Room 1")
+    utc = ZoneInfo("UTC")
+    hashed = CalendarEvent(
+        "e1",
+        start.astimezone(utc),
+        (start + timedelta(hours=1)).astimezone(utc),
+        "Math",
+        location="Room 1",
+        content_hash=content_hash(lesson),
+    )
+    described = create_dummy_event(
+        "e2", "Math", start, start + timedelta(hours=1), "Mrs. A", "Room 1"
+    )
+
+    assert fingerprint(lesson) == fingerprint(hashed) == fingerprint(described)
+    assert len({fingerprint(lesson), fingerprint(hashed), fingerprint(described)}) == 1
+    assert fingerprint(lesson) != fingerprint(
+        create_dummy_event(
+            "e3", "Math", start, start + timedelta(hours=1), "Mr. B", "Room 1"
+        )
+    )
+
+
+SLOT = datetime(2025, 10, 6, 8, 0, tzinfo=ZoneInfo("Europe/Paris"))
+
+
+def written_event(id, summary="Math", description="Mrs. A", location="Room 1"):
+    """Calendar event as written for a lesson, with its content hash."""
+    lesson = LessonEvent(
+        SLOT, SLOT + timedelta(hours=1), summary, description, location
+    )
+    return CalendarEvent(
+        id,
+        SLOT,
+        SLOT + timedelta(hours=1),
+        summary,
+        location=location,
+        content_hash=content_hash(lesson),
+    )
+
+
+def count_operations(changes):
+    return len(changes.to_add) + len(changes.to_update) + len(changes.to_remove)
+
+
+def apply_in_memory(existing, changes):
+    removed = {event.id for event in changes.to_remove}
+    updated = {diff.id: diff.new for diff in changes.to_update}
+    return [
+        written_event(
+            event.id,
+            updated[event.id].summary,
+            updated[event.id].description,
+            updated[event.id].location,
+        )
+        if event.id in updated
+        else event
+        for event in existing
+        if event.id not in removed
+    ]
+
+
+def test_duplicates_keep_the_same_event_whatever_their_order():
+    lesson = LessonEvent(SLOT, SLOT + timedelta(hours=1), "Math", "Mrs. A", "Room 1")
+    duplicates = [written_event("e3"), written_event("e1"), written_event("e2")]
+
+    for existing in (duplicates, duplicates[::-1]):
+        changes = get_changes([lesson], existing)
+
+        assert count_operations(changes) == 2
+        assert {event.id for event in changes.to_remove} == {"e2", "e3"}
+        assert (
+            count_operations(get_changes([lesson], apply_in_memory(existing, changes)))
+            == 0
+        )
+
+
+def test_slot_keeps_the_unchanged_event_listed_after_a_stale_one():
+    lesson = LessonEvent(SLOT, SLOT + timedelta(hours=1), "Math", "Mrs. A", "Room 1")
+    existing = [written_event("e1", "English"), written_event("e2")]
+
+    changes = get_changes([lesson], existing)
+
+    assert count_operations(changes) == 1
+    assert [event.id for event in changes.to_remove] == ["e1"]
+
+
+def test_slot_updates_the_event_needing_the_fewest_changes():
+    lesson = LessonEvent(SLOT, SLOT + timedelta(hours=1), "Math", "Mrs. A", "Room 1")
+    existing = [
+        written_event("e1", "English", "Mr. B", "Room 2"),
+        written_event("e2", location="Room 2"),
+    ]
+
+    changes = get_changes([lesson], existing)
+
+    assert count_operations(changes) == 2
+    (update,) = changes.to_update
+    assert update.id == "e2"
+    assert update.changes == {"location": ("Room 2", "Room 1")}
+    assert [event.id for event in changes.to_remove] == ["e1"]
+    assert (
+        count_operations(get_changes([lesson], apply_in_memory(existing, changes))) == 0
+    )
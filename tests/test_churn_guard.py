@@ -0,0 +1,146 @@
+from datetime import datetime, timedelta
+from zoneinfo import ZoneInfo
+
+import pytest
+
+from pronote2calendar.churn_guard import ChurnGuard, ChurnGuardError
+from pronote2calendar.models import CalendarEvent, ChangeSet, LessonEvent
+from pronote2calendar.settings import ChurnGuardSettings
+
+START = datetime(2025, 10, 6, tzinfo=ZoneInfo("Europe/Paris"))
+CALENDAR_ID = "calendar@example.com"
+
+
+def window(start, weeks=3):
+    return start, start + timedelta(weeks=weeks)
+
+
+def lessons(count):
+    return [
+        LessonEvent(
+            START + timedelta(hours=i),
+            START + timedelta(hours=i + 1),
+            "Math",
+            "Mrs. A",
+            "Room 1",
+        )
+        for i in range(count)
+    ]
+
+
+def calendar_events(count):
+    return [
+        CalendarEvent(
+            f"e{i}", START + timedelta(hours=i), START + timedelta(hours=i + 1), "Math"
+        )
+        for i in range(count)
+    ]
+
+
+def test_remove_ratio_is_checked_against_existing_events():
+    guard = ChurnGuard(ChurnGuardSettings(max_remove_ratio=0.5), CALENDAR_ID)
+
+    assert (
+        guard.check(ChangeSet([], [], calendar_events(10)), 20, *window(START)) is None
+    )
+    assert (
+        guard.check(ChangeSet([], [], calendar_events(11)), 20, *window(START))
+        == "max_remove_ratio"
+    )
+
+
+def test_small_calendars_are_not_checked():
+    guard = ChurnGuard(
+        ChurnGuardSettings(max_remove_ratio=0.5, min_events=10), CALENDAR_ID
+    )
+
+    assert guard.check(ChangeSet([], [], calendar_events(9)), 9, *window(START)) is None
+
+
+def test_add_ratio_is_checked_against_previous_run(tmp_path):
+    config = ChurnGuardSettings(max_add_ratio=0.5, state_file=tmp_path / "state.json")
+    guard = ChurnGuard(config, CALENDAR_ID)
+    changes = ChangeSet(lessons(40), [], [])
+
+    assert guard.check(changes, 0, *window(START)) is None
+
+    guard.record(40, *window(START))
+
+    next_week = START + timedelta(weeks=1)
+    assert guard.check(changes, 0, *window(next_week)) == "max_add_ratio"
+    assert guard.check(ChangeSet(lessons(20), [], []), 0, *window(START)) is None
+    # Events are only re-added to an empty calendar
+    assert guard.check(changes, 1, *window(START)) is None
+
+
+def test_previous_run_is_ignored_when_its_window_ended(tmp_path):
+    config = ChurnGuardSettings(max_add_ratio=0.5, state_file=tmp_path / "state.json")
+    guard = ChurnGuard(config, CALENDAR_ID)
+    guard.record(40, *window(START, weeks=1))
+
+    next_week = START + timedelta(weeks=1)
+    assert guard.previous_count(*window(next_week, weeks=1)) is None
+    assert (
+        guard.check(ChangeSet(lessons(40), [], []), 0, *window(next_week, weeks=1))
+        is None
+    )
+
+
+def test_previous_runs_are_compared_by_window_length(tmp_path):
+    config = ChurnGuardSettings(max_add_ratio=0.5, state_file=tmp_path / "state.json")
+    guard = ChurnGuard(config, CALENDAR_ID)
+    guard.record(40, *window(START))
+
+    assert guard.previous_count(*window(START, weeks=1)) is None
+
+    guard.record(10, *window(START, weeks=1))
+
+    assert guard.previous_count(*window(START)) == 40
+    assert guard.previous_count(*window(START, weeks=1)) == 10
+
+
+def test_previous_run_of_another_calendar_is_ignored(tmp_path):
+    config = ChurnGuardSettings(max_add_ratio=0.5, state_file=tmp_path / "state.json")
+    ChurnGuard(config, "other@example.com").record(40, *window(START))
+
+    assert ChurnGuard(config, CALENDAR_ID).previous_count(*window(START)) is None
+
+
+def test_malformed_previous_runs_are_ignored(tmp_path):
+    state_file = tmp_path / "state.json"
+    config = ChurnGuardSettings(max_add_ratio=0.5, state_file=state_file)
+    guard = ChurnGuard(config, CALENDAR_ID)
+    key = str(int(timedelta(weeks=3).total_seconds()))
+
+    for windows in [
+        f'{{"{key}": {{"event_count": 40}}}}',
+        f'{{"{key}": {{"end": "garbage", "event_count": 40}}}}',
+        f'{{"{key}": {{"end": "2025-10-27T00:00:00", "event_count": 40}}}}',
+        f'{{"{key}": {{"end": "2025-10-27T00:00:00+01:00", "event_count": "40"}}}}',
+        f'{{"{key}": 40}}',
+        "[]",
+    ]:
+        state_file.write_text(
+            f'{{"calendar_id": "{CALENDAR_ID}", "windows": {windows}}}'
+        )
+        assert guard.previous_count(*window(START)) is None
+        assert guard.check(ChangeSet(lessons(40), [], []), 0, *window(START)) is None
+
+    guard.record(40, *window(START))
+    assert guard.previous_count(*window(START)) == 40
+
+
+def test_abort_raises_and_read_only_refuses(caplog):
+    changes = ChangeSet([], [], calendar_events(20))
+
+    with pytest.raises(ChurnGuardError, match="limit=0.5 observed=1.00"):
+        ChurnGuard(ChurnGuardSettings(max_remove_ratio=0.5), CALENDAR_ID).allows(
+            changes, 20, *window(START)
+        )
+
+    guard = ChurnGuard(
+        ChurnGuardSettings(max_remove_ratio=0.5, action="read_only"), CALENDAR_ID
+    )
+    assert not guard.allows(changes, 20, *window(START))
+    assert "reason=max_remove_ratio add=0 remove=20 existing=20" in caplog.text
+    assert guard.allows(ChangeSet([], [], []), 20, *window(START))
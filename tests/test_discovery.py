@@ -0,0 +1,94 @@
+import json
+
+from googleapiclient import discovery_cache  # type: ignore
+from googleapiclient.discovery import build_from_document  # type: ignore
+
+from pronote2calendar import discovery
+from pronote2calendar.discovery import (
+    compact_discovery_document,
+    load_discovery_document,
+)
+
+
+def static_document():
+    return json.loads(discovery_cache.get_static_doc("calendar", "v3"))
+
+
+def test_compact_document_keeps_only_events_resource():
+    compact = compact_discovery_document(static_document())
+
+    assert list(compact["resources"]) == ["events"]
+    assert {"list", "insert", "patch", "delete"} <= set(
+        compact["resources"]["events"]["methods"]
+    )
+    assert "Event" in compact["schemas"]
+    assert "CalendarListEntry" not in compact["schemas"]
+
+
+def test_compact_document_strips_descriptions_but_not_properties():
+    compact = compact_discovery_document(static_document())
+
+    assert "description" not in compact
+    assert "description" not in compact["resources"]["events"]["methods"]["list"]
+    event_properties = compact["schemas"]["Event"]["properties"]
+    assert event_properties["description"] == {"type": "string"}
+
+
+def test_compact_document_builds_a_working_service():
+    service = build_from_document(
+        compact_discovery_document(static_document()), developerKey="key"
+    )
+
+    request = service.events().list(calendarId="calendar@example.com", maxResults=5)
+
+    assert request.uri.startswith(
+        "https://www.googleapis.com/calendar/v3/calendars/calendar%40example.com/events"
+    )
+    assert "maxResults=5" in request.uri
+
+
+def test_load_discovery_document_writes_then_reuses_cache(tmp_path, monkeypatch):
+    cache_file = tmp_path / "discovery.json"
+    calls = []
+    original = discovery.discovery_cache.get_static_doc
+
+    def get_static_doc(name, version):
+        calls.append((name, version))
+        return original(name, version)
+
+    monkeypatch.setattr(discovery.discovery_cache, "get_static_doc", get_static_doc)
+
+    first = load_discovery_document(cache_file)
+    second = load_discovery_document(cache_file)
+
+    assert calls == [("calendar", "v3")]
+    assert first == second
+    assert cache_file.exists()
+
+
+def test_load_discovery_document_rebuilds_corrupted_cache(tmp_path):
+    cache_file = tmp_path / "discovery.json"
+    cache_file.write_text("{not json")
+
+    document = load_discovery_document(cache_file)
+
+    assert list(document["resources"]) == ["events"]
+    assert json.loads(cache_file.read_text())["document"] == document
+
+
+def test_load_discovery_document_rebuilds_cache_of_other_library_version(
+    tmp_path, monkeypatch
+):
+    cache_file = tmp_path / "discovery.json"
+    load_discovery_document(cache_file)
+    monkeypatch.setattr(discovery, "LIBRARY_VERSION", "0.0.1")
+
+    document = load_discovery_document(cache_file)
+
+    assert list(document["resources"]) == ["events"]
+    assert json.loads(cache_file.read_text())["library_version"] == "0.0.1"
+
+    # Caches written before the version was stored are rebuilt too
+    cache_file.write_text(json.dumps(document))
+    assert load_discovery_document(cache_file) == document
+    assert json.loads(cache_file.read_text())["library_version"] == "0.0.1"
@@ -0,0 +1,126 @@
+import sqlite3
+from datetime import datetime, timedelta
+from zoneinfo import ZoneInfo
+
+import pytest
+
+from pronote2calendar.event_mirror import EventMirror
+from pronote2calendar.models import ApplyResult, CalendarEvent, LessonEvent
+
+START = datetime(2025, 10, 6, 0, 0, tzinfo=ZoneInfo("Europe/Paris"))
+END = START + timedelta(weeks=1)
+
+
+def make_event(event_id, start, summary="Math"):
+    return CalendarEvent(
+        id=event_id,
+        start=start,
+        end=start + timedelta(hours=1),
+        summary=summary,
+        description="Mrs. A",
+        location="Room 1",
+        etag='"1"',
+        updated=datetime(2025, 10, 1, tzinfo=ZoneInfo("UTC")),
+        content_hash="0123456789abcdef",
+    )
+
+
+@pytest.fixture
+def mirror(tmp_path):
+    mirror = EventMirror(tmp_path / "mirror.sqlite", "calendar@example.com")
+    yield mirror
+    mirror.close()
+
+
+def test_new_mirror_needs_verification(mirror):
+    assert mirror.needs_verification(timedelta(hours=24), START, END)
+    assert mirror.get_events(START, END) == []
+
+
+def test_replace_stores_events_and_marks_mirror_verified(mirror):
+    events = [make_event("e1", START + timedelta(hours=8))]
+
+    mirror.replace(START, END, events, now=START)
+
+    assert mirror.get_events(START, END) == events
+    assert not mirror.needs_verification(timedelta(hours=24), START, END, now=START)
+    assert mirror.needs_verification(
+        timedelta(hours=24), START, END, now=START + timedelta(hours=24)
+    )
+
+
+def test_replace_only_verifies_the_window(mirror):
+    mirror.replace(START, END + timedelta(weeks=1), [], now=START)
+    mirror.replace(END, END + timedelta(weeks=1), [], now=START)
+
+    max_age = timedelta(hours=24)
+    assert not mirror.needs_verification(max_age, END, END + timedelta(weeks=1), START)
+    assert mirror.needs_verification(max_age, START, END, now=START)
+
+
+def test_replace_only_touches_the_window(mirror):
+    inside = make_event("inside", START + timedelta(hours=8))
+    outside = make_event("outside", END + timedelta(hours=8))
+    mirror.replace(START, END + timedelta(weeks=1), [inside, outside])
+
+    mirror.replace(START, END, [])
+
+    assert mirror.get_events(START, END + timedelta(weeks=1)) == [outside]
+
+
+def test_get_events_compares_instants_across_offsets(mirror):
+    event = make_event("e1", datetime(2025, 10, 6, 6, 0, tzinfo=ZoneInfo("UTC")))
+    mirror.replace(START, END, [event])
+
+    # The event ends at 09:00 in Paris
+    paris = ZoneInfo("Europe/Paris")
+    assert mirror.get_events(datetime(2025, 10, 6, 8, 59, tzinfo=paris), END) == [event]
+    assert mirror.get_events(datetime(2025, 10, 6, 9, 0, tzinfo=paris), END) == []
+
+
+def test_apply_records_written_events(mirror):
+    kept = make_event("kept", START + timedelta(hours=8))
+    removed = make_event("removed", START + timedelta(hours=9))
+    mirror.replace(START, END, [kept, removed], now=START)
+    added = make_event("added", START + timedelta(hours=10))
+    updated = make_event("kept", START + timedelta(hours=8), summary="English")
+
+    mirror.apply(ApplyResult(added=[added], updated=[updated], removed=[removed]))
+
+    assert mirror.get_events(START, END) == [updated, added]
+    assert not mirror.needs_verification(timedelta(hours=24), START, END, now=START)
+
+
+def test_apply_with_failures_forces_verification(mirror):
+    mirror.replace(START, END, [], now=START)
+    failed = LessonEvent(START, START + timedelta(hours=1), "Math", None, None)
+
+    mirror.apply(ApplyResult(failed=[failed]))
+
+    assert mirror.needs_verification(timedelta(hours=24), START, END, now=START)
+
+
+def test_mirror_is_scoped_by_calendar(tmp_path):
+    path = tmp_path / "mirror.sqlite"
+    first = EventMirror(path, "first@example.com")
+    first.replace(START, END, [make_event("e1", START + timedelta(hours=8))])
+    first.close()
+
+    second = EventMirror(path, "second@example.com")
+
+    assert second.get_events(START, END) == []
+    assert second.needs_verification(timedelta(hours=24), START, END)
+    second.close()
+
+
+def test_mirror_with_an_old_schema_is_rebuilt(tmp_path):
+    path = tmp_path / "mirror.sqlite"
+    connection = sqlite3.connect(path)
+    connection.execute("CREATE TABLE events (calendar_id TEXT, id TEXT)")
+    connection.close()
+
+    mirror = EventMirror(path, "calendar@example.com")
+    mirror.replace(START, END, [make_event("e1", START)], now=START)
+
+    assert [event.id for event in mirror.get_events(START, END)] == ["e1"]
+    mirror.close()
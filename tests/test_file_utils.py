@@ -0,0 +1,45 @@
+import json
+import os
+
+import pytest
+
+from pronote2calendar.file_utils import stat_private, write_json
+
+
+def test_write_json_replaces_the_file(tmp_path):
+    path = tmp_path / "state.json"
+    path.write_text("previous")
+
+    write_json(path, {"key": "é"}, ensure_ascii=False)
+
+    assert json.loads(path.read_text()) == {"key": "é"}
+    assert os.listdir(tmp_path) == ["state.json"]
+
+
+def test_write_json_keeps_the_file_when_interrupted(tmp_path):
+    path = tmp_path / "state.json"
+    write_json(path, {"key": "value"})
+
+    with pytest.raises(TypeError):
+        write_json(path, {"key": object()})
+
+    assert json.loads(path.read_text()) == {"key": "value"}
+
+
+def test_private_files_are_readable_by_their_owner_only(tmp_path):
+    path = tmp_path / "session.json"
+    path.write_text("{}")
+    os.chmod(path, 0o644)
+    (tmp_path / "session.json.tmp").touch(mode=0o644)
+
+    assert stat_private(path, "session") is None
+
+    write_json(path, {}, private=True)
+
+    assert os.stat(path).st_mode & 0o777 == 0o600
+    assert stat_private(path, "session") == os.stat(path)
+
+
+def test_stat_private_raises_for_missing_files(tmp_path):
+    with pytest.raises(FileNotFoundError):
+        stat_private(tmp_path / "session.json", "session")
@@ -0,0 +1,785 @@
+import json
+import threading
+from datetime import datetime, timedelta
+from zoneinfo import ZoneInfo
+
+import pytest
+from googleapiclient.errors import HttpError  # type: ignore
+from httplib2 import Response  # type: ignore
+
+from pronote2calendar.calendar_api import make_event_id
+from pronote2calendar.calendar_sync_state import STATE_VERSION
+from pronote2calendar.change_detection import content_hash
+from pronote2calendar.google_calendar_client import GoogleCalendarClient
+from pronote2calendar.models import CalendarEvent, ChangeSet, LessonEvent, UpdateDiff
+from pronote2calendar.retry import RetryPolicy
+
+
+class FakeRequest:
+    def __init__(self, service, method, kwargs):
+        self.service = service
+        self.method = method
+        self.kwargs = kwargs
+        self.headers = {}
+
+    def execute(self):
+        return self.service.handle(self)
+
+
+class FakeEvents:
+    def __init__(self, service):
+        self.service = service
+
+    def insert(self, **kwargs):
+        return FakeRequest(self.service, "insert", kwargs)
+
+    def patch(self, **kwargs):
+        return FakeRequest(self.service, "patch", kwargs)
+
+    def delete(self, **kwargs):
+        return FakeRequest(self.service, "delete", kwargs)
+
+    def list(self, **kwargs):
+        return FakeRequest(self.service, "list", kwargs)
+
+    def get(self, **kwargs):
+        return FakeRequest(self.service, "get", kwargs)
+
+    def update(self, **kwargs):
+        return FakeRequest(self.service, "update", kwargs)
+
+
+class FakeBatch:
+    def __init__(self, service, callback):
+        self.service = service
+        self.callback = callback
+        self.requests = []
+
+    def add(self, request, request_id=None):
+        self.requests.append((request_id, request))
+
+    def execute(self):
+        self.service.batches.append(len(self.requests))
+        for request_id, request in self.requests:
+            try:
+                response = request.execute()
+            except HttpError as error:
+                self.callback(request_id, None, error)
+            else:
+                self.callback(request_id, response, None)
+
+
+class FakeService:
+    def __init__(
+        self, fail_ids=(), pages=None, transient_errors=None, stored=None, etags=None
+    ):
+        self.calls = []
+        self.requests = []
+        self.etags = etags or {}
+        self.batches = []
+        self.fail_ids = set(fail_ids)
+        self.transient_errors = transient_errors or []
+        self.pages = pages or {}
+        self.stored = stored or {}
+        self.next_id = 0
+
+    def events(self):
+        return FakeEvents(self)
+
+    def new_batch_http_request(self, callback=None):
+        return FakeBatch(self, callback)
+
+    def handle(self, request):
+        self.calls.append((request.method, request.kwargs))
+        self.requests.append(request)
+        if self.transient_errors:
+            raise HttpError(Response({"status": self.transient_errors.pop(0)}), b"")
+        if request.kwargs.get("eventId") in self.fail_ids:
+            raise HttpError(Response({"status": 404}), b"Not Found")
+        if_match = request.headers.get("If-Match")
+        if if_match and if_match != self.etags.get(request.kwargs["eventId"]):
+            raise HttpError(Response({"status": 412}), b"Precondition Failed")
+        if request.method == "list":
+            return self.pages[request.kwargs.get("pageToken")]
+        if request.method == "insert":
+            body = request.kwargs["body"]
+            if "id" not in body:
+                self.next_id += 1
+                body = {**body, "id": f"new{self.next_id}"}
+            if body["id"] in self.stored:
+                raise HttpError(Response({"status": 409}), b"Conflict")
+            self.stored[body["id"]] = body
+            return {"id": body["id"]}
+        if request.method == "get":
+            if request.kwargs["eventId"] not in self.stored:
+                raise HttpError(Response({"status": 404}), b"Not Found")
+            return self.stored[request.kwargs["eventId"]]
+        if request.method == "update":
+            self.stored[request.kwargs["eventId"]] = request.kwargs["body"]
+        if request.method == "delete":
+            self.stored[request.kwargs["eventId"]] = {"status": "cancelled"}
+            return ""
+        return {"id": request.kwargs["eventId"]}
+
+
+def make_client(
+    service,
+    batch_size=50,
+    page_size=250,
+    sync_state_file=None,
+    concurrency=1,
+    rate_limiter=None,
+    service_factory=None,
+    credentials=None,
+    token_cache_file=None,
+):
+    client = GoogleCalendarClient.__new__(GoogleCalendarClient)
+    client.credentials = credentials
+    client.token_cache_file = token_cache_file
+    client._token_lock = threading.Lock()
+    client.service = service
+    client.service_factory = service_factory
+    client.concurrency = concurrency
+    client.rate_limiter = rate_limiter
+    client.retry_policy = RetryPolicy(sleep=lambda seconds: None)
+    client._thread_local = threading.local()
+    client.calendar_id = "calendar@example.com"
+    client.batch_size = batch_size
+    client.page_size = page_size
+    client.sync_state_file = sync_state_file
+    client._sync_state = None
+    return client
+
+
+def make_lesson_event(start, summary="Math"):
+    return LessonEvent(
+        start=start,
+        end=start + timedelta(hours=1),
+        summary=summary,
+        description="Mrs. A",
+        location="Room 1",
+    )
+
+
+def make_calendar_event(event_id, start, summary="Math"):
+    return CalendarEvent(
+        id=event_id,
+        start=start,
+        end=start + timedelta(hours=1),
+        summary=summary,
+        description="Mrs. A",
+        location="Room 1",
+    )
+
+
+START = datetime(2025, 10, 6, 8, 0, tzinfo=ZoneInfo("Europe/Paris"))
+
+
+def test_apply_changes_groups_requests_into_batches():
+    service = FakeService()
+    client = make_client(service, batch_size=2)
+    changes = ChangeSet(
+        [make_lesson_event(START + timedelta(hours=i)) for i in range(3)],
+        [],
+        [
+            make_calendar_event(f"old{i}", START + timedelta(days=1, hours=i))
+            for i in range(2)
+        ],
+    )
+
+    result = client.apply_changes(changes)
+
+    assert service.batches == [2, 2, 1]
+    assert [method for method, _ in service.calls] == [
+        "insert",
+        "insert",
+        "insert",
+        "delete",
+        "delete",
+    ]
+    assert [event.id for event in result.added] == [
+        make_event_id("calendar@example.com", START + timedelta(hours=i))
+        for i in range(3)
+    ]
+    assert [event.id for event in result.removed] == ["old0", "old1"]
+    assert result.failed == []
+
+
+class RecordingJournal:
+    def __init__(self):
+        self.begun = None
+        self.records = []
+
+    def begin(self, changes):
+        self.begun = changes
+
+    def record(self, result):
+        self.records.append(
+            (len(result.added), len(result.updated), len(result.removed))
+        )
+
+
+@pytest.mark.parametrize("concurrency", [1, 2])
+def test_apply_changes_journals_each_batch(concurrency):
+    service = FakeService(fail_ids={"old1"})
+    client = make_client(
+        service, batch_size=2, concurrency=concurrency, service_factory=lambda: service
+    )
+    adds = [make_lesson_event(START + timedelta(hours=i)) for i in range(3)]
+    removes = [make_calendar_event(f"old{i}", START) for i in range(2)]
+    changes = ChangeSet(adds, [], removes)
+    journal = RecordingJournal()
+
+    client.apply_changes(changes, journal)
+
+    assert journal.begun is changes
+    # The failed removal is not journaled
+    assert journal.records == [(2, 0, 0), (1, 0, 1), (0, 0, 0)]
+
+
+def test_apply_changes_reports_partial_failures_per_event():
+    service = FakeService(fail_ids={"missing"})
+    client = make_client(service)
+    old = make_calendar_event("e1", START, summary="Old")
+    new = make_lesson_event(START)
+    update = UpdateDiff(id="e1", old=old, new=new, changes={})
+    missing = make_calendar_event("missing", START + timedelta(hours=2))
+
+    result = client.apply_changes(ChangeSet([], [update], [missing]))
+
+    assert [event.id for event in result.updated] == ["e1"]
+    assert result.updated[0].summary == "Math"
+    assert result.removed == []
+    assert result.failed == [missing]
+
+
+def test_apply_changes_sends_source_marker_and_content_hash():
+    service = FakeService()
+    client = make_client(service)
+    event = make_lesson_event(START)
+    update = UpdateDiff(
+        id="e1", old=make_calendar_event("e1", START), new=event, changes={}
+    )
+
+    result = client.apply_changes(ChangeSet([event], [update], []))
+
+    (_, insert_kwargs), (_, patch_kwargs) = service.calls
+    expected = {"private": {"source": "pronote2calendar", "hash": content_hash(event)}}
+    assert insert_kwargs["body"]["extendedProperties"] == expected
+    assert patch_kwargs["body"]["extendedProperties"] == expected
+    assert "reminders" not in patch_kwargs["body"]
+    assert patch_kwargs["eventId"] == "e1"
+    assert result.added[0].content_hash == content_hash(event)
+    assert result.updated[0].content_hash == content_hash(event)
+
+
+def test_update_patches_only_changed_fields_if_unmodified():
+    service = FakeService(etags={"e1": '"1"'})
+    client = make_client(service)
+    old = make_calendar_event("e1", START)
+    old.etag = '"1"'
+    new = make_lesson_event(START, summary="English")
+    update = UpdateDiff(
+        id="e1", old=old, new=new, changes={"summary": ("Math", "English")}
+    )
+
+    result = client.apply_changes(ChangeSet([], [update], []))
+
+    assert result.updated[0].summary == "English"
+    (request,) = service.requests
+    assert request.headers["If-Match"] == '"1"'
+    assert request.kwargs["body"] == {
+        "summary": "English",
+        "extendedProperties": {
+            "private": {"source": "pronote2calendar", "hash": content_hash(new)}
+        },
+    }
+
+
+def test_update_of_an_event_modified_since_it_was_read_fails():
+    service = FakeService(etags={"e1": '"2"'})
+    client = make_client(service)
+    old = make_calendar_event("e1", START)
+    old.etag = '"1"'
+    update = UpdateDiff(
+        id="e1",
+        old=old,
+        new=make_lesson_event(START + timedelta(hours=1)),
+        changes={"start": (None, None), "end": (None, None)},
+    )
+
+    result = client.apply_changes(ChangeSet([], [update], []))
+
+    assert result.failed == [update]
+    assert set(service.calls[0][1]["body"]) == {"start", "end", "extendedProperties"}
+
+
+def event_dict(event_id, start, **extra):
+    return {
+        "id": event_id,
+        "start": {"dateTime": start.isoformat()},
+        "end": {"dateTime": (start + timedelta(hours=1)).isoformat()},
+        "summary": "Math",
+        **extra,
+    }
+
+
+def managed_event_dict(event_id, start, content_hash="0123456789abcdef"):
+    private = {"source": "pronote2calendar"}
+    if content_hash is not None:
+        private["hash"] = content_hash
+    return event_dict(event_id, start, extendedProperties={"private": private})
+
+
+class DescribingService(FakeService):
+    """Returns descriptions only when the list fields ask for them."""
+
+    def __init__(self, items):
+        super().__init__()
+        self.items = items
+
+    def handle(self, request):
+        self.calls.append((request.method, request.kwargs))
+        described = "description" in request.kwargs["fields"]
+        return {
+            "items": [
+                {
+                    key: value
+                    for key, value in item.items()
+                    if described or key != "description"
+                }
+                for item in self.items
+            ]
+        }
+
+
+def test_get_events_fetches_descriptions_of_unhashed_events():
+    service = DescribingService(
+        [
+            managed_event_dict("e1", START),
+            {**managed_event_dict("e2", START, content_hash=None), "description": "A"},
+        ]
+    )
+    client = make_client(service)
+
+    events = client.get_events(START, START + timedelta(weeks=1))
+
+    assert [(event.id, event.description) for event in events] == [
+        ("e1", None),
+        ("e2", "A"),
+    ]
+    assert len(service.calls) == 2
+
+
+def test_get_events_lists_hashed_events_once():
+    service = DescribingService([managed_event_dict("e1", START)])
+    client = make_client(service)
+
+    client.get_events(START, START + timedelta(weeks=1))
+
+    assert len(service.calls) == 1
+
+
+class SyncingService(FakeService):
+    def __init__(self, responses):
+        super().__init__()
+        self.responses = responses
+
+    def handle(self, request):
+        self.calls.append((request.method, request.kwargs))
+        response = self.responses[request.kwargs.get("syncToken")]
+        if isinstance(response, Exception):
+            raise response
+        return response
+
+
+def test_get_events_follows_next_page_token():
+    service = FakeService(
+        pages={
+            None: {
+                "items": [
+                    managed_event_dict("e1", START),
+                    managed_event_dict("e2", START),
+                ],
+                "nextPageToken": "page2",
+            },
+            "page2": {"items": [managed_event_dict("e3", START)]},
+        }
+    )
+    client = make_client(service, page_size=2)
+
+    events = client.get_events(START, START + timedelta(weeks=1))
+
+    assert [event.id for event in events] == ["e1", "e2", "e3"]
+    assert [kwargs["pageToken"] for _, kwargs in service.calls] == [None, "page2"]
+    assert all(kwargs["maxResults"] == 2 for _, kwargs in service.calls)
+
+
+def test_iter_events_converts_pages_lazily():
+    service = FakeService(
+        pages={
+            None: {"items": [event_dict("e1", START)], "nextPageToken": "page2"},
+            "page2": {"items": [event_dict("e2", START)]},
+        }
+    )
+    client = make_client(service)
+
+    events = client.iter_events(START, START + timedelta(weeks=1))
+
+    assert next(events).id == "e1"
+    assert len(service.calls) == 1
+    assert next(events).id == "e2"
+    assert len(service.calls) == 2
+
+
+def test_incremental_get_events_performs_full_sync_first(tmp_path):
+    state_file = tmp_path / "sync-state.json"
+    service = SyncingService(
+        {
+            None: {
+                "items": [
+                    managed_event_dict("e1", START),
+                    managed_event_dict("past", START - timedelta(weeks=2)),
+                    event_dict("unmanaged", START),
+                ],
+                "nextSyncToken": "token1",
+            }
+        }
+    )
+    client = make_client(service, sync_state_file=state_file)
+
+    events = client.get_events(START, START + timedelta(weeks=1))
+
+    assert [event.id for event in events] == ["e1"]
+    (_, kwargs) = service.calls[0]
+    assert "timeMin" not in kwargs
+    assert "syncToken" not in kwargs
+    state = json.loads(state_file.read_text())
+    assert state["sync_token"] == "token1"
+    assert list(state["events"]) == ["e1"]
+
+
+def test_incremental_get_events_applies_deltas(tmp_path):
+    state_file = tmp_path / "sync-state.json"
+    service = SyncingService(
+        {
+            None: {
+                "items": [
+                    managed_event_dict("e1", START),
+                    managed_event_dict("e2", START + timedelta(hours=1)),
+                ],
+                "nextSyncToken": "token1",
+            },
+            "token1": {
+                "items": [
+                    {"id": "e1", "status": "cancelled"},
+                    managed_event_dict("e3", START + timedelta(hours=2)),
+                ],
+                "nextSyncToken": "token2",
+            },
+        }
+    )
+    client = make_client(service, sync_state_file=state_file)
+    client.get_events(START, START + timedelta(weeks=1))
+
+    events = client.get_events(START, START + timedelta(weeks=1))
+
+    assert [event.id for event in events] == ["e2", "e3"]
+    assert service.calls[-1][1]["syncToken"] == "token1"
+    assert json.loads(state_file.read_text())["sync_token"] == "token2"
+
+
+def test_incremental_get_events_falls_back_to_full_sync_on_gone(tmp_path):
+    state_file = tmp_path / "sync-state.json"
+    state_file.write_text(
+        json.dumps(
+            {
+                "version": STATE_VERSION,
+                "calendar_id": "calendar@example.com",
+                "sync_token": "expired",
+                "events": {"stale": managed_event_dict("stale", START)},
+            }
+        )
+    )
+    service = SyncingService(
+        {
+            "expired": HttpError(Response({"status": 410}), b"Gone"),
+            None: {"items": [managed_event_dict("e1", START)], "nextSyncToken": "t"},
+        }
+    )
+    client = make_client(service, sync_state_file=state_file)
+
+    events = client.get_events(START, START + timedelta(weeks=1))
+
+    assert [event.id for event in events] == ["e1"]
+    assert [kwargs.get("syncToken") for _, kwargs in service.calls] == ["expired", None]
+    assert json.loads(state_file.read_text())["sync_token"] == "t"
+
+
+def test_incremental_get_events_can_defer_saving_the_state(tmp_path):
+    state_file = tmp_path / "sync-state.json"
+    service = SyncingService(
+        {None: {"items": [managed_event_dict("e1", START)], "nextSyncToken": "t"}}
+    )
+    client = make_client(service, sync_state_file=state_file)
+
+    events = client.get_events(START, START + timedelta(weeks=1), save_state=False)
+
+    assert [event.id for event in events] == ["e1"]
+    assert not state_file.exists()
+    client.save_sync_state()
+    assert json.loads(state_file.read_text())["sync_token"] == "t"
+
+
+def test_incremental_get_events_keeps_the_events_of_the_sync_period(tmp_path):
+    near = managed_event_dict("near", START)
+    far = managed_event_dict("far", START + timedelta(weeks=2))
+    service = SyncingService(
+        {
+            None: {"items": [near, far], "nextSyncToken": "token1"},
+            "token1": {"items": [], "nextSyncToken": "token2"},
+        }
+    )
+    client = make_client(service, sync_state_file=tmp_path / "sync-state.json")
+
+    far_events = client.get_events(
+        START + timedelta(weeks=1), START + timedelta(weeks=3), prune_before=START
+    )
+    near_events = client.get_events(START, START + timedelta(weeks=1))
+
+    assert [event.id for event in far_events] == ["far"]
+    assert [event.id for event in near_events] == ["near"]
+
+
+class CountingLimiter:
+    def __init__(self):
+        self.acquired = 0
+
+    def acquire(self):
+        self.acquired += 1
+
+
+def test_apply_changes_concurrently_uses_one_service_per_thread():
+    services = []
+
+    def service_factory():
+        service = FakeService()
+        services.append(service)
+        return service
+
+    limiter = CountingLimiter()
+    client = make_client(
+        None, concurrency=3, rate_limiter=limiter, service_factory=service_factory
+    )
+    adds = [make_lesson_event(START + timedelta(hours=i)) for i in range(10)]
+    removes = [make_calendar_event(f"old{i}", START) for i in range(5)]
+
+    result = client.apply_changes(ChangeSet(adds, [], removes))
+
+    assert 1 <= len(services) <= 3
+    assert sum(len(service.calls) for service in services) == 15
+    assert all(service.batches == [] for service in services)
+    assert [event.start for event in result.added] == [event.start for event in adds]
+    assert [event.id for event in result.removed] == [e.id for e in removes]
+    assert limiter.acquired == 15
+
+
+def test_apply_changes_in_batches_is_rate_limited():
+    limiter = CountingLimiter()
+    client = make_client(FakeService(), batch_size=2, rate_limiter=limiter)
+
+    client.apply_changes(
+        ChangeSet(
+            [make_lesson_event(START + timedelta(hours=i)) for i in range(3)], [], []
+        )
+    )
+
+    assert limiter.acquired == 3
+
+
+def test_apply_changes_retries_rate_limited_batch_requests():
+    service = FakeService(transient_errors=[429])
+    client = make_client(service)
+    adds = [make_lesson_event(START + timedelta(hours=i)) for i in range(3)]
+
+    result = client.apply_changes(ChangeSet(adds, [], []))
+
+    assert service.batches == [3, 1]
+    assert len(result.added) == 3
+    assert result.failed == []
+
+
+def test_apply_changes_counts_requests_failing_after_retries():
+    service = FakeService(transient_errors=[503] * 10)
+    client = make_client(service)
+    client.retry_policy = RetryPolicy(max_retries=2, sleep=lambda seconds: None)
+
+    result = client.apply_changes(ChangeSet([make_lesson_event(START)], [], []))
+
+    assert service.batches == [1, 1, 1]
+    assert len(result.failed) == 1
+
+
+def test_get_events_retries_server_errors():
+    service = FakeService(
+        pages={None: {"items": [managed_event_dict("e1", START)]}},
+        transient_errors=[500],
+    )
+    client = make_client(service)
+
+    events = client.get_events(START, START + timedelta(weeks=1))
+
+    assert [event.id for event in events] == ["e1"]
+    assert len(service.calls) == 2
+
+
+def test_get_events_raises_permanent_errors():
+    service = FakeService(transient_errors=[404])
+    client = make_client(service)
+
+    with pytest.raises(HttpError):
+        client.get_events(START, START + timedelta(weeks=1))
+
+
+def test_requests_ask_for_partial_responses():
+    service = FakeService(pages={None: {"items": []}})
+    client = make_client(service)
+    event = make_lesson_event(START)
+    update = UpdateDiff(
+        id="e1", old=make_calendar_event("e1", START), new=event, changes={}
+    )
+
+    client.get_events(START, START + timedelta(weeks=1))
+    client.apply_changes(ChangeSet([event], [update], []))
+
+    (_, list_kwargs), (_, insert_kwargs), (_, patch_kwargs) = service.calls
+    assert list_kwargs["fields"] == (
+        "nextPageToken,items(id,start,end,summary,location,etag,updated,"
+        "extendedProperties/private)"
+    )
+    assert insert_kwargs["fields"] == "id,etag,updated"
+    assert patch_kwargs["fields"] == "id,etag,updated"
+
+
+def test_incremental_sync_requests_status_and_source_marker(tmp_path):
+    service = SyncingService({None: {"items": [], "nextSyncToken": "t"}})
+    client = make_client(service, sync_state_file=tmp_path / "sync-state.json")
+
+    client.get_events(START, START + timedelta(weeks=1))
+
+    fields = service.calls[0][1]["fields"]
+    assert fields.startswith("nextPageToken,nextSyncToken,items(")
+    assert "status" in fields
+    assert "extendedProperties/private" in fields
+
+
+def test_apply_changes_inserts_with_deterministic_ids():
+    service = FakeService()
+    client = make_client(service)
+    event = make_lesson_event(START)
+
+    result = client.apply_changes(ChangeSet([event], [], []))
+
+    (_, insert_kwargs) = service.calls[0]
+    assert insert_kwargs["body"]["id"] == make_event_id(
+        "calendar@example.com", event.start
+    )
+    assert result.added[0].id == make_event_id("calendar@example.com", event.start)
+
+
+def test_repeated_insert_is_idempotent():
+    service = FakeService()
+    client = make_client(service)
+    event = make_lesson_event(START)
+    client.apply_changes(ChangeSet([event], [], []))
+
+    result = client.apply_changes(ChangeSet([event], [], []))
+
+    assert [event.id for event in result.added] == [
+        make_event_id("calendar@example.com", event.start)
+    ]
+    assert result.failed == []
+    assert len(service.stored) == 1
+    assert [method for method, _ in service.calls] == [
+        "insert",
+        "insert",
+        "get",
+        "update",
+    ]
+
+
+def test_insert_restores_a_deleted_event_with_the_same_id():
+    service = FakeService()
+    client = make_client(service)
+    event = make_lesson_event(START)
+    client.apply_changes(ChangeSet([event], [], []))
+    client.apply_changes(
+        ChangeSet(
+            [],
+            [],
+            [
+                make_calendar_event(
+                    make_event_id("calendar@example.com", event.start), START
+                )
+            ],
+        )
+    )
+
+    result = client.apply_changes(ChangeSet([event], [], []))
+
+    assert result.failed == []
+    assert (
+        service.stored[make_event_id("calendar@example.com", event.start)]["status"]
+        == "confirmed"
+    )
+
+
+def test_insert_uses_a_new_id_when_the_slot_id_was_moved_away():
+    event = make_lesson_event(START)
+    slot_id = make_event_id("calendar@example.com", START)
+    service = FakeService(
+        stored={slot_id: event_dict(slot_id, START + timedelta(days=1))}
+    )
+    client = make_client(service, concurrency=2, service_factory=lambda: service)
+
+    result = client.apply_changes(ChangeSet([event], [], []))
+
+    assert [event.id for event in result.added] == ["new1"]
+    assert service.stored[slot_id]["start"]["dateTime"] == (
+        (START + timedelta(days=1)).isoformat()
+    )
+
+
+class FakeCredentials:
+    service_account_email = "sync@project.iam.gserviceaccount.com"
+    scopes = ["https://www.googleapis.com/auth/calendar"]
+
+    def __init__(self):
+        self.token = None
+        self.expiry = None
+        self.refreshed = 0
+
+    @property
+    def valid(self):
+        return self.token is not None
+
+    def refresh(self, request):
+        self.refreshed += 1
+        self.token = f"token{self.refreshed}"
+        self.expiry = datetime(2025, 10, 6, 9, 0)
+
+
+def test_token_is_only_requested_by_the_first_api_call(tmp_path):
+    credentials = FakeCredentials()
+    service = FakeService(pages={None: {"items": []}})
+    client = make_client(
+        service, credentials=credentials, token_cache_file=tmp_path / "token.json"
+    )
+
+    assert credentials.refreshed == 0
+
+    client.apply_changes(ChangeSet([make_lesson_event(START)], [], []))
+    list(client.iter_events(START, START + timedelta(days=1)))
+
+    assert credentials.refreshed == 1
+    assert json.loads((tmp_path / "token.json").read_text())["token"] == "token1"
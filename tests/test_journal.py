@@ -0,0 +1,116 @@
+from datetime import datetime, timedelta
+from zoneinfo import ZoneInfo
+
+from pronote2calendar.journal import ChangeJournal
+from pronote2calendar.models import (
+    ApplyResult,
+    CalendarEvent,
+    ChangeSet,
+    LessonEvent,
+    UpdateDiff,
+)
+
+START = datetime(2025, 10, 6, 8, 0, tzinfo=ZoneInfo("Europe/Paris"))
+
+
+def make_event(event_id, start):
+    return CalendarEvent(
+        id=event_id,
+        start=start,
+        end=start + timedelta(hours=1),
+        summary="Math",
+        etag='"1"',
+        updated=datetime(2025, 10, 1, tzinfo=ZoneInfo("UTC")),
+        content_hash="0123456789abcdef",
+    )
+
+
+def make_changes():
+    lesson = LessonEvent(START, START + timedelta(hours=1), "Math", "Mrs. A", "R1")
+    update = UpdateDiff("e1", make_event("e1", START), lesson, {"summary": ("A", "B")})
+    return ChangeSet([lesson], [update], [make_event("old", START)])
+
+
+def test_committed_journal_leaves_nothing_to_recover(tmp_path):
+    journal = ChangeJournal(tmp_path / "journal.jsonl")
+    journal.begin(make_changes())
+    journal.record(ApplyResult(added=[make_event("e1", START)]))
+
+    journal.commit()
+
+    assert not (tmp_path / "journal.jsonl").exists()
+    assert ChangeJournal(tmp_path / "journal.jsonl").recover() is None
+
+
+def test_interrupted_run_is_recovered_once(tmp_path):
+    journal = ChangeJournal(tmp_path / "journal.jsonl")
+    journal.begin(make_changes())
+    added = make_event("e1", START)
+    removed = make_event("old", START)
+    journal.record(ApplyResult(added=[added]))
+    journal.record(ApplyResult(removed=[removed]))
+
+    recovered = ChangeJournal(tmp_path / "journal.jsonl").recover()
+
+    assert recovered == ApplyResult(added=[added], removed=[removed])
+    assert ChangeJournal(tmp_path / "journal.jsonl").recover() is None
+
+
+def test_truncated_last_entry_is_ignored(tmp_path):
+    path = tmp_path / "journal.jsonl"
+    journal = ChangeJournal(path)
+    journal.begin(make_changes())
+    journal.record(ApplyResult(updated=[make_event("e1", START)]))
+    with open(path, "a") as file:
+        file.write('{"entry": "added", "event": {"id": "e2", "st')
+
+    recovered = ChangeJournal(path).recover()
+
+    assert recovered is not None
+    assert [event.id for event in recovered.updated] == ["e1"]
+    assert recovered.added == []
+
+
+def test_malformed_entry_stops_recovery(tmp_path, caplog):
+    path = tmp_path / "journal.jsonl"
+    journal = ChangeJournal(path)
+    journal.begin(make_changes())
+    journal.record(ApplyResult(updated=[make_event("e1", START)]))
+    with open(path, "a") as file:
+        file.write('{"entry": "added"}\n')
+    journal.record(ApplyResult(removed=[make_event("old", START)]))
+
+    recovered = ChangeJournal(path).recover()
+
+    assert recovered == ApplyResult(updated=[make_event("e1", START)])
+    assert "from line 3" in caplog.text
+    assert not path.exists()
+
+
+def test_only_planned_operations_are_recovered(tmp_path):
+    path = tmp_path / "journal.jsonl"
+    journal = ChangeJournal(path)
+    journal.begin(make_changes())
+    journal.record(
+        ApplyResult(
+            added=[
+                make_event("new1", START.astimezone(ZoneInfo("UTC"))),
+                make_event("new2", START + timedelta(hours=1)),
+            ],
+            removed=[make_event("other", START)],
+        )
+    )
+
+    recovered = ChangeJournal(path).recover()
+
+    assert recovered is not None
+    assert [event.id for event in recovered.added] == ["new1"]
+    assert recovered.removed == []
+
+
+def test_journal_without_planned_changes_is_ignored(tmp_path):
+    path = tmp_path / "journal.jsonl"
+    path.write_text('{"entry": "added", "event": {}}\n')
+
+    assert ChangeJournal(path).recover() is None
+    assert not path.exists()
@@ -0,0 +1,98 @@
+from dataclasses import fields
+from datetime import datetime, timedelta
+from zoneinfo import ZoneInfo
+
+from pronote2calendar.lesson_snapshot import (
+    ReplayPronoteClient,
+    load_snapshot,
+    save_snapshot,
+)
+from pronote2calendar.models import LessonRecord, SubjectRecord, to_lesson_record
+from pronote2calendar.pronote_client import PronoteClient
+
+START = datetime(2025, 10, 6, 8, tzinfo=ZoneInfo("Europe/Paris"))
+PERIOD = (START.replace(hour=0), START.replace(hour=0) + timedelta(weeks=1))
+
+
+class DummySubject:
+    def __init__(self, name):
+        self.name = name
+        self.groups = False
+
+
+class DummyLesson:
+    """Lesson with the attributes of a pronotepy lesson used by the templates."""
+
+    def __init__(self, start, subject="Math", canceled=False):
+        record = LessonRecord(start=start, end=start + timedelta(hours=1))
+        for field in fields(record):
+            setattr(self, field.name, getattr(record, field.name))
+        self.subject = DummySubject(subject)
+        self.teacher_name = "Mrs. A"
+        self.teacher_names = ["Mrs. A"]
+        self.classroom = "Room 1"
+        self.canceled = canceled
+
+
+def test_snapshot_round_trip(tmp_path):
+    path = tmp_path / "lessons.json"
+    lessons = [
+        to_lesson_record(lesson, lesson.start, lesson.end)
+        for lesson in (
+            DummyLesson(START),
+            DummyLesson(START + timedelta(hours=1), "Art"),
+        )
+    ]
+
+    save_snapshot(path, *PERIOD, lessons)
+    start, end, records = load_snapshot(path)
+
+    assert (start, end) == PERIOD
+    assert records == lessons
+    assert records[0].subject == SubjectRecord("Math")
+    assert records[0].teacher_names == ("Mrs. A",)
+    assert records[0].teacher_name is records[1].teacher_name
+    # Default values are left out
+    assert '"canceled"' not in path.read_text()
+
+
+def test_replay_returns_the_requested_lessons(tmp_path, caplog):
+    path = tmp_path / "lessons.json"
+    lessons = [
+        to_lesson_record(DummyLesson(start), start, start + timedelta(hours=1))
+        for start in (START + timedelta(days=day) for day in range(3))
+    ]
+    save_snapshot(path, *PERIOD, lessons)
+    client = ReplayPronoteClient(path)
+
+    replayed = client.get_lessons(START, START + timedelta(days=1))
+
+    assert [lesson.start for lesson in replayed] == [
+        lesson.start for lesson in lessons[:2]
+    ]
+    assert "only covers" not in caplog.text
+
+    client.get_lessons(START, START + timedelta(weeks=2))
+    assert "only covers" in caplog.text
+
+
+def test_lessons_are_recorded_in_record_mode(tmp_path):
+    path = tmp_path / "lessons.json"
+    lessons = [
+        DummyLesson(START),
+        DummyLesson(START + timedelta(hours=1), canceled=True),
+    ]
+
+    class DummyClient:
+        def lessons(self, start, end):
+            return list(lessons)
+
+    pc = PronoteClient.__new__(PronoteClient)
+    pc.client = DummyClient()
+    pc.snapshot_file = path
+    result = pc.get_lessons(*PERIOD)
+
+    _, _, records = load_snapshot(path)
+    assert len(result) == 1
+    assert records == result
+    assert records[0].start == START
@@ -1,9 +1,19 @@
+import threading
+from datetime import timedelta
+
+import pytest
+
 from pronote2calendar import main as main_mod
-from pronote2calendar.models import ChangeSet
+from pronote2calendar.journal import ChangeJournal
+from pronote2calendar.models import ApplyResult, CalendarEvent, ChangeSet, LessonEvent
 from pronote2calendar.settings import (
     AjustmentsSettings,
+    ChurnGuardSettings,
     EventsSettings,
+    GoogleCalendarSettings,
     NotificationsSettings,
+    PronoteSettings,
+    RefreshTier,
     SyncSettings,
 )
 
@@ -14,12 +24,19 @@ _orig_Settings = main_mod.Settings
 class DummyCalendar:
     def __init__(self):
         self.applied = False
+        self.fetched = 0
+        self.saved = 0
 
-    def get_events(self, start, end):
+    def get_events(self, start, end, save_state=True, prune_before=None):
+        self.fetched += 1
         return []
 
-    def apply_changes(self, changes):
+    def save_sync_state(self):
+        self.saved += 1
+
+    def apply_changes(self, changes, journal=None):
         self.applied = True
+        return ApplyResult()
 
 
 class DummyPronote:
@@ -32,6 +49,9 @@ class DummyPronote:
     def get_lessons(self, start, end):
         return []
 
+    def save_session(self):
+        pass
+
 
 def run_main_with_changes(monkeypatch, changes_value):
     # Patch setup_logging
@@ -47,7 +67,7 @@ def run_main_with_changes(monkeypatch, changes_value):
             adjustments = AjustmentsSettings()
             events = EventsSettings()
             notifications = NotificationsSettings()  # new field
-            pronote = None
+            pronote = PronoteSettings()
             google_calendar = None
 
         monkeypatch.setattr(main_mod, "Settings", MockSettings)
@@ -85,7 +105,7 @@ def test_main_sends_notifications_when_configured(monkeypatch):
         adjustments = AjustmentsSettings()
         events = EventsSettings()
         notifications = NotificationsSettings(destinations=["dummy"], enabled=True)
-        pronote = None
+        pronote = PronoteSettings()
         google_calendar = None
 
     monkeypatch.setattr(main_mod, "Settings", MockSettingsEnabled)
@@ -94,6 +114,34 @@ def test_main_sends_notifications_when_configured(monkeypatch):
     assert calls, "send_notifications should have been called"
 
 
+def test_main_notifies_only_the_applied_changes(monkeypatch):
+    calls = []
+    monkeypatch.setattr(
+        main_mod, "send_notifications", lambda ns, ch: calls.append((ns, ch))
+    )
+    applied, failed = object(), object()
+    changes = ChangeSet([applied, failed], [], [])
+    monkeypatch.setattr(
+        DummyCalendar,
+        "apply_changes",
+        lambda self, changes, journal=None: ApplyResult(failed=[failed]),
+    )
+
+    class MockSettingsEnabled:
+        log_level = "INFO"
+        sync = SyncSettings(weeks=3)
+        adjustments = AjustmentsSettings()
+        events = EventsSettings()
+        notifications = NotificationsSettings(destinations=["dummy"], enabled=True)
+        pronote = PronoteSettings()
+        google_calendar = None
+
+    monkeypatch.setattr(main_mod, "Settings", MockSettingsEnabled)
+
+    run_main_with_changes(monkeypatch, changes)
+    assert calls[0][1] == ChangeSet([applied], [], [])
+
+
 def test_main_skips_notifications_when_empty(monkeypatch):
     calls = []
     monkeypatch.setattr(
@@ -109,7 +157,7 @@ def test_main_skips_notifications_when_empty(monkeypatch):
         events = EventsSettings()
         # even though destinations is empty we still turn notifications on
         notifications = NotificationsSettings(destinations=[], enabled=True)
-        pronote = None
+        pronote = PronoteSettings()
         google_calendar = None
 
     monkeypatch.setattr(main_mod, "Settings", MockSettings2)
@@ -129,3 +177,213 @@ def test_main_applies_when_changes_present(monkeypatch):
     changes = ChangeSet([1], [], [])
     dummy_cal = run_main_with_changes(monkeypatch, changes)
     assert dummy_cal.applied
+
+
+def test_main_reads_existing_events_from_verified_mirror(monkeypatch, tmp_path):
+    class MockSettingsMirror:
+        log_level = "INFO"
+        sync = SyncSettings(weeks=3, mirror_file=tmp_path / "mirror.sqlite")
+        adjustments = AjustmentsSettings()
+        events = EventsSettings()
+        notifications = NotificationsSettings()
+        pronote = PronoteSettings()
+        google_calendar = GoogleCalendarSettings(calendar_id="calendar@example.com")
+
+    monkeypatch.setattr(main_mod, "Settings", MockSettingsMirror)
+
+    first = run_main_with_changes(monkeypatch, ChangeSet([], [], []))
+    second = run_main_with_changes(monkeypatch, ChangeSet([], [], []))
+
+    assert first.fetched == 1
+    assert first.saved == 1
+    assert second.fetched == 0
+
+
+def test_main_records_interrupted_run_in_mirror(monkeypatch, tmp_path):
+    journal_file = tmp_path / "journal.jsonl"
+
+    class MockSettingsJournal:
+        log_level = "INFO"
+        sync = SyncSettings(
+            weeks=3,
+            mirror_file=tmp_path / "mirror.sqlite",
+            journal_file=journal_file,
+        )
+        adjustments = AjustmentsSettings()
+        events = EventsSettings()
+        notifications = NotificationsSettings()
+        pronote = PronoteSettings()
+        google_calendar = GoogleCalendarSettings(calendar_id="calendar@example.com")
+
+    monkeypatch.setattr(main_mod, "Settings", MockSettingsJournal)
+    run_main_with_changes(monkeypatch, ChangeSet([], [], []))
+    # The next run is interrupted after inserting an event
+    start, _ = main_mod.compute_sync_period(3)
+    inserted = CalendarEvent("e1", start, start + timedelta(hours=1), "Math")
+    journal = ChangeJournal(journal_file)
+    lesson = LessonEvent(inserted.start, inserted.end, "Math", None, None)
+    journal.begin(ChangeSet([lesson], [], []))
+    journal.record(ApplyResult(added=[inserted]))
+
+    existing = []
+    monkeypatch.setattr(
+        main_mod.change_detection,
+        "get_changes",
+        lambda new, events: existing.extend(events) or ChangeSet([], [], []),
+    )
+    main_mod.main()
+
+    assert [event.id for event in existing] == ["e1"]
+    assert not journal_file.exists()
+
+
+def test_main_saves_nothing_when_pronote_login_fails(monkeypatch, tmp_path):
+    journal_file = tmp_path / "journal.jsonl"
+
+    class MockSettingsJournal:
+        log_level = "INFO"
+        sync = SyncSettings(
+            weeks=3,
+            mirror_file=tmp_path / "mirror.sqlite",
+            journal_file=journal_file,
+        )
+        adjustments = AjustmentsSettings()
+        events = EventsSettings()
+        notifications = NotificationsSettings()
+        pronote = PronoteSettings()
+        google_calendar = GoogleCalendarSettings(calendar_id="calendar@example.com")
+
+    ChangeJournal(journal_file).begin(ChangeSet([], [], []))
+    monkeypatch.setattr(main_mod, "Settings", MockSettingsJournal)
+    monkeypatch.setattr(DummyPronote, "is_logged_in", lambda self: False)
+
+    dummy_cal = run_main_with_changes(monkeypatch, ChangeSet([], [], []))
+
+    assert dummy_cal.fetched == 1
+    assert dummy_cal.saved == 0
+    assert journal_file.exists()
+    mirror = main_mod.EventMirror(tmp_path / "mirror.sqlite", "calendar@example.com")
+    start, end = main_mod.compute_sync_period(3)
+    assert mirror.needs_verification(timedelta(hours=1), start, end)
+    mirror.close()
+
+
+def test_main_skips_apply_when_churn_guard_is_read_only(monkeypatch):
+    class MockSettingsGuard:
+        log_level = "INFO"
+        sync = SyncSettings(
+            weeks=3,
+            churn_guard=ChurnGuardSettings(
+                max_remove_ratio=0.5, min_events=1, action="read_only"
+            ),
+        )
+        adjustments = AjustmentsSettings()
+        events = EventsSettings()
+        notifications = NotificationsSettings()
+        pronote = PronoteSettings()
+        google_calendar = GoogleCalendarSettings(calendar_id="calendar@example.com")
+
+    start, _ = main_mod.compute_sync_period(3)
+    existing = CalendarEvent("e1", start, start + timedelta(hours=1), "Math")
+    monkeypatch.setattr(main_mod, "Settings", MockSettingsGuard)
+    monkeypatch.setattr(
+        DummyCalendar, "get_events", lambda self, s, e, **kwargs: [existing]
+    )
+
+    dummy_cal = run_main_with_changes(monkeypatch, ChangeSet([], [], [existing]))
+
+    assert not dummy_cal.applied
+
+
+def test_main_exits_when_churn_guard_aborts(monkeypatch, tmp_path, caplog):
+    class MockSettingsGuard:
+        log_level = "INFO"
+        sync = SyncSettings(
+            weeks=3,
+            mirror_file=tmp_path / "mirror.sqlite",
+            churn_guard=ChurnGuardSettings(max_remove_ratio=0.5, min_events=1),
+        )
+        adjustments = AjustmentsSettings()
+        events = EventsSettings()
+        notifications = NotificationsSettings()
+        pronote = PronoteSettings()
+        google_calendar = GoogleCalendarSettings(calendar_id="calendar@example.com")
+
+    start, _ = main_mod.compute_sync_period(3)
+    existing = CalendarEvent("e1", start, start + timedelta(hours=1), "Math")
+    closed = []
+    monkeypatch.setattr(main_mod, "Settings", MockSettingsGuard)
+    monkeypatch.setattr(
+        DummyCalendar, "get_events", lambda self, s, e, **kwargs: [existing]
+    )
+    monkeypatch.setattr(main_mod.EventMirror, "close", lambda self: closed.append(1))
+
+    with pytest.raises(SystemExit) as exit_info:
+        run_main_with_changes(monkeypatch, ChangeSet([], [], [existing]))
+
+    assert exit_info.value.code == 1
+    assert closed == [1]
+    errors = [r for r in caplog.records if r.levelname == "ERROR"]
+    assert len(errors) == 1
+    assert "limit=0.5 observed=1.00" in errors[0].getMessage()
+    assert "Unhandled exception" not in caplog.text
+
+
+def test_main_reads_calendar_while_fetching_lessons(monkeypatch):
+    calendar_read = threading.Event()
+    waited = []
+
+    def get_lessons(self, start, end):
+        waited.append(calendar_read.wait(timeout=5))
+        return []
+
+    monkeypatch.setattr(DummyPronote, "get_lessons", get_lessons)
+    monkeypatch.setattr(
+        DummyCalendar,
+        "get_events",
+        lambda self, s, e, **kwargs: calendar_read.set() or [],
+    )
+
+    run_main_with_changes(monkeypatch, ChangeSet([], [], []))
+
+    assert waited == [True]
+
+
+def test_main_only_syncs_due_refresh_tiers(monkeypatch, tmp_path):
+    class MockSettingsTiers:
+        log_level = "INFO"
+        sync = SyncSettings(
+            weeks=3,
+            refresh_tiers=[
+                RefreshTier(weeks=1),
+                RefreshTier(weeks=2, max_age_hours=24),
+            ],
+            refresh_state_file=tmp_path / "refresh.json",
+        )
+        adjustments = AjustmentsSettings()
+        events = EventsSettings()
+        notifications = NotificationsSettings()
+        pronote = PronoteSettings()
+        google_calendar = None
+
+    periods = []
+    pruned = []
+
+    def get_events(self, start, end, save_state=True, prune_before=None):
+        periods.append(end - start)
+        pruned.append(prune_before)
+        return []
+
+    monkeypatch.setattr(DummyCalendar, "get_events", get_events)
+    monkeypatch.setattr(main_mod, "Settings", MockSettingsTiers)
+
+    run_main_with_changes(monkeypatch, ChangeSet([], [], []))
+    run_main_with_changes(monkeypatch, ChangeSet([], [], []))
+
+    assert periods == [
+        timedelta(weeks=3, seconds=-1),
+        timedelta(weeks=1, seconds=-1),
+    ]
+    # The sync state keeps the events of the whole sync period
+    period_start, _ = main_mod.compute_sync_period(3)
+    assert pruned == [period_start, period_start]
@@ -1,6 +1,29 @@
-from datetime import datetime, timedelta
+import base64
+import dataclasses
+import json
+import os
+import pickle
+import time
+from datetime import date, datetime, timedelta
+from zoneinfo import ZoneInfo
 
+import pronotepy
+import pytest
+import requests
+from Crypto.Hash import MD5, SHA256
+from pronotepy.pronoteAPI import _Encryption
+
+from pronote2calendar.models import LessonRecord
 from pronote2calendar.pronote_client import PronoteClient
+from pronote2calendar.pronote_session import restore_client, session_state
+from pronote2calendar.settings import PronoteSettings
+
+CREDENTIALS = {
+    "pronote_url": "https://example.index-education.net/pronote/",
+    "username": "user",
+    "password": "token1",
+    "uuid": "uuid",
+}
 
 
 class DummyLesson:
@@ -51,3 +74,302 @@ def test_select_highest_num_per_start_even_if_canceled():
 
     # total lessons should be 0 because the highest num lesson is canceled
     assert len(result) == 0
+
+
+class DummySubject:
+    def __init__(self, name):
+        self.name = name
+        self.groups = False
+
+
+class DummyFullLesson(DummyLesson):
+    """Lesson with all the attributes of a pronotepy lesson used by templates."""
+
+    def __init__(self, start, subject):
+        super().__init__(start, 1)
+        self.end = start + timedelta(hours=1)
+        self.subject = DummySubject(subject)
+        self.teacher_name = "".join(["Mrs. ", "A"])
+        self.teacher_names = [self.teacher_name]
+        self.classroom = "Room 1"
+        self.classrooms = ["Room 1"]
+        self.virtual_classrooms = []
+        self.group_name = None
+        self.group_names = []
+        self.memo = None
+        self.status = None
+        self.background_color = "#FFFFFF"
+        self.outing = False
+        self.exempted = False
+        self.detention = False
+        self.normal = True
+        self.test = False
+
+
+def test_lessons_are_converted_to_records():
+    start = datetime(2025, 10, 6, 8)
+    lessons = [
+        DummyFullLesson(start, "Math"),
+        DummyFullLesson(start + timedelta(hours=1), "".join(["Ma", "th"])),
+    ]
+
+    class DummyClient:
+        def lessons(self, start, end):
+            return list(lessons)
+
+    pc = PronoteClient.__new__(PronoteClient)
+    pc.client = DummyClient()
+    pc.timezone = ZoneInfo("Europe/Paris")
+    pc.snapshot_file = None
+    result = pc.get_lessons(start, start + timedelta(days=1))
+
+    assert all(isinstance(lesson, LessonRecord) for lesson in result)
+    assert result[0].start == start.replace(tzinfo=pc.timezone)
+    assert result[0].classrooms == ("Room 1",)
+    # Names and subjects are shared between the lessons
+    assert result[0].subject is result[1].subject
+    assert result[0].teacher_name is result[1].teacher_name
+    assert pickle.loads(pickle.dumps(result)) == result
+    with pytest.raises(dataclasses.FrozenInstanceError):
+        result[0].subject.name = "Art"  # type: ignore[misc]
+
+
+def session_data(password="token1", account_type="child"):
+    """State saved for a logged in client, as returned by Pronote."""
+    student = {"N": "2", "L": "Student", "G": 3}
+    resource = (
+        {"N": "1", "L": "Parent", "G": 2} if account_type == "parent" else student
+    )
+    return {
+        "account_type": account_type,
+        "pronote_url": CREDENTIALS["pronote_url"],
+        "username": CREDENTIALS["username"],
+        "password": password,
+        "login_mode": "token",
+        "uuid": CREDENTIALS["uuid"],
+        "client_identifier": "browser",
+        "attributes": {"a": "3", "h": "123456"},
+        "cookies": {"CASTGC": "ticket"},
+        "session_cookies": {"SESSION": "server"},
+        "request_number": 5,
+        "aes_iv": bytes(range(16)).hex(),
+        "aes_key": bytes(range(16, 32)).hex(),
+        "login_key": bytes(range(32, 48)).hex(),
+        "encrypt_requests": False,
+        "compress_requests": False,
+        "authorized_onglets": [7, 16],
+        "func_options": {
+            "dataSec": {
+                "data": {
+                    "General": {
+                        "PremierLundi": {"V": "01/09/2025"},
+                        "ListePeriodes": [],
+                    }
+                }
+            }
+        },
+        "parametres_utilisateur": {"dataSec": {"data": {"ressource": student}}},
+        "resource": resource,
+        "children": [student] if account_type == "parent" else None,
+        "last_connection": "2025-10-06T08:00:00",
+    }
+
+
+class FakeResponse:
+    ok = True
+    status_code = 200
+
+    def __init__(self, data=None, text=""):
+        self.data = data or {}
+        self.content = text.encode()
+        self.cookies = requests.cookies.cookiejar_from_dict({"SESSION": "server"})
+
+    def json(self):
+        return {"dataSec": {"data": self.data}}
+
+
+def test_session_state_round_trips_through_json():
+    for account_type in ("child", "parent"):
+        state = session_data(account_type=account_type)
+
+        client = restore_client(json.loads(json.dumps(state)))
+
+        assert isinstance(client, pronotepy.ParentClient) == (account_type == "parent")
+        assert client.logged_in
+        assert client.info.name == state["resource"]["L"]
+        assert session_state(client) == state
+
+
+def test_restored_client_continues_the_session(monkeypatch):
+    sent = []
+
+    def request(self, method, url, json=None, cookies=None):
+        sent.append((url, json, cookies.get_dict(), self.cookies.get_dict()))
+        return FakeResponse()
+
+    monkeypatch.setattr(requests.Session, "request", request)
+    client = restore_client(session_data())
+
+    assert not client.session_check()
+
+    encryption = _Encryption()
+    encryption.aes_iv = bytes(range(16))
+    encryption.aes_key = bytes(range(16, 32))
+    number = encryption.aes_encrypt(b"5").hex()
+    [(url, body, cookies, session_cookies)] = sent
+    assert url == (
+        "https://example.index-education.net/pronote/appelfonction/3/123456/" + number
+    )
+    assert body["session"] == 123456
+    assert cookies == {"CASTGC": "ticket"}
+    assert session_cookies == {"SESSION": "server"}
+    assert session_state(client)["request_number"] == 7
+
+
+class FakePronoteServer:
+    """Pronote server answering the requests of a password login."""
+
+    def __init__(self, password="secret"):
+        self.password = password
+        self.encryption = _Encryption()
+
+    def request(self, method, url, json=None, cookies=None):
+        if method == "GET":
+            return FakeResponse(
+                text="<body id='id_body' onload=\"Start({h:'123456',a:'3'})\"></body>"
+            )
+        function = json["id"]
+        data: dict = {}
+        if function == "FonctionParametres":
+            uuid = base64.b64decode(json["dataSec"]["data"]["Uuid"])
+            self.encryption.aes_set_iv(MD5.new(uuid).digest())
+            data = {
+                "identifiantNav": "browser",
+                "General": {"PremierLundi": {"V": "01/09/2025"}, "ListePeriodes": []},
+            }
+        elif function == "Identification":
+            key = SHA256.new(self.password.encode()).hexdigest().upper()
+            self.encryption.aes_set_key((CREDENTIALS["username"] + key).encode())
+            data = {
+                "challenge": self.encryption.aes_encrypt(b"c0h1a2l3").hex(),
+                "modeCompLog": 0,
+                "modeCompMdp": 0,
+            }
+        elif function == "Authentification":
+            session_key = ",".join(str(byte) for byte in range(16))
+            data = {
+                "cle": self.encryption.aes_encrypt(session_key.encode()).hex(),
+                "derniereConnexion": {"V": "06/10/2025 08:00:00"},
+            }
+        elif function == "ParametresUtilisateur":
+            data = {
+                "ressource": {"N": "2", "L": "Student", "G": 3},
+                "listeOnglets": [{"G": 7}, {"G": 16}],
+            }
+        return FakeResponse(data)
+
+
+def test_restored_client_has_the_attributes_of_a_logged_in_client(monkeypatch):
+    server = FakePronoteServer()
+    monkeypatch.setattr(requests.Session, "request", server.request)
+    client = pronotepy.Client(
+        CREDENTIALS["pronote_url"], CREDENTIALS["username"], server.password
+    )
+
+    restored = restore_client(json.loads(json.dumps(session_state(client))))
+
+    for logged_in, resumed in (
+        (client, restored),
+        (client.communication, restored.communication),
+        (client.communication.encryption, restored.communication.encryption),
+        (client.encryption, restored.encryption),
+    ):
+        # The last response and the temporary IV are only used to log in
+        attributes = vars(logged_in).keys() - {"last_response", "aes_iv_temp"}
+        assert attributes == vars(resumed).keys() - {"aes_iv_temp"}
+        for name in attributes:
+            value = getattr(logged_in, name)
+            if isinstance(value, str | int | float | list | dict | bytes | date | None):
+                if name not in ("_last_ping", "last_ping"):
+                    assert getattr(resumed, name) == value, name
+            else:
+                assert type(getattr(resumed, name)) is type(value), name
+    assert restored.info.raw_resource == client.info.raw_resource
+    assert restored.communication.cookies == client.communication.cookies
+    assert (
+        restored.communication.session.cookies == client.communication.session.cookies
+    )
+
+
+def make_pronote_client(tmp_path, monkeypatch, session_check=None, **session):
+    credentials_file = tmp_path / "credentials-pronote.json"
+    credentials_file.write_text(json.dumps(CREDENTIALS))
+    logins = []
+
+    def token_login(cls, **credentials):
+        logins.append(credentials)
+        return restore_client(session_data(password="token2"))
+
+    monkeypatch.setattr(pronotepy.Client, "token_login", classmethod(token_login))
+    monkeypatch.setattr(
+        pronotepy.Client, "session_check", session_check or (lambda client: False)
+    )
+    config = PronoteSettings(session_file=tmp_path / "session.json", **session)
+    return PronoteClient(config, str(credentials_file)), logins
+
+
+def test_saved_session_is_resumed_without_logging_in(tmp_path, monkeypatch):
+    first, logins = make_pronote_client(tmp_path, monkeypatch)
+    first.save_session()
+    checks = []
+
+    second, logins = make_pronote_client(
+        tmp_path, monkeypatch, session_check=lambda client: checks.append(client)
+    )
+
+    assert logins == []
+    assert checks == [second.client]
+    assert second.client.password == "token2"
+    assert os.stat(tmp_path / "session.json").st_mode & 0o777 == 0o600
+
+
+def test_expired_session_updates_the_credentials(tmp_path, monkeypatch):
+    def session_check(client):
+        client.password = "token3"
+        return True
+
+    first, _ = make_pronote_client(tmp_path, monkeypatch)
+    first.save_session()
+
+    second, logins = make_pronote_client(tmp_path, monkeypatch, session_check)
+
+    assert logins == []
+    credentials = json.loads((tmp_path / "credentials-pronote.json").read_text())
+    assert credentials["password"] == "token3"
+
+
+def test_session_falls_back_to_login(tmp_path, monkeypatch):
+    def session_check(client):
+        raise pronotepy.PronoteAPIError("session lost")
+
+    first, logins = make_pronote_client(tmp_path, monkeypatch)
+    assert len(logins) == 1
+    first.save_session()
+
+    _, logins = make_pronote_client(tmp_path, monkeypatch, session_check)
+    assert len(logins) == 1
+
+    os.chmod(tmp_path / "session.json", 0o644)
+    _, logins = make_pronote_client(tmp_path, monkeypatch)
+    assert len(logins) == 1
+
+
+def test_old_session_is_not_resumed(tmp_path, monkeypatch):
+    first, _ = make_pronote_client(tmp_path, monkeypatch)
+    first.save_session()
+    old = time.time() - 11 * 60
+    os.utime(tmp_path / "session.json", (old, old))
+
+    _, logins = make_pronote_client(tmp_path, monkeypatch, session_max_age_minutes=10)
+
+    assert len(logins) == 1
@@ -0,0 +1,88 @@
+import asyncio
+import threading
+
+from pronote2calendar.rate_limiter import TokenBucket
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+        self.sleeps = []
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+def test_burst_up_to_capacity_without_waiting():
+    clock = FakeClock()
+    bucket = TokenBucket(5, clock=clock, sleep=clock.sleep)
+
+    for _ in range(5):
+        bucket.acquire()
+
+    assert clock.sleeps == []
+
+
+def test_waits_when_bucket_is_empty():
+    clock = FakeClock()
+    bucket = TokenBucket(2, clock=clock, sleep=clock.sleep)
+
+    for _ in range(6):
+        bucket.acquire()
+
+    # two tokens were available immediately, the next four need 0.5s each
+    assert sum(clock.sleeps) == 2.0
+
+
+def test_tokens_refill_over_time_up_to_capacity():
+    clock = FakeClock()
+    bucket = TokenBucket(1, capacity=2, clock=clock, sleep=clock.sleep)
+    bucket.acquire()
+    bucket.acquire()
+
+    clock.now += 10
+    bucket.acquire()
+    bucket.acquire()
+
+    assert clock.sleeps == []
+    bucket.acquire()
+    assert clock.sleeps == [1.0]
+
+
+def test_acquire_is_thread_safe():
+    clock = FakeClock()
+    bucket = TokenBucket(1, capacity=100, clock=clock, sleep=clock.sleep)
+    threads = [
+        threading.Thread(target=lambda: [bucket.acquire() for _ in range(25)])
+        for _ in range(4)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert clock.sleeps == []
+    assert bucket._tokens == 0
+
+
+def test_acquire_async_waits_without_blocking_the_loop(monkeypatch):
+    clock = FakeClock()
+    bucket = TokenBucket(2, clock=clock, sleep=clock.sleep)
+
+    async def fake_sleep(seconds):
+        clock.now += seconds
+
+    monkeypatch.setattr(asyncio, "sleep", fake_sleep)
+
+    async def acquire_all():
+        for _ in range(4):
+            await bucket.acquire_async()
+
+    asyncio.run(acquire_all())
+
+    assert clock.now == 1.0
+    assert clock.sleeps == []
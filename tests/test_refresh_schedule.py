@@ -0,0 +1,89 @@
+from datetime import datetime, timedelta
+from zoneinfo import ZoneInfo
+
+from pronote2calendar.refresh_schedule import RefreshSchedule
+from pronote2calendar.settings import RefreshTier
+
+START = datetime(2025, 10, 6, tzinfo=ZoneInfo("Europe/Paris"))
+TIERS = [RefreshTier(weeks=2), RefreshTier(weeks=4, max_age_hours=24)]
+
+
+def test_all_tiers_are_due_on_the_first_run(tmp_path):
+    schedule = RefreshSchedule(TIERS, tmp_path / "refresh.json")
+
+    assert schedule.due_period(START, now=START) == (
+        START,
+        START + timedelta(weeks=6, seconds=-1),
+    )
+
+
+def test_far_tier_is_synced_once_its_max_age_passed(tmp_path):
+    schedule = RefreshSchedule(TIERS, tmp_path / "refresh.json")
+    schedule.due_period(START, now=START)
+    schedule.record(now=START)
+
+    later = START + timedelta(hours=1)
+    assert schedule.due_period(START, now=later) == (
+        START,
+        START + timedelta(weeks=2, seconds=-1),
+    )
+    schedule.record(now=later)
+
+    next_day = START + timedelta(hours=24)
+    assert schedule.due_period(START, now=next_day) == (
+        START,
+        START + timedelta(weeks=6, seconds=-1),
+    )
+
+
+def test_tiers_in_between_due_tiers_are_synced_with_them(tmp_path):
+    tiers = [
+        RefreshTier(weeks=1, max_age_hours=1),
+        RefreshTier(weeks=1, max_age_hours=24),
+        RefreshTier(weeks=1, max_age_hours=1),
+    ]
+    schedule = RefreshSchedule(tiers, tmp_path / "refresh.json")
+    schedule.due_period(START, now=START)
+    schedule.record(now=START)
+
+    later = START + timedelta(hours=2)
+    assert schedule.due_period(START, now=later) == (
+        START,
+        START + timedelta(weeks=3, seconds=-1),
+    )
+    schedule.record(now=later)
+    assert schedule.due_period(START, now=later) is None
+
+
+def test_changed_tiers_are_due_again(tmp_path):
+    schedule = RefreshSchedule(TIERS, tmp_path / "refresh.json")
+    schedule.due_period(START, now=START)
+    schedule.record(now=START)
+
+    changed = RefreshSchedule(
+        [RefreshTier(weeks=3), RefreshTier(weeks=3, max_age_hours=24)],
+        tmp_path / "refresh.json",
+    )
+
+    assert changed.due_period(START, now=START + timedelta(hours=1)) == (
+        START,
+        START + timedelta(weeks=6, seconds=-1),
+    )
+
+
+def test_unreadable_refresh_times_make_all_tiers_due(tmp_path):
+    state_file = tmp_path / "refresh.json"
+    schedule = RefreshSchedule(TIERS, state_file)
+
+    for refreshed in ['{"0+2": "garbage"}', '{"0+2": 1}', '["0+2"]']:
+        state_file.write_text(f'{{"refreshed": {refreshed}}}')
+        assert schedule.due_period(START, now=START) == (
+            START,
+            START + timedelta(weeks=6, seconds=-1),
+        )
+
+    state_file.write_text('{"refreshed": {"0+2": "2025-10-06T00:00:00"}}')
+    assert schedule.due_period(START, now=START) == (
+        START,
+        START + timedelta(weeks=6, seconds=-1),
+    )
@@ -0,0 +1,123 @@
+import asyncio
+import json
+
+import pytest
+from googleapiclient.errors import HttpError  # type: ignore
+from httplib2 import Response  # type: ignore
+
+from pronote2calendar.retry import RetryPolicy, is_retryable
+
+
+def http_error(status, reason=None, headers=None):
+    content = b""
+    if reason:
+        content = json.dumps(
+            {"error": {"errors": [{"reason": reason}], "message": reason}}
+        ).encode()
+    return HttpError(Response({"status": status, **(headers or {})}), content)
+
+
+@pytest.mark.parametrize(
+    "error",
+    [
+        http_error(429),
+        http_error(500),
+        http_error(503),
+        http_error(403, "rateLimitExceeded"),
+        http_error(403, "userRateLimitExceeded"),
+        ConnectionError(),
+        TimeoutError(),
+    ],
+)
+def test_transient_errors_are_retryable(error):
+    assert is_retryable(error)
+
+
+@pytest.mark.parametrize(
+    "error",
+    [
+        http_error(400),
+        http_error(403, "forbidden"),
+        http_error(403),
+        http_error(404),
+        http_error(409, "duplicate"),
+        http_error(410),
+        ValueError(),
+    ],
+)
+def test_permanent_errors_are_not_retryable(error):
+    assert not is_retryable(error)
+
+
+def test_call_retries_until_success():
+    sleeps = []
+    outcomes = [http_error(503), http_error(429), "ok"]
+
+    def func():
+        outcome = outcomes.pop(0)
+        if isinstance(outcome, Exception):
+            raise outcome
+        return outcome
+
+    policy = RetryPolicy(max_retries=5, sleep=sleeps.append)
+
+    assert policy.call(func) == "ok"
+    assert len(sleeps) == 2
+
+
+def test_call_async_retries_until_success():
+    sleeps = []
+    outcomes = [http_error(503), ConnectionError(), "ok"]
+
+    async def func():
+        outcome = outcomes.pop(0)
+        if isinstance(outcome, Exception):
+            raise outcome
+        return outcome
+
+    async def sleep(seconds):
+        sleeps.append(seconds)
+
+    policy = RetryPolicy(max_retries=5, async_sleep=sleep)
+
+    assert asyncio.run(policy.call_async(func)) == "ok"
+    assert len(sleeps) == 2
+
+
+def test_call_gives_up_after_max_retries():
+    sleeps = []
+    policy = RetryPolicy(max_retries=2, sleep=sleeps.append)
+
+    def func():
+        raise http_error(500)
+
+    with pytest.raises(HttpError):
+        policy.call(func)
+    assert len(sleeps) == 2
+
+
+def test_call_does_not_retry_permanent_errors():
+    sleeps = []
+    policy = RetryPolicy(sleep=sleeps.append)
+
+    def func():
+        raise http_error(404)
+
+    with pytest.raises(HttpError):
+        policy.call(func)
+    assert sleeps == []
+
+
+def test_delay_uses_jittered_exponential_backoff():
+    policy = RetryPolicy(base_delay=1, max_delay=10)
+
+    for attempt, bound in [(0, 1), (1, 2), (2, 4), (3, 8), (6, 10)]:
+        delays = [policy.delay(attempt, http_error(503)) for _ in range(50)]
+        assert all(0 <= delay <= bound for delay in delays)
+
+
+def test_delay_honours_retry_after_header():
+    policy = RetryPolicy(max_delay=60)
+
+    assert policy.delay(0, http_error(429, headers={"retry-after": "7"})) == 7
+    assert policy.delay(0, http_error(429, headers={"retry-after": "600"})) == 60
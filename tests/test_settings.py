@@ -10,6 +10,7 @@ from pronote2calendar.settings import (
     NotificationsSettings,
     NotificationsTemplates,
     PronoteSettings,
+    RefreshTier,
     Settings,
     SyncSettings,
     TimeAdjustmentRule,
@@ -99,6 +100,14 @@ class TestPronoteSettings:
         with pytest.raises(ValidationError):
             PronoteSettings(account_type="invalid")
 
+    def test_snapshot_file_required_to_record_or_replay(self):
+        """Test that the 'record' and 'replay' modes require a snapshot file."""
+        with pytest.raises(ValidationError) as exc_info:
+            PronoteSettings(mode="replay")
+        assert "'snapshot_file' is required in 'replay' mode" in str(exc_info.value)
+        settings = PronoteSettings(mode="record", snapshot_file=Path("lessons.json"))
+        assert settings.snapshot_file == Path("lessons.json")
+
     def test_parent_without_child_fails(self):
         """Test that 'parent' account_type requires a child."""
         with pytest.raises(ValidationError) as exc_info:
@@ -201,6 +210,25 @@ class TestSyncSettings:
         with pytest.raises(ValidationError):
             SyncSettings(weeks=-1)
 
+    def test_refresh_tiers_must_cover_the_weeks(self):
+        """Test that refresh tiers must add up to the number of weeks."""
+        with pytest.raises(ValidationError):
+            SyncSettings(
+                weeks=3,
+                refresh_tiers=[RefreshTier(weeks=1)],
+                refresh_state_file=Path("refresh.json"),
+            )
+
+    def test_refresh_tiers_require_a_state_file(self):
+        """Test that refresh tiers require a state file."""
+        with pytest.raises(ValidationError):
+            SyncSettings(weeks=3, refresh_tiers=[RefreshTier(weeks=3)])
+
+    def test_journal_file_requires_a_mirror_file(self):
+        """Test that a journal file requires a mirror file."""
+        with pytest.raises(ValidationError):
+            SyncSettings(weeks=3, journal_file=Path("journal.jsonl"))
+
 
 class TestTimeAdjustmentRule:
     """Test the TimeAdjustment class."""
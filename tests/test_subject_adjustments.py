@@ -1,28 +1,25 @@
-from pronote2calendar.subject_adjustments import apply_subject_adjustments
-
-
-class DummySubject:
-    """Mock subject object for testing"""
-
-    def __init__(self, name):
-        self.name = name
+from dataclasses import replace
+from datetime import datetime, timedelta
 
+from pronote2calendar.models import LessonRecord, SubjectRecord
+from pronote2calendar.subject_adjustments import apply_subject_adjustments
 
-class DummyLesson:
-    """Mock lesson object for testing"""
 
-    def __init__(self, subject_name: str = "Math"):
-        self.subject = DummySubject(subject_name)
-        self.start = None
-        self.end = None
-        self.classroom = "Room 1"
-        self.teacher_name = "Teacher"
-        self.num = 1
+def make_lesson(subject_name: str = "Math") -> LessonRecord:
+    start = datetime(2025, 10, 6, 9, 0)
+    return LessonRecord(
+        start=start,
+        end=start + timedelta(hours=1),
+        num=1,
+        subject=SubjectRecord(subject_name),
+        teacher_name="Teacher",
+        classroom="Room 1",
+    )
 
 
 def test_no_adjustments_returns_unchanged():
     """When no adjustments are configured, lessons should be unchanged"""
-    lesson = DummyLesson("Physique-Chimie")
+    lesson = make_lesson("Physique-Chimie")
 
     result = apply_subject_adjustments([lesson], None)
 
@@ -32,7 +29,7 @@ def test_no_adjustments_returns_unchanged():
 
 def test_empty_subject_mapping_returns_unchanged():
     """When subject mapping is empty, lessons should be unchanged"""
-    lesson = DummyLesson("Physique-Chimie")
+    lesson = make_lesson("Physique-Chimie")
 
     result = apply_subject_adjustments([lesson], {})
 
@@ -42,7 +39,7 @@ def test_empty_subject_mapping_returns_unchanged():
 
 def test_adjust_single_subject():
     """Adjust a single subject name"""
-    lesson = DummyLesson("Physique-Chimie")
+    lesson = make_lesson("Physique-Chimie")
 
     adjustments = {"Physique-Chimie": "Physique"}
 
@@ -53,7 +50,7 @@ def test_adjust_single_subject():
 
 def test_no_adjustment_when_subject_not_in_mapping():
     """No adjustment when subject is not in the mapping"""
-    lesson = DummyLesson("Français")
+    lesson = make_lesson("Français")
 
     adjustments = {
         "Physique-Chimie": "Physique",
@@ -67,9 +64,9 @@ def test_no_adjustment_when_subject_not_in_mapping():
 
 def test_multiple_subjects_adjusted():
     """All lessons with matching subjects should be adjusted"""
-    lesson1 = DummyLesson("Physique-Chimie")
-    lesson2 = DummyLesson("SVT")
-    lesson3 = DummyLesson("Français")
+    lesson1 = make_lesson("Physique-Chimie")
+    lesson2 = make_lesson("SVT")
+    lesson3 = make_lesson("Français")
 
     adjustments = {
         "Physique-Chimie": "Physique",
@@ -87,13 +84,13 @@ def test_multiple_subjects_adjusted():
 def test_many_subject_mappings():
     """Test with many subject mappings as per config"""
     lessons = [
-        DummyLesson("Physique-Chimie"),
-        DummyLesson("SVT"),
-        DummyLesson("Histoire-Géographie"),
-        DummyLesson("Vie de classe"),
-        DummyLesson("Éducation musicale"),
-        DummyLesson("Éducation physique et sportive"),
-        DummyLesson("Français"),
+        make_lesson("Physique-Chimie"),
+        make_lesson("SVT"),
+        make_lesson("Histoire-Géographie"),
+        make_lesson("Vie de classe"),
+        make_lesson("Éducation musicale"),
+        make_lesson("Éducation physique et sportive"),
+        make_lesson("Français"),
     ]
 
     adjustments = {
@@ -119,7 +116,7 @@ def test_many_subject_mappings():
 
 def test_accent_handling():
     """Test that accented characters in subject names are handled correctly"""
-    lesson = DummyLesson("Éducation physique et sportive")
+    lesson = make_lesson("Éducation physique et sportive")
 
     adjustments = {"Éducation physique et sportive": "EPS"}
 
@@ -130,7 +127,7 @@ def test_accent_handling():
 
 def test_case_sensitive_matching():
     """Test that subject matching is case-sensitive"""
-    lesson = DummyLesson("physique")
+    lesson = make_lesson("physique")
 
     adjustments = {"Physique": "Phys"}
 
@@ -142,7 +139,7 @@ def test_case_sensitive_matching():
 
 def test_single_lesson():
     """Test adjustment with a single lesson"""
-    lesson = DummyLesson("Math")
+    lesson = make_lesson("Math")
 
     adjustments = {"Math": "Mathématiques"}
 
@@ -155,9 +152,9 @@ def test_single_lesson():
 def test_multiple_lessons_same_subject():
     """Test that all lessons with the same subject are adjusted"""
     lessons = [
-        DummyLesson("Math"),
-        DummyLesson("Math"),
-        DummyLesson("Math"),
+        make_lesson("Math"),
+        make_lesson("Math"),
+        make_lesson("Math"),
     ]
 
     adjustments = {"Math": "Mathématiques"}
@@ -171,10 +168,12 @@ def test_multiple_lessons_same_subject():
 
 def test_preserves_other_lesson_properties():
     """Test that other lesson properties are preserved during adjustment"""
-    lesson = DummyLesson("Physique-Chimie")
-    lesson.classroom = "Room 101"
-    lesson.teacher_name = "M. Dupont"
-    lesson.num = 5
+    lesson = replace(
+        make_lesson("Physique-Chimie"),
+        classroom="Room 101",
+        teacher_name="M. Dupont",
+        num=5,
+    )
 
     adjustments = {"Physique-Chimie": "Physique"}
 
@@ -198,10 +197,10 @@ def test_empty_lessons_list():
 def test_mixed_mapped_and_unmapped_subjects():
     """Test mix of mapped and unmapped subjects in a single operation"""
     lessons = [
-        DummyLesson("Physique-Chimie"),
-        DummyLesson("Français"),
-        DummyLesson("SVT"),
-        DummyLesson("English"),
+        make_lesson("Physique-Chimie"),
+        make_lesson("Français"),
+        make_lesson("SVT"),
+        make_lesson("English"),
     ]
 
     adjustments = {
@@ -219,7 +218,7 @@ def test_mixed_mapped_and_unmapped_subjects():
 
 def test_subject_with_special_characters():
     """Test subject names with special characters"""
-    lesson = DummyLesson("Histoire-Géographie")
+    lesson = make_lesson("Histoire-Géographie")
 
     adjustments = {"Histoire-Géographie": "Histoire-Géo"}
 
@@ -230,7 +229,7 @@ def test_subject_with_special_characters():
 
 def test_subject_with_spaces():
     """Test subject names with spaces"""
-    lesson = DummyLesson("Vie de classe")
+    lesson = make_lesson("Vie de classe")
 
     adjustments = {"Vie de classe": "Vie de Classe"}
 
@@ -242,9 +241,9 @@ def test_subject_with_spaces():
 def test_unicode_subject_names():
     """Test with various Unicode characters in subject names"""
     lessons = [
-        DummyLesson("Français"),
-        DummyLesson("Mathématiques"),
-        DummyLesson("Éducation civique"),
+        make_lesson("Français"),
+        make_lesson("Mathématiques"),
+        make_lesson("Éducation civique"),
     ]
 
     adjustments = {
@@ -258,3 +257,13 @@ def test_unicode_subject_names():
     assert result[0].subject.name == "FR"
     assert result[1].subject.name == "MATH"
     assert result[2].subject.name == "EC"
+
+
+def test_adjusted_lessons_are_copies():
+    """The lessons and subjects given are left unchanged"""
+    lesson = make_lesson("Physique-Chimie")
+
+    result = apply_subject_adjustments([lesson], {"Physique-Chimie": "Physique"})
+
+    assert lesson.subject.name == "Physique-Chimie"
+    assert result[0] == replace(lesson, subject=SubjectRecord("Physique"))
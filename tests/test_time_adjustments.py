@@ -1,31 +1,29 @@
 from datetime import datetime, time, timedelta
 from zoneinfo import ZoneInfo
 
+from pronote2calendar.models import LessonRecord, SubjectRecord
 from pronote2calendar.settings import TimeAdjustmentRule
 from pronote2calendar.time_adjustments import apply_time_adjustments
 
 
-class DummyLesson:
-    """Mock lesson object for testing"""
-
-    def __init__(self, start: datetime, end: datetime, subject_name: str = "Math"):
-        class Subject:
-            def __init__(self, name):
-                self.name = name
-
-        self.start = start
-        self.end = end
-        self.subject = Subject(subject_name)
-        self.classroom = "Room 1"
-        self.teacher_name = "Teacher"
-        self.num = 1
+def make_lesson(
+    start: datetime, end: datetime, subject_name: str = "Math"
+) -> LessonRecord:
+    return LessonRecord(
+        start=start,
+        end=end,
+        num=1,
+        subject=SubjectRecord(subject_name),
+        teacher_name="Teacher",
+        classroom="Room 1",
+    )
 
 
 def test_no_adjustments_returns_unchanged():
     """When no adjustments are configured, lessons should be unchanged"""
     start = datetime(2025, 10, 6, 9, 0, tzinfo=ZoneInfo("Europe/Paris"))  # Monday
     end = start + timedelta(hours=1)
-    lesson = DummyLesson(start, end)
+    lesson = make_lesson(start, end)
 
     result = apply_time_adjustments([lesson], None)
 
@@ -38,7 +36,7 @@ def test_empty_adjustments_list_returns_unchanged():
     """When adjustments list is empty, lessons should be unchanged"""
     start = datetime(2025, 10, 6, 9, 0, tzinfo=ZoneInfo("Europe/Paris"))  # Monday
     end = start + timedelta(hours=1)
-    lesson = DummyLesson(start, end)
+    lesson = make_lesson(start, end)
 
     result = apply_time_adjustments([lesson], [])
 
@@ -51,7 +49,7 @@ def test_adjust_start_time_with_list_of_weekdays():
     """Adjust start time when weekday matches a list of weekdays"""
     start = datetime(2025, 10, 6, 9, 0, tzinfo=ZoneInfo("Europe/Paris"))  # Monday
     end = start + timedelta(hours=1)
-    lesson = DummyLesson(start, end)
+    lesson = make_lesson(start, end)
 
     adjustments = [
         TimeAdjustmentRule(
@@ -71,7 +69,7 @@ def test_adjust_end_time_with_list_of_weekdays():
     start = datetime(2025, 10, 6, 9, 0, tzinfo=ZoneInfo("Europe/Paris"))  # Monday
     end = start + timedelta(hours=1)
     end = end.replace(hour=10)  # 10:00
-    lesson = DummyLesson(start, end)
+    lesson = make_lesson(start, end)
 
     adjustments = [
         TimeAdjustmentRule(
@@ -91,7 +89,7 @@ def test_adjust_both_start_and_end_times():
     start = datetime(2025, 10, 6, 9, 0, tzinfo=ZoneInfo("Europe/Paris"))  # Monday
     end = start + timedelta(hours=1)
     end = end.replace(hour=10)  # 10:00
-    lesson = DummyLesson(start, end)
+    lesson = make_lesson(start, end)
 
     adjustments = [
         TimeAdjustmentRule(
@@ -111,7 +109,7 @@ def test_no_adjustment_when_weekday_does_not_match():
     """No adjustment when weekday doesn't match the rule"""
     start = datetime(2025, 10, 5, 9, 0, tzinfo=ZoneInfo("Europe/Paris"))  # Sunday
     end = start + timedelta(hours=1)
-    lesson = DummyLesson(start, end)
+    lesson = make_lesson(start, end)
 
     adjustments = [
         TimeAdjustmentRule(
@@ -130,7 +128,7 @@ def test_no_adjustment_when_time_does_not_match():
     """No adjustment when the time doesn't match any rule"""
     start = datetime(2025, 10, 6, 10, 30, tzinfo=ZoneInfo("Europe/Paris"))  # Monday
     end = start + timedelta(hours=1)
-    lesson = DummyLesson(start, end)
+    lesson = make_lesson(start, end)
 
     adjustments = [
         TimeAdjustmentRule(
@@ -148,7 +146,7 @@ def test_multiple_rules_first_match_applies():
     """When multiple rules match, the first matching rule applies"""
     start = datetime(2025, 10, 6, 9, 0, tzinfo=ZoneInfo("Europe/Paris"))  # Monday
     end = start + timedelta(hours=1)
-    lesson = DummyLesson(start, end)
+    lesson = make_lesson(start, end)
 
     adjustments = [
         TimeAdjustmentRule(
@@ -171,7 +169,7 @@ def test_sunday_as_seven():
     """Sunday is specified as 7"""
     start = datetime(2025, 10, 5, 9, 0, tzinfo=ZoneInfo("Europe/Paris"))  # Sunday
     end = start + timedelta(hours=1)
-    lesson = DummyLesson(start, end)
+    lesson = make_lesson(start, end)
 
     adjustments = [
         TimeAdjustmentRule(
@@ -189,7 +187,7 @@ def test_time_adjustment_with_varied_formats():
     """Time adjustment should handle different time formats (H:MM and HH:MM)"""
     start = datetime(2025, 10, 6, 9, 0, tzinfo=ZoneInfo("Europe/Paris"))  # Monday
     end = start + timedelta(hours=1)
-    lesson = DummyLesson(start, end)
+    lesson = make_lesson(start, end)
 
     adjustments = [
         TimeAdjustmentRule(
@@ -207,11 +205,11 @@ def test_multiple_lessons_all_adjusted():
     """All lessons should be adjusted if they match the rules"""
     start1 = datetime(2025, 10, 6, 9, 0, tzinfo=ZoneInfo("Europe/Paris"))  # Monday
     end1 = start1 + timedelta(hours=1)
-    lesson1 = DummyLesson(start1, end1)
+    lesson1 = make_lesson(start1, end1)
 
     start2 = datetime(2025, 10, 7, 9, 0, tzinfo=ZoneInfo("Europe/Paris"))  # Tuesday
     end2 = start2 + timedelta(hours=1)
-    lesson2 = DummyLesson(start2, end2)
+    lesson2 = make_lesson(start2, end2)
 
     adjustments = [
         TimeAdjustmentRule(
@@ -231,7 +229,7 @@ def test_multiple_time_mappings_in_single_rule():
     """A single rule can have multiple time mappings"""
     start = datetime(2025, 10, 6, 10, 0, tzinfo=ZoneInfo("Europe/Paris"))  # Monday
     end = start + timedelta(hours=1)
-    lesson = DummyLesson(start, end)
+    lesson = make_lesson(start, end)
 
     adjustments = [
         TimeAdjustmentRule(
@@ -258,7 +256,7 @@ def test_preserves_timezone_after_adjustment():
     tz = ZoneInfo("Europe/Paris")
     start = datetime(2025, 10, 6, 9, 0, tzinfo=tz)
     end = start + timedelta(hours=1)
-    lesson = DummyLesson(start, end)
+    lesson = make_lesson(start, end)
 
     adjustments = [
         TimeAdjustmentRule(
@@ -278,17 +276,17 @@ def test_complex_scenario_from_config():
     # Monday 09:00-10:00
     monday_start = datetime(2025, 10, 6, 9, 0, tzinfo=ZoneInfo("Europe/Paris"))
     monday_end = datetime(2025, 10, 6, 10, 0, tzinfo=ZoneInfo("Europe/Paris"))
-    lesson_monday = DummyLesson(monday_start, monday_end)
+    lesson_monday = make_lesson(monday_start, monday_end)
 
     # Tuesday 10:00-11:00
     tuesday_start = datetime(2025, 10, 7, 10, 0, tzinfo=ZoneInfo("Europe/Paris"))
     tuesday_end = datetime(2025, 10, 7, 11, 0, tzinfo=ZoneInfo("Europe/Paris"))
-    lesson_tuesday = DummyLesson(tuesday_start, tuesday_end)
+    lesson_tuesday = make_lesson(tuesday_start, tuesday_end)
 
     # Wednesday 09:00-10:00
     wednesday_start = datetime(2025, 10, 8, 9, 0, tzinfo=ZoneInfo("Europe/Paris"))
     wednesday_end = datetime(2025, 10, 8, 10, 0, tzinfo=ZoneInfo("Europe/Paris"))
-    lesson_wednesday = DummyLesson(wednesday_start, wednesday_end)
+    lesson_wednesday = make_lesson(wednesday_start, wednesday_end)
 
     adjustments = [
         TimeAdjustmentRule(
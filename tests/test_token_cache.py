@@ -0,0 +1,100 @@
+import json
+import os
+from datetime import datetime, timedelta
+
+from pronote2calendar.token_cache import restore_token, store_token, use_token_cache
+
+NOW = datetime(2025, 10, 6, 8, 0)
+
+
+class FakeCredentials:
+    service_account_email = "sync@project.iam.gserviceaccount.com"
+    scopes = ["https://www.googleapis.com/auth/calendar"]
+
+    def __init__(self):
+        self.token = None
+        self.expiry = None
+        self.refreshed = 0
+
+    @property
+    def valid(self):
+        return self.token is not None and self.expiry > NOW + timedelta(minutes=4)
+
+    def refresh(self, request):
+        self.refreshed += 1
+        self.token = f"token{self.refreshed}"
+        self.expiry = NOW + timedelta(hours=1)
+
+
+def test_token_is_requested_then_reused(tmp_path):
+    cache_file = tmp_path / "token.json"
+    use_token_cache(FakeCredentials(), cache_file, request=object())
+
+    credentials = FakeCredentials()
+    use_token_cache(credentials, cache_file, request=object())
+
+    assert credentials.refreshed == 0
+    assert credentials.token == "token1"
+    assert credentials.expiry == NOW + timedelta(hours=1)
+
+
+def test_cache_file_is_only_readable_by_its_owner(tmp_path):
+    cache_file = tmp_path / "token.json"
+
+    use_token_cache(FakeCredentials(), cache_file, request=object())
+
+    assert os.stat(cache_file).st_mode & 0o777 == 0o600
+
+
+def test_expiring_token_is_refreshed(tmp_path):
+    cache_file = tmp_path / "token.json"
+    expiring = FakeCredentials()
+    expiring.token = "old"
+    expiring.expiry = NOW + timedelta(minutes=1)
+    store_token(expiring, cache_file)
+
+    credentials = FakeCredentials()
+    use_token_cache(credentials, cache_file, request=object())
+
+    assert credentials.refreshed == 1
+    assert json.loads(cache_file.read_text())["token"] == "token1"
+
+
+def test_token_of_other_credentials_is_ignored(tmp_path):
+    cache_file = tmp_path / "token.json"
+    other = FakeCredentials()
+    other.service_account_email = "other@project.iam.gserviceaccount.com"
+    other.refresh(None)
+    store_token(other, cache_file)
+
+    assert not restore_token(FakeCredentials(), cache_file)
+
+
+def test_token_cache_readable_by_others_is_ignored(tmp_path):
+    cache_file = tmp_path / "token.json"
+    credentials = FakeCredentials()
+    credentials.refresh(None)
+    store_token(credentials, cache_file)
+    cache_file.chmod(0o644)
+
+    assert not restore_token(FakeCredentials(), cache_file)
+
+
+def test_incomplete_token_cache_is_ignored(tmp_path):
+    cache_file = tmp_path / "token.json"
+    credentials = FakeCredentials()
+    credentials.refresh(None)
+    store_token(credentials, cache_file)
+    data = json.loads(cache_file.read_text())
+
+    for broken in (
+        {key: value for key, value in data.items() if key != "token"},
+        {**data, "expiry": "tomorrow"},
+        [data],
+    ):
+        cache_file.write_text(json.dumps(broken))
+        assert not restore_token(FakeCredentials(), cache_file)
+
+    credentials = FakeCredentials()
+    use_token_cache(credentials, cache_file, request=object())
+    assert credentials.refreshed == 1
@@ -0,0 +1,98 @@
+import contextlib
+import gzip
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+from google.auth.credentials import AnonymousCredentials
+from googleapiclient import discovery_cache  # type: ignore
+from googleapiclient.discovery import build_from_document  # type: ignore
+
+from pronote2calendar.discovery import compact_discovery_document
+from pronote2calendar.settings import GoogleCalendarSettings
+from pronote2calendar.transport import RequestsHttp, build_http
+
+
+class FakeCalendarHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def setup(self):
+        super().setup()
+        self.server.connections += 1  # type: ignore[attr-defined]
+
+    def do_GET(self):
+        time.sleep(self.server.delay)  # type: ignore[attr-defined]
+        body = json.dumps({"items": [{"id": "e1"}]}).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        if "gzip" in self.headers.get("Accept-Encoding", ""):
+            body = gzip.compress(body)
+            self.send_header("Content-Encoding", "gzip")
+            self.server.gzipped += 1  # type: ignore[attr-defined]
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        # The client may have given up waiting (timeout test)
+        with contextlib.suppress(BrokenPipeError, ConnectionResetError):
+            self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def server():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), FakeCalendarHandler)
+    server.connections = 0  # type: ignore[attr-defined]
+    server.delay = 0  # type: ignore[attr-defined]
+    server.gzipped = 0  # type: ignore[attr-defined]
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def build_local_service(server, http):
+    document = compact_discovery_document(
+        json.loads(discovery_cache.get_static_doc("calendar", "v3"))
+    )
+    document["rootUrl"] = f"http://127.0.0.1:{server.server_port}/"
+    return build_from_document(document, http=http)
+
+
+def test_requests_transport_reuses_connections(server):
+    service = build_local_service(server, RequestsHttp(AnonymousCredentials(), 5))
+
+    for _ in range(5):
+        result = service.events().list(calendarId="calendar@example.com").execute()
+        assert result == {"items": [{"id": "e1"}]}
+
+    assert server.connections == 1
+    assert server.gzipped == 5
+
+
+def test_requests_transport_applies_timeout(server):
+    server.delay = 0.5
+    service = build_local_service(server, RequestsHttp(AnonymousCredentials(), 0.1))
+
+    with pytest.raises(TimeoutError):
+        service.events().list(calendarId="calendar@example.com").execute()
+
+
+def test_build_http_defaults_to_library_transport():
+    settings = GoogleCalendarSettings(calendar_id="calendar@example.com")
+
+    assert build_http(settings, AnonymousCredentials()) is None
+
+
+def test_build_http_selects_requests_transport():
+    settings = GoogleCalendarSettings(
+        calendar_id="calendar@example.com", transport="requests", timeout=10
+    )
+
+    http = build_http(settings, AnonymousCredentials())
+
+    assert isinstance(http, RequestsHttp)
+    assert http.timeout == 10